@@ -1,6 +1,8 @@
+import asyncio
 import json
 import logging
 import time
+from pathlib import Path
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, Field
 import httpx
@@ -8,16 +10,25 @@ from sqlalchemy import select
 
 from common.core.settings import get_settings
 from common.db.session import build_session_factory
-from common.models import UsageEvent
+from common.models import Asset, UsageEvent
 from common.schemas.common import (
     AIImageRequest,
+    SuggestionBatchOut,
+    SuggestionBatchRequest,
+    SuggestionBatchResult,
     SuggestionRequest,
     SuggestionOut,
 )
+from common.utils.content_store import load_content
 from common.utils.deps import build_current_user_dep
+from common.utils.events import publish_event
 from common.utils.rate_limit import RateLimiter
 from common.utils.credits import deduct_credits, refund_credits
+from app.services.image_cache import ImageCache, image_cache_key
+from app.services.images import process_generated_image, record_on_asset
 from app.services.llm_client import generate_text_huggingface
+from app.services.scheduler import PlanCache, ProviderScheduler, lane_for
+from app.services.suggestions import DEFAULT_RULES_PATH, RuleStore, evaluate_texts
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +37,12 @@ settings = get_settings()
 session_factory = build_session_factory(settings.supabase_db_url)
 current_user_dep = build_current_user_dep(settings)
 limiter: RateLimiter | None = None
+image_cache: ImageCache | None = None
+scheduler = ProviderScheduler.from_settings(settings)
+plan_cache = PlanCache(session_factory, settings.plan_cache_ttl_seconds)
+rule_store = RuleStore(
+    Path(settings.suggestion_rules_path) if settings.suggestion_rules_path else DEFAULT_RULES_PATH
+)
 
 
 def set_limiter(rate_limiter: RateLimiter) -> None:
@@ -33,7 +50,19 @@ def set_limiter(rate_limiter: RateLimiter) -> None:
     limiter = rate_limiter
 
 
-async def save_usage(user_id: str, endpoint: str, latency_ms: int, success: bool, cost_usd: float):
+def set_image_cache(cache: ImageCache) -> None:
+    global image_cache
+    image_cache = cache
+
+
+async def save_usage(
+    user_id: str,
+    endpoint: str,
+    latency_ms: int,
+    success: bool,
+    cost_usd: float,
+    queue_wait_ms: int = 0,
+):
     async with session_factory() as db:
         db.add(
             UsageEvent(
@@ -43,6 +72,7 @@ async def save_usage(user_id: str, endpoint: str, latency_ms: int, success: bool
                 latency_ms=latency_ms,
                 success=success,
                 cost_usd=cost_usd,
+                queue_wait_ms=queue_wait_ms,
             )
         )
         await db.commit()
@@ -81,19 +111,27 @@ async def generate_text(payload: GenerateTextRequest, user=Depends(current_user_
     if limiter:
         await limiter.enforce(f"rate:ai:text:{user['id']}")
 
+    provider = "huggingface" if settings.llm_provider.lower() == "huggingface" else "deepseek"
+    lane = lane_for(await plan_cache.plan(user), settings)
+    scheduler.admit(provider, lane)
+
     credit_cost = 2
     await deduct_credits(
         session_factory, user["id"], credit_cost, "ai_text_generation"
     )
 
     started = time.perf_counter()
+    queue_wait_ms = 0
     success = True
     generated_text = ""
     try:
-        if settings.llm_provider.lower() == "huggingface":
-            generated_text = await generate_text_huggingface(payload.prompt, settings)
-        else:
-            generated_text = await generate_text_deepseek(payload.prompt)
+        async with scheduler.slot(user["id"], provider, lane) as slot:
+            queue_wait_ms = slot.queue_wait_ms
+            started = time.perf_counter()
+            if provider == "huggingface":
+                generated_text = await generate_text_huggingface(payload.prompt, settings)
+            else:
+                generated_text = await generate_text_deepseek(payload.prompt)
     except HTTPException:
         success = False
         await refund_credits(
@@ -105,50 +143,66 @@ async def generate_text(payload: GenerateTextRequest, user=Depends(current_user_
         await refund_credits(
             session_factory, user["id"], credit_cost, "refund:ai_text_generation_failed"
         )
-        provider = settings.llm_provider.lower()
         raise HTTPException(status_code=502, detail=f"{provider} text generation error: {exc}") from exc
     finally:
         latency_ms = int((time.perf_counter() - started) * 1000)
-        await save_usage(user["id"], "/ai/generate-text", latency_ms, success, 0.002)
+        await save_usage(
+            user["id"], "/ai/generate-text", latency_ms, success, 0.002, queue_wait_ms
+        )
 
+    await publish_event(user["id"], "generation.completed", {"kind": "text"})
     return {"generated_text": generated_text, "content": generated_text}
 
 
+async def generate_image_runpod(payload: AIImageRequest) -> str:
+    if not settings.runpod_api_key or not settings.runpod_sdxl_endpoint:
+        return "https://placehold.co/1024x1024/png?text=Mock+SDXL+Image"
+    async with httpx.AsyncClient(timeout=60) as client:
+        response = await client.post(
+            settings.runpod_sdxl_endpoint,
+            headers={"Authorization": f"Bearer {settings.runpod_api_key}"},
+            json={
+                "input": {
+                    "prompt": payload.prompt,
+                    "width": payload.width,
+                    "height": payload.height,
+                    "style": payload.style,
+                    **({"seed": payload.seed} if payload.seed is not None else {}),
+                }
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data.get("output", {}).get("image_url") or data.get("output", [None])[0]
+
+
 @router.post("/ai/generate-image")
 async def generate_image(payload: AIImageRequest, user=Depends(current_user_dep)):
     if limiter:
         await limiter.enforce(f"rate:ai:image:{user['id']}")
 
+    cache_key = image_cache_key(payload, settings.sdxl_model, user["id"])
+    if image_cache and not payload.bypass_cache:
+        cached = await image_cache.get(cache_key)
+        if cached:
+            return await _serve_cached_image(payload, cached, user["id"])
+
+    lane = lane_for(await plan_cache.plan(user), settings)
+    scheduler.admit("runpod", lane)
+
     credit_cost = 8
     await deduct_credits(
         session_factory, user["id"], credit_cost, "ai_image_generation"
     )
 
     started = time.perf_counter()
+    queue_wait_ms = 0
     success = True
     try:
-        if not settings.runpod_api_key or not settings.runpod_sdxl_endpoint:
-            return {
-                "campaign_id": payload.campaign_id,
-                "image_url": "https://placehold.co/1024x1024/png?text=Mock+SDXL+Image",
-            }
-        async with httpx.AsyncClient(timeout=60) as client:
-            response = await client.post(
-                settings.runpod_sdxl_endpoint,
-                headers={"Authorization": f"Bearer {settings.runpod_api_key}"},
-                json={
-                    "input": {
-                        "prompt": payload.prompt,
-                        "width": payload.width,
-                        "height": payload.height,
-                        "style": payload.style,
-                    }
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-            image_url = data.get("output", {}).get("image_url") or data.get("output", [None])[0]
-            return {"campaign_id": payload.campaign_id, "image_url": image_url}
+        async with scheduler.slot(user["id"], "runpod", lane) as slot:
+            queue_wait_ms = slot.queue_wait_ms
+            started = time.perf_counter()
+            image_url = await generate_image_runpod(payload)
     except HTTPException:
         success = False
         await refund_credits(
@@ -163,24 +217,78 @@ async def generate_image(payload: AIImageRequest, user=Depends(current_user_dep)
         raise HTTPException(status_code=502, detail=f"RunPod error: {exc}") from exc
     finally:
         latency_ms = int((time.perf_counter() - started) * 1000)
-        await save_usage(user["id"], "/ai/generate-image", latency_ms, success, 0.01)
+        await save_usage(
+            user["id"], "/ai/generate-image", latency_ms, success, 0.01, queue_wait_ms
+        )
+
+    result = {"campaign_id": payload.campaign_id, "image_url": image_url}
+    derivatives = await process_generated_image(
+        session_factory, image_url, user["id"], payload.asset_id, settings
+    )
+    if derivatives:
+        result["derivatives"] = derivatives
+    if image_cache:
+        await image_cache.put(cache_key, {"image_url": image_url, "derivatives": derivatives})
+    await publish_event(user["id"], "generation.completed", {"kind": "image", **result})
+    return result
+
+
+async def _serve_cached_image(payload: AIImageRequest, cached: dict, user_id: str) -> dict:
+    credit_cost = settings.image_cache_hit_credits
+    if credit_cost > 0:
+        await deduct_credits(session_factory, user_id, credit_cost, "ai_image_cache_hit")
+    await save_usage(user_id, "/ai/generate-image:cache-hit", 0, True, 0.0)
+    derivatives = cached.get("derivatives")
+    if payload.asset_id is not None and derivatives:
+        await record_on_asset(
+            session_factory, payload.asset_id, user_id, cached["image_url"], derivatives
+        )
+    result = {"campaign_id": payload.campaign_id, "image_url": cached["image_url"], "cached": True}
+    if derivatives:
+        result["derivatives"] = derivatives
+    return result
 
 
 @router.post("/ai/suggestions", response_model=SuggestionOut)
 async def suggestion_engine(payload: SuggestionRequest, user=Depends(current_user_dep)):
     if limiter:
         await limiter.enforce(f"rate:ai:suggestions:{user['id']}")
-    text = payload.asset_text.lower()
-    suggestions: list[str] = []
-    if "cta" not in text:
-        suggestions.append("Add a stronger CTA above the fold to increase click-through rate.")
-    if len(text) < 300:
-        suggestions.append("Expand value proposition details to reduce ambiguity and boost trust.")
-    if "social proof" not in text and "testimonial" not in text:
-        suggestions.append("Include a testimonial or trust badge section for conversion confidence.")
-    if not suggestions:
-        suggestions.append("A/B test headline variants with quantified outcomes.")
-    return SuggestionOut(suggestions=suggestions)
+    [result] = rule_store.engine().evaluate([payload.asset_text])
+    return SuggestionOut(suggestions=result["suggestions"])
+
+
+@router.post("/ai/suggestions/batch", response_model=SuggestionBatchOut)
+async def suggestion_batch(payload: SuggestionBatchRequest, user=Depends(current_user_dep)):
+    if limiter:
+        await limiter.enforce(f"rate:ai:suggestions:{user['id']}")
+    items = [(item.asset_id, item.asset_text) for item in payload.items]
+    if not items and payload.campaign_id is not None:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(Asset.id, Asset.content, Asset.content_ref, Asset.content_sha256)
+                .where(Asset.campaign_id == payload.campaign_id, Asset.owner_id == user["id"])
+                .order_by(Asset.id)
+            )
+            rows = result.all()
+        texts = await asyncio.gather(*(load_content(row, settings) for row in rows))
+        items = [(row.id, text) for row, text in zip(rows, texts)]
+    if not items:
+        raise HTTPException(status_code=400, detail="Provide items or a campaign with assets")
+
+    results = await evaluate_texts(
+        rule_store, [text for _, text in items], settings.cpu_pool_workers
+    )
+    return SuggestionBatchOut(
+        results=[
+            SuggestionBatchResult(
+                index=i,
+                asset_id=asset_id,
+                suggestions=result["suggestions"],
+                metrics=result["metrics"],
+            )
+            for i, ((asset_id, _), result) in enumerate(zip(items, results))
+        ]
+    )
 
 
 @router.post("/ai/refine")
@@ -1,19 +1,39 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from redis.asyncio import from_url
 from sqlalchemy.engine import make_url
 
 from common.core.settings import get_settings, mask_db_url
 from common.core.logging import configure_logging, get_logger
+from common.core.stalls import install_stall_profiler
+from common.db.session import dispose_engines, pool_metrics, warm_up_engine
 from common.schemas.common import APIMessage
+from common.utils.load_shedding import install_load_shedding
 from common.utils.rate_limit import RateLimiter
-from app.api.v1.routes import router, set_limiter
+from app.api.v1.routes import router, scheduler, set_image_cache, set_limiter
+from app.services.image_cache import ImageCache
+from app.services.workers import shutdown_pool
 
 settings = get_settings()
 configure_logging(settings.log_level)
 logger = get_logger("ai-generation-service")
 
-app = FastAPI(title="AI Generation Service", version="1.0.0", docs_url="/docs")
+app = FastAPI(
+    title="AI Generation Service",
+    version="1.0.0",
+    docs_url="/docs",
+    default_response_class=ORJSONResponse,
+)
+stall_profiler = install_stall_profiler(app, settings)
+load_monitor = install_load_shedding(
+    app,
+    settings,
+    low_priority=(
+        f"{settings.api_prefix}/ai/suggestions/batch",
+        f"{settings.api_prefix}/ai/regenerate",
+    ),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[str(o) for o in settings.cors_origins],
@@ -24,6 +44,14 @@ app.add_middleware(
 
 redis_client = from_url(settings.redis_url, decode_responses=True)
 set_limiter(RateLimiter(redis_client=redis_client, limit=40, window_seconds=60))
+set_image_cache(
+    ImageCache(
+        redis_client=redis_client,
+        ttl_seconds=settings.image_cache_ttl_seconds,
+        max_entries=settings.image_cache_max_entries,
+        max_bytes=settings.image_cache_max_bytes,
+    )
+)
 app.include_router(router, prefix=settings.api_prefix)
 
 
@@ -40,6 +68,41 @@ async def startup_log_db_target() -> None:
     )
 
 
+@app.on_event("shutdown")
+async def shutdown_worker_pool() -> None:
+    shutdown_pool()
+
+
+@app.on_event("startup")
+async def warm_up_db_pool() -> None:
+    await warm_up_engine(settings.supabase_db_url, settings.db_warmup_connections)
+
+
+@app.on_event("shutdown")
+async def dispose_db_engines() -> None:
+    await dispose_engines()
+
+
 @app.get("/health", response_model=APIMessage)
 async def health():
     return APIMessage(message="ok")
+
+
+@app.get("/health/db-pool")
+async def db_pool_health():
+    return pool_metrics()
+
+
+@app.get("/health/load")
+async def load_health():
+    return load_monitor.snapshot()
+
+
+@app.get("/health/stalls")
+async def stall_health():
+    return stall_profiler.snapshot()
+
+
+@app.get("/health/provider-queue")
+async def provider_queue_health():
+    return scheduler.snapshot()
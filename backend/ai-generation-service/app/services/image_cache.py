@@ -0,0 +1,103 @@
+"""Deterministic cache of image generation results, stored in Redis.
+
+Entries are keyed by a SHA-256 of the owner and the request fields that
+determine the output: prompt, style, size, seed and model. The owner is
+part of the key because an entry holds private ``storage://<owner>/...``
+derivative paths that only that owner can sign. Each entry expires after a
+TTL.
+A sorted set tracks recency for LRU eviction, and a hash tracks the
+accounted size of every entry so that both ``max_entries`` and ``max_bytes``
+can be enforced. Like the rate limiter, the cache fails open when Redis is
+unavailable.
+"""
+
+import hashlib
+import json
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from common.schemas.common import AIImageRequest
+
+
+def image_cache_key(payload: AIImageRequest, model: str, owner_id: str) -> str:
+    fields = {
+        "owner_id": owner_id,
+        "prompt": " ".join(payload.prompt.split()),
+        "style": payload.style,
+        "width": payload.width,
+        "height": payload.height,
+        "seed": payload.seed,
+        "model": model,
+    }
+    raw = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    def __init__(
+        self,
+        redis_client: Redis,
+        ttl_seconds: int,
+        max_entries: int,
+        max_bytes: int,
+        prefix: str = "imgcache",
+    ):
+        self.redis = redis_client
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entry = f"{prefix}:entry:"
+        self._lru = f"{prefix}:lru"
+        self._sizes = f"{prefix}:sizes"
+        self._total = f"{prefix}:bytes"
+
+    async def get(self, key: str) -> dict | None:
+        try:
+            raw = await self.redis.get(self._entry + key)
+            if raw is None:
+                # Expired by TTL: drop its bookkeeping so accounting stays exact.
+                await self._forget(key)
+                return None
+            await self.redis.zadd(self._lru, {key: time.time()})
+            return json.loads(raw)
+        except RedisError:
+            return None
+
+    async def put(self, key: str, entry: dict) -> None:
+        raw = json.dumps(entry)
+        derivatives = entry.get("derivatives") or {}
+        size = len(raw) + sum(d.get("bytes", 0) for d in derivatives.values())
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.set(self._entry + key, raw, ex=self.ttl)
+                pipe.zadd(self._lru, {key: time.time()})
+                pipe.hget(self._sizes, key)
+                pipe.hset(self._sizes, key, size)
+                results = await pipe.execute()
+            previous = int(results[2] or 0)
+            await self.redis.incrby(self._total, size - previous)
+            await self._evict()
+        except RedisError:
+            return
+
+    async def _forget(self, key: str) -> None:
+        size = await self.redis.hget(self._sizes, key)
+        removed = await self.redis.zrem(self._lru, key)
+        if removed and size is not None:
+            await self.redis.hdel(self._sizes, key)
+            await self.redis.decrby(self._total, int(size))
+
+    async def _evict(self) -> None:
+        while True:
+            count = await self.redis.zcard(self._lru)
+            total = int(await self.redis.get(self._total) or 0)
+            if count <= self.max_entries and total <= self.max_bytes:
+                return
+            oldest = await self.redis.zrange(self._lru, 0, 0)
+            if not oldest:
+                return
+            key = oldest[0]
+            await self.redis.delete(self._entry + key)
+            await self._forget(key)
@@ -0,0 +1,138 @@
+"""Post-processing of generated images into small gallery derivatives.
+
+The provider image is downloaded once. Resizing and WebP encoding run in the
+shared process pool, and each derivative is uploaded to the private bucket
+under ``<owner>/images/<key>/``.
+"""
+
+import asyncio
+import hashlib
+import io
+import logging
+
+import httpx
+from PIL import Image
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.core.settings import Settings
+from common.db.jsonb import merge_jsonb
+from common.db.routing import record_write
+from common.models import Asset
+from common.utils.storage import storage_enabled, upload_bytes
+from app.services.workers import get_pool
+
+logger = logging.getLogger(__name__)
+
+MAX_SOURCE_BYTES = 20 * 1024 * 1024
+# name -> longest edge in pixels (None keeps the original size)
+DERIVATIVES: dict[str, int | None] = {"thumbnail": 256, "preview": 768, "full": None}
+WEBP_QUALITY = 80
+
+
+def render_derivatives(source: bytes) -> dict[str, tuple[bytes, int, int]]:
+    """Resize and encode ``source`` as WebP; runs inside a worker process."""
+    with Image.open(io.BytesIO(source)) as image:
+        image.load()
+        has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+        base = image.convert("RGBA" if has_alpha else "RGB")
+    rendered = {}
+    for name, edge in DERIVATIVES.items():
+        variant = base.copy()
+        if edge is not None:
+            variant.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, format="WEBP", quality=WEBP_QUALITY, method=4)
+        rendered[name] = (buffer.getvalue(), variant.width, variant.height)
+    return rendered
+
+
+async def _download(image_url: str) -> bytes:
+    async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
+        async with client.stream("GET", image_url) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > MAX_SOURCE_BYTES:
+                    raise ValueError("Generated image exceeds size limit")
+                chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def build_derivatives(image_url: str, owner_id: str, settings: Settings) -> dict:
+    """Return ``{name: {"url", "width", "height", "bytes"}}`` for each derivative."""
+    source = await _download(image_url)
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(
+        get_pool(settings.cpu_pool_workers), render_derivatives, source
+    )
+    key = hashlib.sha256(source).hexdigest()[:24]
+    names = list(rendered)
+    urls = await asyncio.gather(
+        *(
+            # Same source bytes map to the same path; re-generating must overwrite, not 409.
+            upload_bytes(
+                f"{owner_id}/images/{key}/{name}.webp",
+                rendered[name][0],
+                "image/webp",
+                settings,
+                upsert=True,
+            )
+            for name in names
+        )
+    )
+    return {
+        name: {
+            "url": url,
+            "width": rendered[name][1],
+            "height": rendered[name][2],
+            "bytes": len(rendered[name][0]),
+        }
+        for name, url in zip(names, urls)
+    }
+
+
+async def record_on_asset(
+    session_factory: async_sessionmaker[AsyncSession],
+    asset_id: int,
+    owner_id: str,
+    image_url: str,
+    derivatives: dict,
+) -> bool:
+    async with session_factory() as db:
+        result = await db.execute(
+            update(Asset)
+            .where(Asset.id == asset_id, Asset.owner_id == owner_id)
+            .values(
+                metadata_json=merge_jsonb(
+                    Asset.metadata_json, {"image_url": image_url, "derivatives": derivatives}
+                )
+            )
+        )
+        await db.commit()
+    if result.rowcount == 0:
+        return False
+    await record_write(owner_id, "assets")
+    return True
+
+
+async def process_generated_image(
+    session_factory: async_sessionmaker[AsyncSession],
+    image_url: str,
+    owner_id: str,
+    asset_id: int | None,
+    settings: Settings,
+) -> dict | None:
+    """Best-effort derivative stage; failures are logged, never raised."""
+    if not image_url or not storage_enabled(settings):
+        return None
+    try:
+        derivatives = await build_derivatives(image_url, owner_id, settings)
+        if asset_id is not None:
+            await record_on_asset(session_factory, asset_id, owner_id, image_url, derivatives)
+        return derivatives
+    except Exception:
+        logger.exception("Image derivative processing failed for %s", image_url)
+        return None
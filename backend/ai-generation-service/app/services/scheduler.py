@@ -0,0 +1,274 @@
+"""In-process fair-share scheduler in front of the generation providers.
+
+Every provider call takes a slot first. A slot is free when the replica is
+under ``provider_global_concurrency`` calls in flight and the provider is
+under its own cap. Waiting requests are kept per lane and per provider:
+
+- Lanes are strict priorities. The ``paid`` lane (users on ``paid_plans``)
+  is always served before ``free``. The plan is read from ``users.plan``
+  through ``PlanCache``, not from the token: the JWT ``plan`` claim is only
+  set when a token is issued and can lag for ``jwt_exp_minutes``.
+- Inside a lane, users share capacity by start-time weighted fair queuing.
+  Each request is tagged ``start = max(virtual_time, user's last finish)``
+  and ``finish = start + cost / weight``, and the smallest finish goes
+  next. A user with a burst of requests therefore interleaves with everyone
+  else instead of draining the queue first.
+
+Admission looks at queue depth before anything is charged. The expected
+wait is the queued work in the caller's lane and the lanes above it,
+divided by the provider's throughput (its cap over its observed mean call
+time). A request that would wait longer than
+``provider_queue_max_wait_seconds`` gets 429, and ``Retry-After`` says
+when enough of the queue should have drained. Time spent queued is
+reported separately from the provider call.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from common.core.settings import Settings
+from common.models import User
+
+logger = logging.getLogger(__name__)
+
+LANES = ("paid", "free")
+# Smoothing for the per-provider mean call time used by admission.
+SERVICE_TIME_ALPHA = 0.2
+
+
+@dataclass(order=True)
+class _Waiter:
+    finish: float
+    seq: int
+    user_id: str = field(compare=False)
+    cost: float = field(compare=False)
+    start: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued_at: float = field(compare=False)
+
+
+@dataclass
+class Slot:
+    provider: str
+    lane: str
+    queue_wait_ms: int = 0
+
+
+class _Lane:
+    def __init__(self) -> None:
+        self.queues: dict[str, list[_Waiter]] = {}
+        self.virtual_time = 0.0
+        self.last_finish: dict[str, float] = {}
+
+    def queued_cost(self, provider: str) -> float:
+        return sum(w.cost for w in self.queues.get(provider, ()) if not w.future.done())
+
+    def push(self, provider: str, waiter: _Waiter) -> None:
+        heapq.heappush(self.queues.setdefault(provider, []), waiter)
+
+    def peek(self, provider: str) -> _Waiter | None:
+        queue = self.queues.get(provider)
+        while queue and queue[0].future.done():  # cancelled while waiting
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+
+    def pop(self, provider: str) -> _Waiter:
+        waiter = heapq.heappop(self.queues[provider])
+        self.virtual_time = max(self.virtual_time, waiter.start)
+        if len(self.last_finish) > 4096:
+            # Tags at or below the virtual time no longer affect anyone's start.
+            self.last_finish = {
+                user: tag for user, tag in self.last_finish.items() if tag > self.virtual_time
+            }
+        return waiter
+
+
+class ProviderScheduler:
+    def __init__(
+        self,
+        global_limit: int,
+        provider_limits: dict[str, int],
+        max_queue_depth: int,
+        max_queue_wait: float,
+        default_service_time: float = 5.0,
+    ):
+        self.global_limit = global_limit
+        self.provider_limits = provider_limits
+        self.max_queue_depth = max_queue_depth
+        self.max_queue_wait = max_queue_wait
+        self.lanes = {lane: _Lane() for lane in LANES}
+        self.in_flight: dict[str, int] = {provider: 0 for provider in provider_limits}
+        self.service_time = {provider: default_service_time for provider in provider_limits}
+        self._seq = itertools.count()
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "ProviderScheduler":
+        return cls(
+            global_limit=settings.provider_global_concurrency,
+            provider_limits={
+                "deepseek": settings.deepseek_max_concurrency,
+                "huggingface": settings.huggingface_max_concurrency,
+                "runpod": settings.runpod_max_concurrency,
+            },
+            max_queue_depth=settings.provider_queue_max_depth,
+            max_queue_wait=settings.provider_queue_max_wait_seconds,
+        )
+
+    def _total_in_flight(self) -> int:
+        return sum(self.in_flight.values())
+
+    def _has_capacity(self, provider: str) -> bool:
+        return (
+            self._total_in_flight() < self.global_limit
+            and self.in_flight[provider] < self.provider_limits[provider]
+        )
+
+    def _queued_ahead(self, provider: str, lane: str) -> tuple[int, float]:
+        """Requests and cost queued for ``provider`` in ``lane`` and every lane above it."""
+        count, cost = 0, 0.0
+        for name in LANES[: LANES.index(lane) + 1]:
+            queue = self.lanes[name].queues.get(provider, ())
+            count += sum(1 for w in queue if not w.future.done())
+            cost += self.lanes[name].queued_cost(provider)
+        return count, cost
+
+    def expected_wait(self, provider: str, lane: str, cost: float = 1.0) -> float:
+        """Seconds a new request would likely queue before its call starts."""
+        if not self._queued_ahead(provider, lane)[0] and self._has_capacity(provider):
+            return 0.0
+        _, queued = self._queued_ahead(provider, lane)
+        limit = min(self.provider_limits[provider], self.global_limit)
+        return (queued + cost) * self.service_time[provider] / limit
+
+    def admit(self, provider: str, lane: str, cost: float = 1.0) -> None:
+        """Raise 429 with ``Retry-After`` if a new request would queue too long."""
+        depth, _ = self._queued_ahead(provider, lane)
+        wait = self.expected_wait(provider, lane, cost)
+        if depth < self.max_queue_depth and wait <= self.max_queue_wait:
+            return
+        # The queue drains one call per interval; retry once enough have finished.
+        limit = min(self.provider_limits[provider], self.global_limit)
+        interval = self.service_time[provider] / limit
+        retry_after = max(1, math.ceil((wait - self.max_queue_wait) / interval)) * interval
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{provider} queue is full",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def _dispatch(self) -> None:
+        while self._total_in_flight() < self.global_limit:
+            for name in LANES:
+                lane = self.lanes[name]
+                ready = [
+                    (waiter, provider)
+                    for provider in self.provider_limits
+                    if self._has_capacity(provider) and (waiter := lane.peek(provider))
+                ]
+                if ready:
+                    waiter, provider = min(ready, key=lambda item: item[0])
+                    lane.pop(provider)
+                    self.in_flight[provider] += 1
+                    waiter.future.set_result(None)
+                    break
+            else:
+                return
+
+    @asynccontextmanager
+    async def slot(
+        self, user_id: str, provider: str, lane: str = "free", weight: float = 1.0, cost: float = 1.0
+    ) -> AsyncIterator[Slot]:
+        """Wait for a provider slot; admission is checked again on entry."""
+        self.admit(provider, lane, cost)
+        queue = self.lanes[lane]
+        start = max(queue.virtual_time, queue.last_finish.get(user_id, 0.0))
+        finish = start + cost / weight
+        queue.last_finish[user_id] = finish
+        waiter = _Waiter(
+            finish=finish,
+            seq=next(self._seq),
+            user_id=user_id,
+            cost=cost,
+            start=start,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued_at=time.perf_counter(),
+        )
+        queue.push(provider, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(provider, None)  # granted just as the caller went away
+            raise
+        granted_at = time.perf_counter()
+        slot = Slot(provider, lane, int((granted_at - waiter.enqueued_at) * 1000))
+        try:
+            yield slot
+        finally:
+            self._release(provider, time.perf_counter() - granted_at)
+
+    def _release(self, provider: str, service_seconds: float | None) -> None:
+        self.in_flight[provider] -= 1
+        if service_seconds is not None:
+            self.service_time[provider] += SERVICE_TIME_ALPHA * (
+                service_seconds - self.service_time[provider]
+            )
+        self._dispatch()
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": dict(self.in_flight),
+            "queued": {
+                lane: {provider: self._queued_ahead(provider, lane)[0] for provider in self.in_flight}
+                for lane in LANES
+            },
+            "service_time_s": {p: round(t, 3) for p, t in self.service_time.items()},
+        }
+
+
+class PlanCache:
+    """Users' ``users.plan``, cached in-process for ``ttl`` seconds.
+
+    A plan change reaches admission within ``ttl``. If the lookup fails, the
+    token's claim is used for that request and nothing is cached.
+    """
+
+    def __init__(self, session_factory: Callable, ttl: float, max_entries: int = 10_000):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[str, tuple[str, float]] = {}
+
+    async def plan(self, user: dict) -> str:
+        entry = self._entries.get(user["id"])
+        if entry is not None and time.monotonic() < entry[1]:
+            return entry[0]
+        claimed = user.get("plan", "free")
+        try:
+            async with self.session_factory() as db:
+                plan = await db.scalar(select(User.plan).where(User.id == user["id"]))
+        except SQLAlchemyError as exc:
+            logger.warning("Plan lookup failed for %s, using token claim: %s", user["id"], exc)
+            return claimed
+        plan = plan or claimed
+        self._entries.pop(user["id"], None)
+        self._entries[user["id"]] = (plan, time.monotonic() + self.ttl)
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+        return plan
+
+
+def lane_for(plan: str, settings: Settings) -> str:
+    return "paid" if plan in settings.paid_plans else "free"
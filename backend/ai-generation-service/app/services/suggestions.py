@@ -0,0 +1,243 @@
+"""Rule-based copy suggestions.
+
+Rules are declarative JSON (see ``app/rules/suggestions.json``):
+
+- ``missing_any`` / ``present_any`` rules match phrases. Every phrase from
+  every rule is compiled once into a single Aho-Corasick automaton, so one
+  scan of a text answers all of them.
+- ``metric`` rules compare a readability, length or density metric against a
+  threshold. Metrics are computed as NumPy arrays over the whole batch.
+
+The rules file is re-read when its mtime changes, so edits apply without a
+restart. Large batches run in a process pool to keep the event loop free.
+"""
+
+import asyncio
+import json
+import logging
+import operator
+import os
+import re
+import time
+from collections import Counter, deque
+from pathlib import Path
+
+import numpy as np
+
+from app.services.workers import get_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).resolve().parents[1] / "rules" / "suggestions.json"
+RELOAD_CHECK_SECONDS = 2.0
+# Batches with more text than this are scored in the process pool.
+PROCESS_POOL_MIN_CHARS = 200_000
+
+_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+METRICS = (
+    "char_count",
+    "word_count",
+    "sentence_count",
+    "avg_sentence_words",
+    "flesch_reading_ease",
+    "top_term_density",
+)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SENTENCE_RE = re.compile(r"[.!?]+(?:\s|$)")
+_SYLLABLE_RE = re.compile(r"[aeiouy]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or our that the "
+    "this to was we with you your".split()
+)
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher; reports which patterns occur in a text."""
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = patterns
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[set[int]] = [set()]
+        for pattern_id, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                nxt = self._goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(set())
+                node = nxt
+            self._out[node].add(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._out[child] |= self._out[self._fail[child]]
+
+    def find(self, text: str) -> set[int]:
+        found: set[int] = set()
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+def compute_metrics(texts: list[str]) -> dict[str, np.ndarray]:
+    """Length, readability and density metrics, one array entry per text."""
+    lowered = [t.lower() for t in texts]
+    words = [_WORD_RE.findall(t) for t in lowered]
+    word_count = np.array([len(w) for w in words], dtype=np.float64)
+    char_count = np.array([len(t) for t in texts], dtype=np.float64)
+    sentence_count = np.array(
+        [max(len(_SENTENCE_RE.findall(t)), 1) for t in texts], dtype=np.float64
+    )
+    syllable_count = np.array(
+        [sum(max(len(_SYLLABLE_RE.findall(w)), 1) for w in ws) for ws in words],
+        dtype=np.float64,
+    )
+    top_term = np.array(
+        [
+            max(Counter(w for w in ws if w not in _STOPWORDS).values(), default=0)
+            for ws in words
+        ],
+        dtype=np.float64,
+    )
+
+    safe_words = np.maximum(word_count, 1.0)
+    avg_sentence_words = word_count / sentence_count
+    flesch = 206.835 - 1.015 * avg_sentence_words - 84.6 * (syllable_count / safe_words)
+    return {
+        "char_count": char_count,
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "avg_sentence_words": avg_sentence_words,
+        "flesch_reading_ease": np.where(word_count > 0, flesch, 0.0),
+        "top_term_density": top_term / safe_words,
+    }
+
+
+def _check_metric_rule(rule: dict) -> None:
+    """Reject metric rules that ``evaluate`` could not apply."""
+    if rule.get("metric") not in METRICS:
+        raise ValueError(f"Rule {rule.get('id')} has unknown metric {rule.get('metric')!r}")
+    if rule.get("op") not in _OPS:
+        raise ValueError(f"Rule {rule.get('id')} has unknown op {rule.get('op')!r}")
+    for key in ("value", "min_words"):
+        if key in rule and not isinstance(rule[key], (int, float)):
+            raise ValueError(f"Rule {rule.get('id')} needs a numeric {key}")
+
+
+class SuggestionEngine:
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.rules: list[dict] = spec.get("rules", [])
+        self.fallback: str = spec.get("fallback", "")
+        patterns: list[str] = []
+        self._rule_patterns: list[set[int]] = []
+        for rule in self.rules:
+            if rule["when"] not in ("missing_any", "present_any", "metric"):
+                raise ValueError(f"Unknown rule type: {rule['when']}")
+            if not isinstance(rule["suggestion"], str):
+                raise ValueError(f"Rule {rule.get('id')} needs a suggestion string")
+            if rule["when"] == "metric":
+                _check_metric_rule(rule)
+            ids = set()
+            for pattern in rule.get("patterns", []):
+                ids.add(len(patterns))
+                patterns.append(pattern.lower())
+            self._rule_patterns.append(ids)
+        self.matcher = AhoCorasick(patterns)
+
+    def evaluate(self, texts: list[str]) -> list[dict]:
+        metrics = compute_metrics(texts)
+        matches = [self.matcher.find(t.lower()) for t in texts]
+        fired = np.zeros((len(self.rules), len(texts)), dtype=bool)
+        for i, (rule, ids) in enumerate(zip(self.rules, self._rule_patterns)):
+            if rule["when"] == "metric":
+                mask = _OPS[rule["op"]](metrics[rule["metric"]], rule["value"])
+                if "min_words" in rule:
+                    mask &= metrics["word_count"] >= rule["min_words"]
+                fired[i] = mask
+            else:
+                hit = np.fromiter((bool(ids & m) for m in matches), dtype=bool, count=len(texts))
+                fired[i] = hit if rule["when"] == "present_any" else ~hit
+
+        results = []
+        for j in range(len(texts)):
+            suggestions = [self.rules[i]["suggestion"] for i in np.flatnonzero(fired[:, j])]
+            if not suggestions and self.fallback:
+                suggestions.append(self.fallback)
+            results.append(
+                {
+                    "suggestions": suggestions,
+                    "metrics": {name: round(float(values[j]), 3) for name, values in metrics.items()},
+                }
+            )
+        return results
+
+
+class RuleStore:
+    """Loads the rules file and recompiles it whenever its mtime changes."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._mtime: float | None = None
+        self._checked = 0.0
+        self._engine: SuggestionEngine | None = None
+
+    def engine(self) -> SuggestionEngine:
+        now = time.monotonic()
+        if self._engine is not None and now - self._checked < RELOAD_CHECK_SECONDS:
+            return self._engine
+        self._checked = now
+        # A missing, half-written or invalid file keeps the previous rules instead
+        # of failing requests; the mtime is not recorded, so the next check retries.
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if self._engine is None or mtime != self._mtime:
+                with open(self.path, encoding="utf-8") as handle:
+                    self._engine = SuggestionEngine(json.load(handle))
+                self._mtime = mtime
+        except (OSError, KeyError, TypeError, ValueError):
+            if self._engine is None:
+                raise
+            logger.warning("Keeping previous suggestion rules; %s is unreadable", self.path)
+        return self._engine
+
+
+_worker_engines: dict[str, SuggestionEngine] = {}
+
+
+def _evaluate_in_worker(spec: dict, texts: list[str]) -> list[dict]:
+    key = json.dumps(spec, sort_keys=True)
+    engine = _worker_engines.get(key)
+    if engine is None:
+        _worker_engines.clear()
+        engine = _worker_engines[key] = SuggestionEngine(spec)
+    return engine.evaluate(texts)
+
+
+async def evaluate_texts(store: RuleStore, texts: list[str], max_workers: int) -> list[dict]:
+    engine = store.engine()
+    if sum(len(t) for t in texts) < PROCESS_POOL_MIN_CHARS:
+        return engine.evaluate(texts)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_pool(max_workers), _evaluate_in_worker, engine.spec, texts
+    )
@@ -0,0 +1,17 @@
+from app.services.image_cache import image_cache_key
+from common.schemas.common import AIImageRequest
+
+
+def test_image_cache_key_depends_on_output_fields_only():
+    base = AIImageRequest(campaign_id=1, prompt="A  red   bicycle", seed=7)
+    same = AIImageRequest(campaign_id=2, prompt="A red bicycle", seed=7, bypass_cache=True)
+    other_seed = AIImageRequest(campaign_id=1, prompt="A red bicycle", seed=8)
+
+    assert image_cache_key(base, "sdxl", "u1") == image_cache_key(same, "sdxl", "u1")
+    assert image_cache_key(base, "sdxl", "u1") != image_cache_key(other_seed, "sdxl", "u1")
+    assert image_cache_key(base, "sdxl", "u1") != image_cache_key(base, "sdxl-turbo", "u1")
+
+
+def test_same_prompt_from_two_users_does_not_share_an_entry():
+    payload = AIImageRequest(campaign_id=1, prompt="A red bicycle", seed=7)
+    assert image_cache_key(payload, "sdxl", "alice") != image_cache_key(payload, "sdxl", "bob")
@@ -0,0 +1,93 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from PIL import Image
+from sqlalchemy.dialects import postgresql
+
+from app.services import images
+from app.services.images import process_generated_image, render_derivatives
+from common.core.settings import get_settings
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 40, 40)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(rowcount=1)
+
+    async def commit(self):
+        pass
+
+
+def test_render_derivatives_resizes_to_webp():
+    rendered = render_derivatives(_png(1024, 512))
+    assert {name: (w, h) for name, (_, w, h) in rendered.items()} == {
+        "thumbnail": (256, 128),
+        "preview": (768, 384),
+        "full": (1024, 512),
+    }
+    assert all(data[8:12] == b"WEBP" for data, _, _ in rendered.values())
+
+
+def test_process_generated_image_uploads_with_upsert_and_records_on_asset(monkeypatch):
+    uploads = []
+
+    async def fake_download(image_url):
+        return _png(640, 640)
+
+    async def fake_upload(path, data, content_type, settings, upsert=False):
+        uploads.append((path, content_type, upsert))
+        return f"storage://assets/{path}"
+
+    monkeypatch.setattr(images, "storage_enabled", lambda settings: True)
+    monkeypatch.setattr(images, "_download", fake_download)
+    monkeypatch.setattr(images, "upload_bytes", fake_upload)
+    writes = []
+
+    async def fake_record_write(owner_id, *scopes):
+        writes.append((owner_id, scopes))
+
+    monkeypatch.setattr(images, "get_pool", lambda workers: ThreadPoolExecutor(1))
+    monkeypatch.setattr(images, "record_write", fake_record_write)
+    db = FakeSession()
+
+    derivatives = asyncio.run(
+        process_generated_image(lambda: db, "https://img/1.png", "u1", 42, get_settings())
+    )
+
+    assert sorted(derivatives) == ["full", "preview", "thumbnail"]
+    assert derivatives["preview"]["width"] == 640
+    assert all(path.startswith("u1/images/") and upsert for path, _, upsert in uploads)
+    [statement] = db.statements
+    compiled = statement.compile(dialect=postgresql.dialect())
+    assert "metadata_json || " in str(compiled)
+    assert compiled.params["id_1"] == 42 and compiled.params["owner_id_1"] == "u1"
+    assert writes == [("u1", ("assets",))]
+
+
+def test_process_generated_image_is_best_effort(monkeypatch):
+    async def failing_download(image_url):
+        raise ValueError("Generated image exceeds size limit")
+
+    monkeypatch.setattr(images, "storage_enabled", lambda settings: True)
+    monkeypatch.setattr(images, "_download", failing_download)
+    result = asyncio.run(
+        process_generated_image(FakeSession, "https://img/1.png", "u1", 42, get_settings())
+    )
+    assert result is None
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import scheduler as scheduler_module
+from app.services.scheduler import PlanCache, ProviderScheduler, lane_for
+from common.core.settings import get_settings
+
+
+def _scheduler(**overrides):
+    options = dict(
+        global_limit=1,
+        provider_limits={"deepseek": 1, "runpod": 1},
+        max_queue_depth=100,
+        max_queue_wait=1000.0,
+    )
+    options.update(overrides)
+    return ProviderScheduler(**options)
+
+
+async def _serve(scheduler, requests):
+    """Queue ``requests`` behind one held slot and return the order they are granted in."""
+    order = []
+
+    async def call(user_id, provider, lane):
+        async with scheduler.slot(user_id, provider, lane):
+            order.append(user_id)
+
+    async with scheduler.slot("blocker", "deepseek", "free"):
+        tasks = [asyncio.create_task(call(*request)) for request in requests]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_users_are_interleaved_within_a_lane():
+    requests = [("heavy", "deepseek", "free")] * 3 + [("light", "deepseek", "free")]
+    order = asyncio.run(_serve(_scheduler(), requests))
+    assert order[:2] == ["heavy", "light"]
+
+
+def test_paid_lane_is_served_first():
+    requests = [("free-user", "deepseek", "free"), ("paid-user", "deepseek", "paid")]
+    assert asyncio.run(_serve(_scheduler(), requests)) == ["paid-user", "free-user"]
+
+
+def test_provider_cap_does_not_block_other_providers():
+    async def scenario():
+        scheduler = _scheduler(global_limit=2)
+        async with scheduler.slot("a", "deepseek"):
+            async with scheduler.slot("b", "runpod") as slot:
+                assert scheduler.in_flight == {"deepseek": 1, "runpod": 1}
+                return slot.queue_wait_ms
+
+    assert asyncio.run(scenario()) < 1000
+
+
+def test_admission_rejects_with_retry_after_when_queue_is_too_slow():
+    async def scenario():
+        scheduler = _scheduler(max_queue_wait=10.0, default_service_time=4.0)
+        async with scheduler.slot("blocker", "deepseek"):
+            waiters = [asyncio.create_task(_hold(scheduler, f"u{i}")) for i in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(HTTPException) as exc:
+                scheduler.admit("deepseek", "free")
+            # Paid requests skip the free queue, so they are still admitted.
+            scheduler.admit("deepseek", "paid")
+        await asyncio.gather(*waiters)
+        return exc.value
+
+    error = asyncio.run(scenario())
+    assert error.status_code == 429
+    # 12s expected against a 10s budget, rounded up to one 4s call finishing.
+    assert error.headers["Retry-After"] == "4"
+
+
+async def _hold(scheduler, user_id):
+    async with scheduler.slot(user_id, "deepseek"):
+        pass
+
+
+class FakePlanSession:
+    def __init__(self, plans):
+        self.plans = plans
+        self.lookups = 0
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def scalar(self, statement):
+        self.lookups += 1
+        return self.plans[statement.compile().params["id_1"]]
+
+
+def test_lane_follows_users_plan_not_the_token_claim(monkeypatch):
+    db = FakePlanSession({"u1": "pro"})
+    cache = PlanCache(db, ttl=30.0)
+    settings = get_settings()
+    # The token was issued before the upgrade and still says "free".
+    user = {"id": "u1", "plan": "free"}
+
+    assert lane_for(asyncio.run(cache.plan(user)), settings) == "paid"
+
+    # Within the TTL the cached plan is used without another lookup.
+    db.plans["u1"] = "free"
+    assert asyncio.run(cache.plan(user)) == "pro"
+    assert db.lookups == 1
+
+    clock = time.monotonic() + 31
+    monkeypatch.setattr(scheduler_module.time, "monotonic", lambda: clock)
+    assert lane_for(asyncio.run(cache.plan(user)), settings) == "free"
+    assert db.lookups == 2
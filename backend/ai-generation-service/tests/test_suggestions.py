@@ -1,5 +1,11 @@
+import json
+import os
+
+import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services import suggestions
+from app.services.suggestions import RuleStore, SuggestionEngine
 from common.core.security import create_access_token
 from common.core.settings import get_settings
 
@@ -18,3 +24,55 @@ def test_suggestions_endpoint():
     assert "suggestions" in body
     assert len(body["suggestions"]) >= 1
 
+
+
+def test_suggestions_batch_endpoint():
+    client = TestClient(app)
+    settings = get_settings()
+    token = create_access_token(sub="test-user", email="test@example.com", settings=settings)
+    response = client.post(
+        "/api/v1/ai/suggestions/batch",
+        headers={"Authorization": f"Bearer {token}"},
+        json={
+            "items": [
+                {"asset_id": 1, "asset_text": "short sales copy"},
+                {"asset_id": 2, "asset_text": "Act now! Get started today. Trusted by 2,000 teams."},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["asset_id"] for r in results] == [1, 2]
+    assert any("CTA" in s for s in results[0]["suggestions"])
+    assert not any("CTA" in s for s in results[1]["suggestions"])
+    assert results[1]["metrics"]["word_count"] > 0
+
+
+def test_rule_matcher_finds_overlapping_patterns():
+    from app.services.suggestions import AhoCorasick
+
+    matcher = AhoCorasick(["he", "she", "hers", "his"])
+    assert matcher.find("ushers") == {0, 1, 2}
+
+
+def test_rule_store_keeps_previous_rules_on_broken_or_missing_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(suggestions, "RELOAD_CHECK_SECONDS", 0)
+    path = tmp_path / "rules.json"
+    rule = {"id": "cta", "when": "missing_any", "patterns": ["cta"], "suggestion": "Add a CTA"}
+    path.write_text(json.dumps({"rules": [rule]}))
+    store = RuleStore(path)
+    engine = store.engine()
+
+    path.write_text('{"rules": [')  # half-written
+    os.utime(path, (1, 1))
+    assert store.engine() is engine
+    path.write_text(json.dumps({"rules": [{**rule, "when": "metric", "metric": "nope"}]}))
+    os.utime(path, (2, 2))
+    assert store.engine() is engine
+    path.unlink()
+    assert store.engine() is engine
+
+    with pytest.raises(ValueError):
+        SuggestionEngine(
+            {"rules": [{**rule, "when": "metric", "metric": "char_count", "op": "~"}]}
+        )
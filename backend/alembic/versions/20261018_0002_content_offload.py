@@ -0,0 +1,31 @@
+"""content offload pointers on assets and asset_versions
+
+Revision ID: 20261018_0002
+Revises: 20260216_0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_0002"
+down_revision = "20260216_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant defaults keep these ADD COLUMNs metadata-only (no table rewrite).
+    for table in ("assets", "asset_versions"):
+        op.add_column(table, sa.Column("content_ref", sa.String(512), nullable=False, server_default=""))
+        op.add_column(table, sa.Column("content_size", sa.Integer(), nullable=False, server_default="0"))
+        op.add_column(table, sa.Column("content_sha256", sa.String(64), nullable=False, server_default=""))
+    # Existing oversized rows are moved to storage in batches by asset-service's
+    # offload job (python -m app.jobs.offload_content), not in this migration.
+
+
+def downgrade() -> None:
+    for table in ("asset_versions", "assets"):
+        op.drop_column(table, "content_sha256")
+        op.drop_column(table, "content_size")
+        op.drop_column(table, "content_ref")
@@ -0,0 +1,59 @@
+"""full-text search vectors on campaigns and assets
+
+Revision ID: 20261018_0003
+Revises: 20261018_0002
+Create Date: 2026-10-18
+
+Not an online migration: adding a STORED generated column rewrites
+``campaigns`` and ``assets`` while holding ACCESS EXCLUSIVE, so each table
+is unreadable and unwritable for the length of its rewrite. Run it in a
+maintenance window sized to the larger table. ``lock_timeout`` makes it
+fail fast instead of queueing behind long transactions and stalling every
+query queued behind it. The GIN indexes are then built concurrently.
+"""
+
+from alembic import op
+
+revision = "20261018_0003"
+down_revision = "20261018_0002"
+branch_labels = None
+depends_on = None
+
+# Keep in sync with CAMPAIGN_SEARCH_VECTOR / ASSET_SEARCH_VECTOR in common.models.entities.
+CAMPAIGN_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(goal, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(audience, '')), 'C')"
+)
+ASSET_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute("SET lock_timeout = '10s'")
+    op.execute(
+        f"ALTER TABLE campaigns ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({CAMPAIGN_SEARCH_VECTOR}) STORED"
+    )
+    op.execute(
+        f"ALTER TABLE assets ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({ASSET_SEARCH_VECTOR}) STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_campaigns_search_vector "
+            "ON campaigns USING gin (search_vector)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_assets_search_vector "
+            "ON assets USING gin (search_vector)"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_assets_search_vector")
+    op.execute("DROP INDEX IF EXISTS ix_campaigns_search_vector")
+    op.drop_column("assets", "search_vector")
+    op.drop_column("campaigns", "search_vector")
@@ -0,0 +1,164 @@
+"""owner_id and campaign_id on asset_versions, equality RLS policy
+
+Revision ID: 20261018_0004
+Revises: 20261018_0003
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_0004"
+down_revision = "20261018_0003"
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 5000
+NOT_NULL_COLUMNS = ("owner_id", "campaign_id")
+
+
+def _drop_invalid_index(bind, name: str) -> None:
+    """Drop ``name`` if an earlier failed CONCURRENTLY build left it INVALID."""
+    invalid = bind.execute(
+        sa.text("""
+            SELECT NOT i.indisvalid FROM pg_index AS i
+            JOIN pg_class AS c ON c.oid = i.indexrelid
+            WHERE c.relname = :name
+        """),
+        {"name": name},
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+def upgrade() -> None:
+    op.add_column("asset_versions", sa.Column("owner_id", sa.String(64), nullable=True))
+    op.add_column("asset_versions", sa.Column("campaign_id", sa.Integer(), nullable=True))
+    # NOT VALID skips the full-table check here; the constraints are validated after the backfill.
+    op.execute(
+        "ALTER TABLE asset_versions ADD CONSTRAINT fk_asset_versions_owner_id "
+        "FOREIGN KEY (owner_id) REFERENCES users (id) NOT VALID"
+    )
+    op.execute(
+        "ALTER TABLE asset_versions ADD CONSTRAINT fk_asset_versions_campaign_id "
+        "FOREIGN KEY (campaign_id) REFERENCES campaigns (id) NOT VALID"
+    )
+    # Writers that predate this column (or skip it) still get the denormalized values.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION asset_versions_fill_owner() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.owner_id IS NULL OR NEW.campaign_id IS NULL THEN
+                SELECT owner_id, campaign_id INTO NEW.owner_id, NEW.campaign_id
+                FROM assets WHERE id = NEW.asset_id;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER asset_versions_fill_owner BEFORE INSERT ON asset_versions
+        FOR EACH ROW EXECUTE FUNCTION asset_versions_fill_owner()
+    """)
+
+    bind = op.get_bind()
+    with op.get_context().autocommit_block():
+        # Walk primary-key ranges in short batches; each UPDATE commits on its own and
+        # holds its row locks only briefly. Rows inserted from here on are filled by the trigger.
+        max_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM asset_versions")).scalar()
+        for start in range(0, max_id, BACKFILL_BATCH):
+            bind.execute(
+                sa.text("""
+                    UPDATE asset_versions AS v
+                    SET owner_id = a.owner_id, campaign_id = a.campaign_id
+                    FROM assets AS a
+                    WHERE a.id = v.asset_id
+                      AND v.id > :start AND v.id <= :stop
+                      AND v.owner_id IS NULL
+                """),
+                {"start": start, "stop": start + BACKFILL_BATCH},
+            )
+
+        # A validated CHECK lets SET NOT NULL skip its own full-table scan. Each
+        # statement commits alone: ADD ... NOT VALID holds its lock only briefly,
+        # and VALIDATE scans under SHARE UPDATE EXCLUSIVE while writes continue.
+        for column in NOT_NULL_COLUMNS:
+            op.execute(
+                f"ALTER TABLE asset_versions ADD CONSTRAINT ck_asset_versions_{column}_not_null "
+                f"CHECK ({column} IS NOT NULL) NOT VALID"
+            )
+        op.execute("ALTER TABLE asset_versions VALIDATE CONSTRAINT fk_asset_versions_owner_id")
+        op.execute("ALTER TABLE asset_versions VALIDATE CONSTRAINT fk_asset_versions_campaign_id")
+        for column in NOT_NULL_COLUMNS:
+            op.execute(
+                f"ALTER TABLE asset_versions VALIDATE CONSTRAINT ck_asset_versions_{column}_not_null"
+            )
+
+        # Editing after an undo (and unlocked concurrent edits) wrote version
+        # numbers that already existed. Move the later duplicates above the
+        # asset's highest version so the unique index can build. The asset row
+        # keeps its body; current_version only follows when that body is one of
+        # the moved rows.
+        op.execute("""
+            WITH ranked AS (
+                SELECT id, asset_id, version_number,
+                       row_number() OVER (PARTITION BY asset_id, version_number ORDER BY id) AS dup,
+                       max(version_number) OVER (PARTITION BY asset_id) AS top
+                FROM asset_versions
+            ), moved AS (
+                SELECT id, version_number AS old_number,
+                       top + row_number() OVER (PARTITION BY asset_id ORDER BY id) AS number
+                FROM ranked WHERE dup > 1
+            ), renumbered AS (
+                UPDATE asset_versions AS v SET version_number = m.number
+                FROM moved AS m WHERE v.id = m.id
+                RETURNING v.id, v.asset_id, v.version_number, v.content, v.content_ref
+            )
+            UPDATE assets AS a SET current_version = r.version_number
+            FROM renumbered AS r JOIN moved AS m ON m.id = r.id
+            WHERE a.id = r.asset_id
+              AND a.current_version = m.old_number
+              AND a.content = r.content
+              AND a.content_ref = r.content_ref
+        """)
+        # IF NOT EXISTS would accept an INVALID leftover of a failed run, and the
+        # old index below would then be dropped with nothing valid replacing it.
+        _drop_invalid_index(bind, "ix_asset_versions_asset_version")
+        op.execute(
+            "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_asset_versions_asset_version "
+            "ON asset_versions (asset_id, version_number)"
+        )
+        _drop_invalid_index(bind, "ix_asset_versions_owner_id")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_asset_versions_owner_id "
+            "ON asset_versions (owner_id)"
+        )
+        # The unique index covers every lookup the single-column one served.
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_asset_versions_asset_id")
+
+    for column in NOT_NULL_COLUMNS:
+        op.alter_column("asset_versions", column, nullable=False)
+        op.execute(
+            f"ALTER TABLE asset_versions DROP CONSTRAINT ck_asset_versions_{column}_not_null"
+        )
+
+    op.execute("DROP POLICY IF EXISTS asset_versions_owner ON asset_versions")
+    op.execute("""
+        CREATE POLICY asset_versions_owner ON asset_versions FOR ALL
+        USING (owner_id = current_setting('app.user_id', true))
+        WITH CHECK (owner_id = current_setting('app.user_id', true))
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP POLICY IF EXISTS asset_versions_owner ON asset_versions")
+    op.execute("""
+        CREATE POLICY asset_versions_owner ON asset_versions FOR ALL
+        USING (asset_id IN (SELECT id FROM assets WHERE owner_id = current_setting('app.user_id', true)))
+    """)
+    op.create_index("ix_asset_versions_asset_id", "asset_versions", ["asset_id"], unique=False)
+    op.drop_index("ix_asset_versions_owner_id", table_name="asset_versions")
+    op.drop_index("ix_asset_versions_asset_version", table_name="asset_versions")
+    op.execute("DROP TRIGGER IF EXISTS asset_versions_fill_owner ON asset_versions")
+    op.execute("DROP FUNCTION IF EXISTS asset_versions_fill_owner()")
+    op.drop_column("asset_versions", "campaign_id")
+    op.drop_column("asset_versions", "owner_id")
@@ -0,0 +1,49 @@
+"""assets.metadata_json as jsonb with GIN and storage-state indexes
+
+Revision ID: 20261018_0005
+Revises: 20261018_0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "20261018_0005"
+down_revision = "20261018_0004"
+branch_labels = None
+depends_on = None
+
+# Keep in sync with ASSET_STORAGE_PENDING in common.models.entities.
+ASSET_STORAGE_PENDING = "coalesce(metadata_json ->> 'storage_url', '') = ''"
+
+
+def upgrade() -> None:
+    # The type change rewrites assets under an ACCESS EXCLUSIVE lock. Give up
+    # quickly rather than queue every other query behind a long-running reader.
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    op.execute("ALTER TABLE assets ALTER COLUMN metadata_json DROP DEFAULT")
+    op.execute(
+        "ALTER TABLE assets ALTER COLUMN metadata_json TYPE jsonb "
+        "USING coalesce(nullif(btrim(metadata_json), ''), '{}')::jsonb"
+    )
+    op.execute("ALTER TABLE assets ALTER COLUMN metadata_json SET DEFAULT '{}'::jsonb")
+
+    with op.get_context().autocommit_block():
+        # jsonb_ops (not jsonb_path_ops) so key-existence filters can use it too.
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_assets_metadata "
+            "ON assets USING gin (metadata_json)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_assets_owner_storage_pending "
+            f"ON assets (owner_id) WHERE {ASSET_STORAGE_PENDING}"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_assets_owner_storage_pending")
+    op.execute("DROP INDEX IF EXISTS ix_assets_metadata")
+    op.execute("ALTER TABLE assets ALTER COLUMN metadata_json DROP DEFAULT")
+    op.execute(
+        "ALTER TABLE assets ALTER COLUMN metadata_json TYPE text USING metadata_json::text"
+    )
+    op.execute("ALTER TABLE assets ALTER COLUMN metadata_json SET DEFAULT '{}'")
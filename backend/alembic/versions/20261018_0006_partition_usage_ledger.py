@@ -0,0 +1,117 @@
+"""monthly range partitioning of usage_events and credit_ledger
+
+Revision ID: 20261018_0006
+Revises: 20261018_0005
+Create Date: 2026-10-18
+
+Existing rows are not copied. Each table is renamed to ``<table>_legacy``
+and attached to a new partitioned parent as one partition covering
+everything before the first monthly partition. Every index the parent needs
+is built on the legacy table CONCURRENTLY beforehand. A validated CHECK
+constraint proves the partition bound. With both in place, the ATTACH
+neither scans nor rebuilds anything. The only exclusive lock is the short
+rename-and-attach transaction.
+"""
+
+from datetime import date
+
+from alembic import op
+
+revision = "20261018_0006"
+down_revision = "20261018_0005"
+branch_labels = None
+depends_on = None
+
+TABLES = ("usage_events", "credit_ledger")
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+# The legacy partition ends two months out so rows written while this
+# migration runs (even across a month boundary) still fit its CHECK.
+FIRST_MONTH = _add_months(date.today().replace(day=1), 2)
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {table}_legacy_id_created "
+                f"ON {table} (id, created_at)"
+            )
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_legacy_user_created "
+                f"ON {table} (user_id, created_at)"
+            )
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {table}_legacy_created_brin "
+                f"ON {table} USING brin (created_at)"
+            )
+            op.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_legacy_bound "
+                f"CHECK (created_at < '{FIRST_MONTH.isoformat()}') NOT VALID"
+            )
+            # VALIDATE only takes SHARE UPDATE EXCLUSIVE; writes keep flowing.
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_legacy_bound")
+
+    op.execute("SET LOCAL lock_timeout = '5s'")
+    for table in TABLES:
+        legacy = f"{table}_legacy"
+        op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey")
+        op.execute(f"DROP INDEX ix_{table}_user_id")
+        op.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (created_at)"
+        )
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_user_id_fkey "
+            "FOREIGN KEY (user_id) REFERENCES users (id)"
+        )
+        op.execute(f"CREATE INDEX ix_{table}_user_created ON {table} (user_id, created_at)")
+        op.execute(f"CREATE INDEX ix_{table}_created_brin ON {table} USING brin (created_at)")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {legacy} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{FIRST_MONTH.isoformat()}')"
+        )
+        op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_legacy_bound")
+        for offset in range(MONTHS_AHEAD + 1):
+            month = _add_months(FIRST_MONTH, offset)
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{_add_months(month, 1).isoformat()}')"
+            )
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+        op.execute(f"""
+            CREATE POLICY {table}_owner ON {table} FOR ALL
+            USING (user_id = current_setting('app.user_id', true))
+        """)
+
+
+def downgrade() -> None:
+    # Folds every partition back into one plain table; this copies all rows.
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS)")
+        op.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned")
+        op.execute(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id")
+        op.execute(f"DROP TABLE {table}_partitioned CASCADE")
+        op.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id)")
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_user_id_fkey "
+            "FOREIGN KEY (user_id) REFERENCES users (id)"
+        )
+        op.execute(f"CREATE INDEX ix_{table}_user_id ON {table} (user_id)")
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+        op.execute(f"""
+            CREATE POLICY {table}_owner ON {table} FOR ALL
+            USING (user_id = current_setting('app.user_id', true))
+        """)
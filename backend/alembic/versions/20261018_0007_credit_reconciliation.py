@@ -0,0 +1,47 @@
+"""credit_balance_checks and job_checkpoints for incremental reconciliation
+
+Revision ID: 20261018_0007
+Revises: 20261018_0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_0007"
+down_revision = "20261018_0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_balance_checks",
+        sa.Column("user_id", sa.String(64), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("ledger_sum", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("last_ledger_id", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("last_ledger_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("drift", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("checked_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_credit_balance_checks_drift",
+        "credit_balance_checks",
+        ["user_id"],
+        postgresql_where=sa.text("drift <> 0"),
+    )
+    op.create_table(
+        "job_checkpoints",
+        sa.Column("name", sa.String(80), primary_key=True),
+        sa.Column("cursor", sa.String(255), nullable=False, server_default=""),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    # Service-internal tables: RLS on with no policies keeps them away from API roles.
+    for table in ("credit_balance_checks", "job_checkpoints"):
+        op.execute(f"ALTER TABLE {table} ENABLE ROW LEVEL SECURITY")
+
+
+def downgrade() -> None:
+    op.drop_table("job_checkpoints")
+    op.drop_index("ix_credit_balance_checks_drift", table_name="credit_balance_checks")
+    op.drop_table("credit_balance_checks")
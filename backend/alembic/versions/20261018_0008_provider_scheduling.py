@@ -0,0 +1,30 @@
+"""users.plan and usage_events.queue_wait_ms for provider scheduling
+
+Revision ID: 20261018_0008
+Revises: 20261018_0007
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "20261018_0008"
+down_revision = "20261018_0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Constant defaults are metadata-only; neither table is rewritten.
+    op.add_column(
+        "users", sa.Column("plan", sa.String(32), nullable=False, server_default="free")
+    )
+    op.add_column(
+        "usage_events",
+        sa.Column("queue_wait_ms", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("usage_events", "queue_wait_ms")
+    op.drop_column("users", "plan")
@@ -0,0 +1,44 @@
+"""assets.search_vector maintained from the full body
+
+Revision ID: 20261018_0009
+Revises: 20261018_0008
+Create Date: 2026-10-18
+
+The generated column only saw ``assets.content``, which is empty for
+offloaded bodies. DROP EXPRESSION turns it into a plain column and keeps
+every stored vector; the table is not rewritten. From here on the write
+paths set the vector from the full body. Vectors of bodies offloaded before
+this revision still hold only the title: run
+``python -m app.jobs.offload_content --reindex-search`` from asset-service
+once to rebuild them.
+"""
+
+from alembic import op
+
+revision = "20261018_0009"
+down_revision = "20261018_0008"
+branch_labels = None
+depends_on = None
+
+# Same expression as migration 0003.
+ASSET_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    op.execute("SET lock_timeout = '10s'")
+    op.execute("ALTER TABLE assets ALTER COLUMN search_vector DROP EXPRESSION")
+
+
+def downgrade() -> None:
+    # Rewrites assets under ACCESS EXCLUSIVE, like migration 0003.
+    op.execute("SET lock_timeout = '10s'")
+    op.execute("DROP INDEX IF EXISTS ix_assets_search_vector")
+    op.drop_column("assets", "search_vector")
+    op.execute(
+        f"ALTER TABLE assets ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({ASSET_SEARCH_VECTOR}) STORED"
+    )
+    op.execute("CREATE INDEX ix_assets_search_vector ON assets USING gin (search_vector)")
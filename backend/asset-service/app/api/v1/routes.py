@@ -1,59 +1,106 @@
 import json
-from fastapi import APIRouter, Depends, HTTPException, Query
-import httpx
-from sqlalchemy import select, func
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, not_, select, text
+from sqlalchemy.orm.attributes import set_committed_value
 
 from common.core.settings import get_settings
+from common.db.jsonb import set_jsonb_path
+from common.db.reads import count_rows, fetch_mappings, paginate, select_schema, to_schema
+from common.db.routing import ReadRouter, record_write
+from common.db.search import asset_search_vector
 from common.db.session import build_session_factory
-from common.models import Asset, AssetVersion
+from common.models import Asset, AssetVersion, Campaign
+from common.models.entities import ASSET_STORAGE_PENDING
 from common.schemas.common import (
+    AssetBulkOut,
+    AssetBulkRequest,
     AssetCreate,
     AssetUpdate,
     AssetOut,
     AssetVersionOut,
+    DedupeReportOut,
+    DuplicateGroupOut,
     PaginatedAssetOut,
+    SimilarAssetOut,
+    SignedURLBatchRequest,
+    SignedURLBatchOut,
+    SignedURLOut,
+)
+from common.utils.content_store import (
+    apply_content_fields,
+    content_fields,
+    hydrate_content,
+    hydrate_mappings,
+    load_content,
 )
 from common.utils.deps import build_current_user_dep
+from common.utils.etag import (
+    conditional_response,
+    not_modified,
+    precondition_met,
+    scoped_etag,
+)
+from common.utils.events import publish_event
+from common.utils.responses import ModelResponse, to_model
+from common.utils.storage import create_signed_urls, upload_object
+from app.services.bulk import apply_bulk, store_bodies
+from app.services.export import export_ndjson, export_zip
+from app.services.similarity import similarity_registry
 
 router = APIRouter(tags=["assets"])
 settings = get_settings()
 session_factory = build_session_factory(settings.supabase_db_url)
+read_router = ReadRouter(settings)
 current_user_dep = build_current_user_dep(settings)
 
 
-async def upload_to_supabase(path: str, content: str) -> str:
-    if not settings.supabase_service_role_key or settings.supabase_service_role_key == "dummy":
-        return f"mock://{path}"
-    async with httpx.AsyncClient(timeout=30) as client:
-        url = f"{settings.supabase_url}/storage/v1/object/{settings.storage_bucket}/{path}"
-        resp = await client.post(
-            url,
-            headers={
-                "Authorization": f"Bearer {settings.supabase_service_role_key}",
-                "Content-Type": "application/json",
-            },
-            content=content.encode("utf-8"),
-        )
-        if resp.status_code not in (200, 201):
-            return f"mock://{path}"
-    # Return internal path; serve via signed URL endpoint instead of public URL
-    return f"storage://{settings.storage_bucket}/{path}"
+def _metadata_filter(pairs: list[str]) -> dict:
+    """``key=value`` query pairs as a containment document; JSON scalars keep their type."""
+    document = {}
+    for pair in pairs:
+        key, sep, raw = pair.partition("=")
+        if not sep or not key:
+            raise HTTPException(status_code=400, detail=f"Invalid metadata filter: {pair}")
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        document[key] = value if isinstance(value, (str, int, float, bool)) else raw
+    return document
 
 
-async def create_signed_url(path: str, expires_in: int = 3600) -> str:
-    """Generate a short-lived signed URL for private storage access."""
-    if not settings.supabase_service_role_key or settings.supabase_service_role_key == "dummy":
-        return f"mock://{path}"
-    async with httpx.AsyncClient(timeout=10) as client:
-        resp = await client.post(
-            f"{settings.supabase_url}/storage/v1/object/sign/{settings.storage_bucket}/{path}",
-            headers={"Authorization": f"Bearer {settings.supabase_service_role_key}"},
-            json={"expiresIn": expires_in},
-        )
-        if resp.status_code == 200:
-            data = resp.json()
-            return f"{settings.supabase_url}/storage/v1{data.get('signedURL', '')}"
-    return f"mock://{path}"
+def _object_path(path_or_url: str) -> str:
+    """Accept either a bucket-relative path or a ``storage://bucket/...`` URL."""
+    prefix = f"storage://{settings.storage_bucket}/"
+    if path_or_url.startswith(prefix):
+        return path_or_url[len(prefix):]
+    return path_or_url
+
+
+async def publish_asset_changed(user_id: str, asset: Asset, action: str) -> None:
+    await record_write(user_id, "assets")
+    await publish_event(
+        user_id,
+        "asset.changed",
+        {
+            "action": action,
+            "asset_id": asset.id,
+            "campaign_id": asset.campaign_id,
+            "current_version": asset.current_version,
+        },
+    )
+
+
+@router.post("/assets/signed-urls", response_model=SignedURLBatchOut)
+async def sign_asset_urls(payload: SignedURLBatchRequest, user=Depends(current_user_dep)):
+    paths = [_object_path(p) for p in payload.paths]
+    if any(not p.startswith(f"{user['id']}/") for p in paths):
+        raise HTTPException(status_code=403, detail="Path outside of user storage")
+    signed = await create_signed_urls(paths, settings, payload.expires_in)
+    return SignedURLBatchOut(
+        items=[SignedURLOut(path=p, signed_url=signed[p]) for p in paths]
+    )
 
 
 @router.post("/assets", response_model=AssetOut)
@@ -65,95 +112,260 @@ async def create_asset(payload: AssetCreate, user=Depends(current_user_dep)):
             asset_type=payload.asset_type,
             title=payload.title,
             content=payload.content,
-            metadata_json=json.dumps({"storage_url": ""}),
+            metadata_json={"storage_url": ""},
             current_version=1,
+            search_vector=asset_search_vector(payload.title, payload.content),
         )
         db.add(asset)
         await db.flush()
-        db.add(
-            AssetVersion(
-                asset_id=asset.id,
-                version_number=1,
-                content=payload.content,
-                change_note="initial",
-            )
+        version = AssetVersion(
+            asset_id=asset.id,
+            owner_id=asset.owner_id,
+            campaign_id=asset.campaign_id,
+            version_number=1,
+            content=payload.content,
+            change_note="initial",
         )
+        db.add(version)
         storage_path = f"{user['id']}/asset-{asset.id}/v1.txt"
-        storage_url = await upload_to_supabase(storage_path, payload.content)
-        asset.metadata_json = json.dumps({"storage_url": storage_url})
+        storage_url = await upload_object(storage_path, payload.content, settings)
+        fields = content_fields(payload.content, storage_url, settings)
+        apply_content_fields(asset, fields)
+        apply_content_fields(version, fields)
+        asset.metadata_json = {"storage_url": storage_url}
         await db.commit()
         await db.refresh(asset)
-        return asset
+        set_committed_value(asset, "content", payload.content)
+        await similarity_registry.observe(
+            user["id"], [(asset.id, asset.campaign_id, payload.content)]
+        )
+        await publish_asset_changed(user["id"], asset, "created")
+        return ModelResponse(to_model(AssetOut, asset))
+
+
+@router.post("/assets/bulk", response_model=AssetBulkOut)
+async def bulk_assets(
+    payload: AssetBulkRequest,
+    background_tasks: BackgroundTasks,
+    user=Depends(current_user_dep),
+):
+    if not payload.create and not payload.update:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    async with session_factory() as db:
+        results, pending = await apply_bulk(db, payload, user["id"], settings)
+        await db.commit()
+    if pending:
+        background_tasks.add_task(store_bodies, session_factory, user["id"], pending, settings)
+        campaigns = {
+            r.asset_id: payload.create[r.index].campaign_id
+            for r in results
+            if r.status == "created"
+        }
+        await similarity_registry.observe(
+            user["id"],
+            [(asset_id, campaigns.get(asset_id), content) for asset_id, _, content in pending],
+        )
+    created = sum(1 for r in results if r.status == "created")
+    updated = sum(1 for r in results if r.status == "updated")
+    if created or updated:
+        await record_write(user["id"], "assets")
+        await publish_event(
+            user["id"],
+            "assets.bulk_changed",
+            {
+                "items": [
+                    {"asset_id": r.asset_id, "current_version": r.version_number}
+                    for r in results
+                    if r.status in ("created", "updated")
+                ]
+            },
+        )
+    return AssetBulkOut(
+        items=results,
+        created=created,
+        updated=updated,
+        failed=len(results) - created - updated,
+    )
 
 
 @router.get("/assets", response_model=PaginatedAssetOut)
 async def list_assets(
+    request: Request,
     campaign_id: int | None = Query(default=None, description="Filter by campaign"),
+    storage: str | None = Query(
+        default=None, pattern="^(stored|pending)$", description="Storage upload state"
+    ),
+    has_image: bool | None = Query(default=None, description="Has a generated image"),
+    metadata: list[str] = Query(
+        default=[], description="Metadata key=value pairs, all of which must match"
+    ),
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     user=Depends(current_user_dep),
 ):
-    async with session_factory() as db:
-        base = select(Asset).where(Asset.owner_id == user["id"])
-        if campaign_id is not None:
-            base = base.where(Asset.campaign_id == campaign_id)
-
-        total_result = await db.execute(
-            select(func.count()).select_from(base.subquery())
+    contains = _metadata_filter(metadata)
+    etag = await scoped_etag(
+        user["id"],
+        "assets",
+        "list",
+        campaign_id,
+        storage,
+        has_image,
+        json.dumps(contains, sort_keys=True),
+        page,
+        limit,
+    )
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    base = select_schema(AssetOut, Asset, "content_ref", "content_sha256").where(
+        Asset.owner_id == user["id"]
+    )
+    if campaign_id is not None:
+        base = base.where(Asset.campaign_id == campaign_id)
+    # All metadata filters run in SQL: the pending state matches the partial
+    # index predicate verbatim, and ``?`` / ``@>`` use the GIN index.
+    if storage == "pending":
+        base = base.where(text(ASSET_STORAGE_PENDING))
+    elif storage == "stored":
+        base = base.where(not_(text(ASSET_STORAGE_PENDING)))
+    if has_image is not None:
+        image = Asset.metadata_json.has_key("image_url")
+        base = base.where(image if has_image else not_(image))
+    if contains:
+        base = base.where(Asset.metadata_json.contains(contains))
+    async with read_router.session(user["id"]) as db:
+        total = await count_rows(db, base)
+        rows = await fetch_mappings(
+            db, paginate(base.order_by(Asset.created_at.desc()), page, limit)
         )
-        total = total_result.scalar() or 0
+    body = PaginatedAssetOut(
+        items=to_schema(AssetOut, await hydrate_mappings(rows, settings)),
+        total=total,
+        page=page,
+        limit=limit,
+    )
+    return conditional_response(request, body, etag)
 
-        result = await db.execute(
-            base.order_by(Asset.created_at.desc())
-            .offset((page - 1) * limit)
-            .limit(limit)
+
+@router.get("/assets/export")
+async def export_assets(
+    campaign_id: int = Query(..., description="Campaign to export"),
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|zip)$"),
+    user=Depends(current_user_dep),
+):
+    async with session_factory() as db:
+        owned = await db.scalar(
+            select(Campaign.id).where(Campaign.id == campaign_id, Campaign.owner_id == user["id"])
         )
-        return PaginatedAssetOut(
-            items=result.scalars().all(),
-            total=total,
-            page=page,
-            limit=limit,
+    if owned is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    if export_format == "zip":
+        return StreamingResponse(
+            export_zip(session_factory, user["id"], campaign_id, settings),
+            media_type="application/zip",
+            headers={"Content-Disposition": f'attachment; filename="campaign-{campaign_id}.zip"'},
         )
+    return StreamingResponse(
+        export_ndjson(session_factory, user["id"], campaign_id, settings),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="campaign-{campaign_id}.ndjson"'},
+    )
 
 
 @router.patch("/assets/{asset_id}", response_model=AssetOut)
 async def update_asset(asset_id: int, payload: AssetUpdate, user=Depends(current_user_dep)):
     async with session_factory() as db:
+        # Edits of one asset queue on the row lock for the next version number.
         result = await db.execute(
-            select(Asset).where(Asset.id == asset_id, Asset.owner_id == user["id"])
+            select(Asset)
+            .where(Asset.id == asset_id, Asset.owner_id == user["id"])
+            .with_for_update()
         )
         asset = result.scalar_one_or_none()
         if not asset:
             raise HTTPException(status_code=404, detail="Asset not found")
-        next_version = asset.current_version + 1
-        db.add(
-            AssetVersion(
-                asset_id=asset.id,
-                version_number=next_version,
-                content=payload.content,
-                change_note=payload.change_note,
-            )
+        # After an undo, current_version is below the newest version; never reuse a number.
+        latest = await db.scalar(
+            select(func.max(AssetVersion.version_number)).where(AssetVersion.asset_id == asset.id)
+        )
+        next_version = max(latest or 0, asset.current_version) + 1
+        version = AssetVersion(
+            asset_id=asset.id,
+            owner_id=asset.owner_id,
+            campaign_id=asset.campaign_id,
+            version_number=next_version,
+            content=payload.content,
+            change_note=payload.change_note,
         )
+        db.add(version)
         storage_path = f"{user['id']}/asset-{asset.id}/v{next_version}.txt"
-        storage_url = await upload_to_supabase(storage_path, payload.content)
-        asset.content = payload.content
+        storage_url = await upload_object(storage_path, payload.content, settings)
+        fields = content_fields(payload.content, storage_url, settings)
+        apply_content_fields(asset, fields)
+        apply_content_fields(version, fields)
         asset.current_version = next_version
-        asset.metadata_json = json.dumps({"storage_url": storage_url})
+        asset.search_vector = asset_search_vector(Asset.title, payload.content)
+        asset.metadata_json = set_jsonb_path(Asset.metadata_json, ["storage_url"], storage_url)
         await db.commit()
         await db.refresh(asset)
-        return asset
+        set_committed_value(asset, "content", payload.content)
+        await similarity_registry.observe(
+            user["id"], [(asset.id, asset.campaign_id, payload.content)]
+        )
+        await publish_asset_changed(user["id"], asset, "updated")
+        return ModelResponse(to_model(AssetOut, asset))
+
+
+@router.get("/assets/dedupe-report", response_model=DedupeReportOut)
+async def dedupe_report(
+    campaign_id: int | None = Query(default=None, description="Limit to one campaign"),
+    threshold: float = Query(0.85, ge=0.5, le=1.0),
+    user=Depends(current_user_dep),
+):
+    index = await similarity_registry.get(user["id"], session_factory, settings)
+    groups = index.duplicate_groups(threshold, campaign_id)
+    scanned = (
+        len(index)
+        if campaign_id is None
+        else sum(1 for c in index.campaigns.values() if c == campaign_id)
+    )
+    return DedupeReportOut(
+        assets_scanned=scanned,
+        groups=[DuplicateGroupOut(asset_ids=ids, max_similarity=score) for ids, score in groups],
+    )
+
+
+@router.get("/assets/{asset_id}/similar", response_model=list[SimilarAssetOut])
+async def similar_assets(
+    asset_id: int,
+    threshold: float = Query(0.7, ge=0.3, le=1.0),
+    limit: int = Query(10, ge=1, le=50),
+    user=Depends(current_user_dep),
+):
+    index = await similarity_registry.get_with(user["id"], asset_id, session_factory, settings)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return [
+        SimilarAssetOut(asset_id=other, campaign_id=index.campaigns[other], similarity=score)
+        for other, score in index.similar(asset_id, threshold, limit)
+    ]
 
 
 @router.get("/assets/{asset_id}/versions", response_model=list[AssetVersionOut])
-async def list_versions(asset_id: int, user=Depends(current_user_dep)):
-    async with session_factory() as db:
-        result = await db.execute(
-            select(AssetVersion)
-            .join(Asset, Asset.id == AssetVersion.asset_id)
-            .where(Asset.id == asset_id, Asset.owner_id == user["id"])
-            .order_by(AssetVersion.version_number.desc())
+async def list_versions(asset_id: int, request: Request, user=Depends(current_user_dep)):
+    etag = await scoped_etag(user["id"], "assets", "versions", asset_id)
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    async with read_router.session(user["id"]) as db:
+        rows = await fetch_mappings(
+            db,
+            select_schema(AssetVersionOut, AssetVersion, "content_ref", "content_sha256")
+            .where(AssetVersion.asset_id == asset_id, AssetVersion.owner_id == user["id"])
+            .order_by(AssetVersion.version_number.desc()),
         )
-        return result.scalars().all()
+    versions = to_schema(AssetVersionOut, await hydrate_mappings(rows, settings))
+    return conditional_response(request, versions, etag)
 
 
 @router.post("/assets/{asset_id}/undo", response_model=AssetOut)
@@ -180,6 +392,7 @@ async def switch_version(asset_id: int, delta: int, user_id: str):
             select(AssetVersion).where(
                 AssetVersion.asset_id == asset_id,
                 AssetVersion.version_number == target_version,
+                AssetVersion.owner_id == user_id,
             )
         )
         target = version_res.scalar_one_or_none()
@@ -187,6 +400,15 @@ async def switch_version(asset_id: int, delta: int, user_id: str):
             raise HTTPException(status_code=400, detail="No version available")
         asset.current_version = target.version_number
         asset.content = target.content
+        asset.content_ref = target.content_ref
+        asset.content_size = target.content_size
+        asset.content_sha256 = target.content_sha256
+        asset.search_vector = asset_search_vector(
+            Asset.title, await load_content(target, settings)
+        )
         await db.commit()
         await db.refresh(asset)
-        return asset
+        await hydrate_content([asset], settings)
+        await similarity_registry.observe(user_id, [(asset.id, asset.campaign_id, asset.content)])
+        await publish_asset_changed(user_id, asset, "undo" if delta < 0 else "redo")
+        return ModelResponse(to_model(AssetOut, asset))
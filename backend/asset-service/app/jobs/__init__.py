@@ -0,0 +1 @@
+"""Out-of-band maintenance jobs for the asset service."""
@@ -0,0 +1,183 @@
+"""Move existing oversized asset bodies into object storage.
+
+Walks ``assets`` and ``asset_versions`` in primary-key order, uploads bodies
+above ``content_offload_threshold_bytes`` and swaps the inline text for a
+storage pointer. Each batch commits on its own, so the job can be stopped and
+restarted at any point. Search vectors are already built from the full body
+and are left alone. ``--reindex-search`` also rebuilds the vectors of assets
+offloaded before migration 0009, which only covered the title.
+
+Run from the asset-service directory:
+    PYTHONPATH=../common:. python -m app.jobs.offload_content
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import func, select, update
+
+from common.core.logging import configure_logging, get_logger
+from common.core.settings import get_settings
+from common.db.search import refresh_search_vectors_statement
+from common.db.session import build_session_factory
+from common.models import Asset, AssetVersion
+from common.utils.content_store import content_fields, load_content
+from common.utils.storage import storage_enabled, upload_object
+
+settings = get_settings()
+logger = get_logger("asset-service.offload")
+
+
+async def _offload_assets(session_factory, batch_size: int, pause: float) -> int:
+    moved = 0
+    last_id = 0
+    while True:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(Asset.id, Asset.owner_id, Asset.current_version, Asset.content)
+                .where(
+                    Asset.id > last_id,
+                    Asset.content_ref == "",
+                    func.octet_length(Asset.content) > settings.content_offload_threshold_bytes,
+                )
+                .order_by(Asset.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return moved
+            urls = await asyncio.gather(
+                *(
+                    upload_object(
+                        f"{r.owner_id}/asset-{r.id}/v{r.current_version}.txt",
+                        r.content,
+                        settings,
+                        upsert=True,
+                    )
+                    for r in rows
+                )
+            )
+            for row, url in zip(rows, urls):
+                fields = content_fields(row.content, url, settings)
+                if not fields["content_ref"]:
+                    continue
+                # Skip rows edited since they were read; the next run picks them up.
+                updated = await db.execute(
+                    update(Asset)
+                    .where(
+                        Asset.id == row.id,
+                        Asset.current_version == row.current_version,
+                        Asset.content_ref == "",
+                    )
+                    .values(**fields)
+                )
+                moved += updated.rowcount
+            await db.commit()
+            last_id = rows[-1].id
+        logger.info("offload_assets_batch", last_id=last_id, moved=moved)
+        await asyncio.sleep(pause)
+
+
+async def _offload_versions(session_factory, batch_size: int, pause: float) -> int:
+    moved = 0
+    last_id = 0
+    while True:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(
+                    AssetVersion.id,
+                    AssetVersion.asset_id,
+                    AssetVersion.version_number,
+                    AssetVersion.content,
+                    AssetVersion.owner_id,
+                )
+                .where(
+                    AssetVersion.id > last_id,
+                    AssetVersion.content_ref == "",
+                    func.octet_length(AssetVersion.content)
+                    > settings.content_offload_threshold_bytes,
+                )
+                .order_by(AssetVersion.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return moved
+            urls = await asyncio.gather(
+                *(
+                    upload_object(
+                        f"{r.owner_id}/asset-{r.asset_id}/v{r.version_number}.txt",
+                        r.content,
+                        settings,
+                        upsert=True,
+                    )
+                    for r in rows
+                )
+            )
+            for row, url in zip(rows, urls):
+                fields = content_fields(row.content, url, settings)
+                if not fields["content_ref"]:
+                    continue
+                await db.execute(
+                    update(AssetVersion).where(AssetVersion.id == row.id).values(**fields)
+                )
+                moved += 1
+            await db.commit()
+            last_id = rows[-1].id
+        logger.info("offload_versions_batch", last_id=last_id, moved=moved)
+        await asyncio.sleep(pause)
+
+
+async def _reindex_offloaded_search(session_factory, batch_size: int, pause: float) -> int:
+    reindexed = 0
+    last_id = 0
+    while True:
+        async with session_factory() as db:
+            result = await db.execute(
+                select(Asset.id, Asset.content, Asset.content_ref, Asset.content_sha256)
+                .where(Asset.id > last_id, Asset.content_ref != "")
+                .order_by(Asset.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                return reindexed
+            bodies = await asyncio.gather(*(load_content(r, settings) for r in rows))
+            await db.execute(
+                refresh_search_vectors_statement(),
+                [{"b_asset_id": r.id, "b_body": body} for r, body in zip(rows, bodies)],
+            )
+            await db.commit()
+            reindexed += len(rows)
+            last_id = rows[-1].id
+        logger.info("reindex_search_batch", last_id=last_id, reindexed=reindexed)
+        await asyncio.sleep(pause)
+
+
+async def run(batch_size: int = 200, pause: float = 0.5, reindex_search: bool = False) -> None:
+    if not storage_enabled(settings):
+        logger.warning("offload_skipped", reason="storage is not configured")
+        return
+    session_factory = build_session_factory(settings.supabase_db_url)
+    assets = await _offload_assets(session_factory, batch_size, pause)
+    versions = await _offload_versions(session_factory, batch_size, pause)
+    reindexed = (
+        await _reindex_offloaded_search(session_factory, batch_size, pause)
+        if reindex_search
+        else 0
+    )
+    logger.info("offload_complete", assets=assets, versions=versions, reindexed=reindexed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--pause", type=float, default=0.5, help="Seconds between batches")
+    parser.add_argument(
+        "--reindex-search",
+        action="store_true",
+        help="Rebuild search vectors of already offloaded assets from their stored bodies",
+    )
+    args = parser.parse_args()
+    configure_logging(settings.log_level)
+    asyncio.run(run(args.batch_size, args.pause, args.reindex_search))
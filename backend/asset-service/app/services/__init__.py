@@ -0,0 +1 @@
+"""Storage, export and indexing helpers for the asset service."""
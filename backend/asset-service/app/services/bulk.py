@@ -0,0 +1,245 @@
+"""Set-based bulk creation and update of assets.
+
+Assets and their versions are written with multi-row ``INSERT ... RETURNING``
+and executemany ``UPDATE``s inside one transaction. Storage uploads happen
+afterwards, concurrently, via :func:`store_bodies`.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from sqlalchemy import bindparam, func, insert, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.core.settings import Settings
+from common.db.jsonb import merge_jsonb
+from common.db.routing import record_write
+from common.db.search import refresh_search_vectors_statement
+from common.models import Asset, AssetVersion, Campaign
+from common.schemas.common import AssetBulkItemResult, AssetBulkRequest
+from common.utils.content_store import content_fields
+from common.utils.storage import upload_object
+
+# (asset_id, version_number, content) still waiting for its storage upload
+PendingBody = tuple[int, int, str]
+
+
+async def apply_bulk(
+    db: AsyncSession,
+    payload: AssetBulkRequest,
+    user_id: str,
+    settings: Settings,
+) -> tuple[list[AssetBulkItemResult], list[PendingBody]]:
+    results: list[AssetBulkItemResult] = []
+    pending: list[PendingBody] = []
+    now = datetime.now(timezone.utc)
+
+    campaign_ids = {item.campaign_id for item in payload.create}
+    owned_campaigns: set[int] = set()
+    if campaign_ids:
+        owned_campaigns = set(
+            await db.scalars(
+                select(Campaign.id).where(
+                    Campaign.id.in_(campaign_ids), Campaign.owner_id == user_id
+                )
+            )
+        )
+
+    creates = []
+    for index, item in enumerate(payload.create):
+        if item.campaign_id not in owned_campaigns:
+            results.append(
+                AssetBulkItemResult(operation="create", index=index, status="campaign_not_found")
+            )
+        else:
+            creates.append((index, item))
+
+    if creates:
+        inline = [content_fields(item.content, "", settings) for _, item in creates]
+        inserted = await db.execute(
+            insert(Asset).returning(Asset.id, sort_by_parameter_order=True),
+            [
+                {
+                    "campaign_id": item.campaign_id,
+                    "owner_id": user_id,
+                    "asset_type": item.asset_type,
+                    "title": item.title,
+                    "metadata_json": {"storage_url": ""},
+                    "current_version": 1,
+                    "created_at": now,
+                    "updated_at": now,
+                    **fields,
+                }
+                for (_, item), fields in zip(creates, inline)
+            ],
+        )
+        asset_ids = list(inserted.scalars())
+        await db.execute(
+            insert(AssetVersion),
+            [
+                {
+                    "asset_id": asset_id,
+                    "owner_id": user_id,
+                    "campaign_id": item.campaign_id,
+                    "version_number": 1,
+                    "change_note": "initial",
+                    "created_at": now,
+                    "updated_at": now,
+                    **fields,
+                }
+                for asset_id, (_, item), fields in zip(asset_ids, creates, inline)
+            ],
+        )
+        for (index, item), asset_id in zip(creates, asset_ids):
+            results.append(
+                AssetBulkItemResult(
+                    operation="create",
+                    index=index,
+                    status="created",
+                    asset_id=asset_id,
+                    version_number=1,
+                )
+            )
+            pending.append((asset_id, 1, item.content))
+
+    updates = []
+    seen: set[int] = set()
+    for index, item in enumerate(payload.update):
+        if item.asset_id in seen:
+            results.append(
+                AssetBulkItemResult(
+                    operation="update", index=index, status="duplicate", asset_id=item.asset_id
+                )
+            )
+        else:
+            seen.add(item.asset_id)
+            updates.append((index, item))
+
+    if updates:
+        latest_version = (
+            select(func.max(AssetVersion.version_number))
+            .where(AssetVersion.asset_id == Asset.id)
+            .scalar_subquery()
+        )
+        locked = await db.execute(
+            select(
+                Asset.id,
+                Asset.campaign_id,
+                Asset.current_version,
+                latest_version.label("latest_version"),
+            )
+            .where(Asset.id.in_([item.asset_id for _, item in updates]), Asset.owner_id == user_id)
+            .with_for_update(of=Asset)
+        )
+        current = {row.id: row for row in locked}
+        version_rows = []
+        asset_rows = []
+        for index, item in updates:
+            if item.asset_id not in current:
+                results.append(
+                    AssetBulkItemResult(
+                        operation="update", index=index, status="not_found", asset_id=item.asset_id
+                    )
+                )
+                continue
+            row = current[item.asset_id]
+            # Versions above current_version after an undo keep their numbers.
+            next_version = max(row.latest_version or 0, row.current_version) + 1
+            fields = content_fields(item.content, "", settings)
+            version_rows.append(
+                {
+                    "asset_id": item.asset_id,
+                    "owner_id": user_id,
+                    "campaign_id": row.campaign_id,
+                    "version_number": next_version,
+                    "change_note": item.change_note,
+                    "created_at": now,
+                    "updated_at": now,
+                    **fields,
+                }
+            )
+            asset_rows.append(
+                {"id": item.asset_id, "current_version": next_version, "updated_at": now, **fields}
+            )
+            results.append(
+                AssetBulkItemResult(
+                    operation="update",
+                    index=index,
+                    status="updated",
+                    asset_id=item.asset_id,
+                    version_number=next_version,
+                )
+            )
+            pending.append((item.asset_id, next_version, item.content))
+        if version_rows:
+            await db.execute(insert(AssetVersion), version_rows)
+            await db.execute(update(Asset), asset_rows)
+
+    if pending:
+        # Vectors come from the full body, which may be offloaded once uploaded.
+        await db.execute(
+            refresh_search_vectors_statement(),
+            [{"b_asset_id": asset_id, "b_body": content} for asset_id, _, content in pending],
+        )
+
+    results.sort(key=lambda r: (r.operation, r.index))
+    return results, pending
+
+
+async def store_bodies(
+    session_factory: async_sessionmaker[AsyncSession],
+    user_id: str,
+    pending: list[PendingBody],
+    settings: Settings,
+) -> None:
+    """Upload bodies concurrently, then record storage URLs and offload pointers."""
+    semaphore = asyncio.Semaphore(settings.bulk_upload_concurrency)
+
+    async def _upload(asset_id: int, version_number: int, content: str) -> str:
+        async with semaphore:
+            path = f"{user_id}/asset-{asset_id}/v{version_number}.txt"
+            return await upload_object(path, content, settings)
+
+    urls = await asyncio.gather(*(_upload(*body) for body in pending))
+
+    asset_params = []
+    version_params = []
+    for (asset_id, version_number, content), url in zip(pending, urls):
+        fields = content_fields(content, url, settings)
+        version_params.append({"b_asset_id": asset_id, "b_version": version_number, **fields})
+        asset_params.append(
+            {
+                "b_asset_id": asset_id,
+                "b_version": version_number,
+                "b_metadata": {"storage_url": url},
+                **fields,
+            }
+        )
+
+    assets = Asset.__table__
+    versions = AssetVersion.__table__
+    async with session_factory() as db:
+        # An asset edited again in the meantime keeps its newer body and URL.
+        await db.execute(
+            update(assets)
+            .where(
+                assets.c.id == bindparam("b_asset_id"),
+                assets.c.current_version == bindparam("b_version"),
+            )
+            .values(
+                metadata_json=merge_jsonb(
+                    assets.c.metadata_json, bindparam("b_metadata", type_=JSONB)
+                )
+            ),
+            asset_params,
+        )
+        await db.execute(
+            update(versions).where(
+                versions.c.asset_id == bindparam("b_asset_id"),
+                versions.c.version_number == bindparam("b_version"),
+            ),
+            version_params,
+        )
+        await db.commit()
+    await record_write(user_id, "assets")
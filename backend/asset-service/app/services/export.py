@@ -0,0 +1,147 @@
+"""Streaming campaign export as NDJSON or an incrementally built ZIP archive.
+
+Rows come from a server-side cursor (``AsyncSession.stream`` with
+``yield_per``) ordered by asset and version, so memory stays flat no matter
+how large the campaign is.
+"""
+
+import io
+import json
+import zipfile
+from collections.abc import AsyncIterator
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.core.settings import Settings
+from common.models import Asset, AssetVersion
+from common.utils.content_store import load_content
+
+EXPORT_BATCH_SIZE = 500
+
+
+class _ZipChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink; ``zipfile`` falls back to data descriptors."""
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _export_query(owner_id: str, campaign_id: int):
+    return (
+        select(
+            Asset.id.label("asset_id"),
+            Asset.asset_type,
+            Asset.title,
+            Asset.current_version,
+            Asset.metadata_json,
+            Asset.created_at.label("asset_created_at"),
+            Asset.updated_at.label("asset_updated_at"),
+            AssetVersion.id.label("version_id"),
+            AssetVersion.version_number,
+            AssetVersion.content,
+            AssetVersion.content_ref,
+            AssetVersion.content_sha256,
+            AssetVersion.change_note,
+            AssetVersion.created_at,
+        )
+        .join(AssetVersion, AssetVersion.asset_id == Asset.id)
+        .where(Asset.owner_id == owner_id, Asset.campaign_id == campaign_id)
+        .order_by(Asset.id, AssetVersion.version_number)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+
+async def _stream_records(
+    session_factory: async_sessionmaker[AsyncSession],
+    owner_id: str,
+    campaign_id: int,
+    settings: Settings,
+) -> AsyncIterator[dict]:
+    """Yield one ``asset`` record before each asset's ``version`` records."""
+    async with session_factory() as db:
+        result = await db.stream(_export_query(owner_id, campaign_id))
+        current_asset = None
+        async for row in result:
+            if row.asset_id != current_asset:
+                current_asset = row.asset_id
+                yield {
+                    "type": "asset",
+                    "id": row.asset_id,
+                    "campaign_id": campaign_id,
+                    "asset_type": row.asset_type,
+                    "title": row.title,
+                    "current_version": row.current_version,
+                    "metadata": row.metadata_json or {},
+                    "created_at": row.asset_created_at.isoformat(),
+                    "updated_at": row.asset_updated_at.isoformat(),
+                }
+            yield {
+                "type": "version",
+                "id": row.version_id,
+                "asset_id": row.asset_id,
+                "version_number": row.version_number,
+                "content": await load_content(row, settings),
+                "change_note": row.change_note,
+                "created_at": row.created_at.isoformat(),
+            }
+
+
+def _header(campaign_id: int) -> dict:
+    return {
+        "type": "export",
+        "campaign_id": campaign_id,
+        "exported_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def export_ndjson(
+    session_factory: async_sessionmaker[AsyncSession],
+    owner_id: str,
+    campaign_id: int,
+    settings: Settings,
+) -> AsyncIterator[bytes]:
+    # The header goes out before the query runs so clients see bytes immediately.
+    yield (json.dumps(_header(campaign_id)) + "\n").encode("utf-8")
+    async for record in _stream_records(session_factory, owner_id, campaign_id, settings):
+        yield (json.dumps(record) + "\n").encode("utf-8")
+
+
+async def export_zip(
+    session_factory: async_sessionmaker[AsyncSession],
+    owner_id: str,
+    campaign_id: int,
+    settings: Settings,
+) -> AsyncIterator[bytes]:
+    """ZIP with ``export.json``, then ``asset-<id>/asset.json`` and ``v<n>.txt`` per asset."""
+    sink = _ZipChunkBuffer()
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("export.json", json.dumps(_header(campaign_id), indent=2))
+        yield sink.drain()
+        async for record in _stream_records(session_factory, owner_id, campaign_id, settings):
+            if record["type"] == "asset":
+                name = f"asset-{record['id']}/asset.json"
+                archive.writestr(name, json.dumps(record, indent=2))
+            else:
+                name = f"asset-{record['asset_id']}/v{record['version_number']}.txt"
+                archive.writestr(name, record["content"])
+            yield sink.drain()
+    yield sink.drain()
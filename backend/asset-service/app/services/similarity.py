@@ -0,0 +1,333 @@
+"""Near-duplicate detection with MinHash signatures and an LSH band index.
+
+Content is normalised and split into word shingles. Shingles are hashed
+with CRC32, and signatures for a whole batch come from one NumPy pass over
+``NUM_PERM`` universal hash functions. Each owner gets an in-process index
+with ``BANDS`` x ``ROWS`` bands. A lookup only compares the candidates that
+share a band bucket, never every pair. The index is built lazily from the
+database on first use and kept current by this replica's asset write paths.
+Writes made elsewhere (other replicas, bulk jobs, campaign cloning) are
+caught by a fingerprint of the owner's assets, their count and latest
+``updated_at``, checked before an index is reused. When it differs, the
+assets changed since the last sync are re-hashed, and the index is rebuilt
+if the count still disagrees. Offloaded bodies are downloaded at most
+``similarity_load_concurrency`` at a time.
+"""
+
+import asyncio
+import re
+import zlib
+from collections import OrderedDict, defaultdict
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.core.settings import Settings, get_settings
+from common.models import Asset
+from common.utils.content_store import load_content
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+# Prime just above 2**32; with a < 2**31 and h < 2**32, a * h + b fits in uint64.
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(4294967295)
+
+_rng = np.random.default_rng(20261018)
+_A = _rng.integers(1, 2**31, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**32, size=NUM_PERM, dtype=np.uint64)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+# Batches at least this large are hashed in a worker thread, off the event loop.
+OFFLOAD_MIN_ITEMS = 16
+
+
+def shingle_hashes(text: str) -> np.ndarray:
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = {" ".join(words)} if words else set()
+    else:
+        grams = {
+            " ".join(words[i : i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)
+        }
+    return np.fromiter(
+        (zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams)
+    )
+
+
+def minhash_signatures(texts: list[str], chunk_shingles: int = 65536) -> np.ndarray:
+    """Signatures for ``texts`` as a ``(len(texts), NUM_PERM)`` uint64 matrix.
+
+    Texts with no shingles keep the all-``_MAX_HASH`` signature and never match.
+    """
+    signatures = np.full((len(texts), NUM_PERM), _MAX_HASH, dtype=np.uint64)
+    hashed = [shingle_hashes(t) for t in texts]
+    owners = np.repeat(np.arange(len(texts)), [len(h) for h in hashed])
+    if not len(owners):
+        return signatures
+    values = np.concatenate(hashed)
+    for start in range(0, len(values), chunk_shingles):
+        chunk = values[start : start + chunk_shingles]
+        chunk_owners = owners[start : start + chunk_shingles]
+        permuted = (np.outer(chunk, _A) + _B) % _PRIME
+        # Shingles of one text are contiguous, so each text reduces in one segment.
+        starts = np.flatnonzero(np.r_[True, chunk_owners[1:] != chunk_owners[:-1]])
+        ids = chunk_owners[starts]
+        signatures[ids] = np.minimum(signatures[ids], np.minimum.reduceat(permuted, starts, axis=0))
+    return signatures
+
+
+def estimate_similarity(left: np.ndarray, right: np.ndarray) -> float:
+    return float(np.count_nonzero(left == right)) / NUM_PERM
+
+
+def _band_keys(signature: np.ndarray) -> list[bytes]:
+    return [signature[b * ROWS : (b + 1) * ROWS].tobytes() for b in range(BANDS)]
+
+
+class OwnerIndex:
+    def __init__(self):
+        self.signatures: dict[int, np.ndarray] = {}
+        self.campaigns: dict[int, int] = {}
+        # (asset count, latest updated_at) of the owner's rows at the last sync.
+        self.fingerprint: tuple[int, datetime | None] | None = None
+        self._keys: dict[int, list[bytes]] = {}
+        self._buckets: list[defaultdict[bytes, set[int]]] = [
+            defaultdict(set) for _ in range(BANDS)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def remove(self, asset_id: int) -> None:
+        for band, key in enumerate(self._keys.pop(asset_id, [])):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(asset_id)
+                if not bucket:
+                    del self._buckets[band][key]
+        self.signatures.pop(asset_id, None)
+        self.campaigns.pop(asset_id, None)
+
+    def upsert(self, asset_id: int, campaign_id: int, signature: np.ndarray) -> None:
+        self.remove(asset_id)
+        self.signatures[asset_id] = signature
+        self.campaigns[asset_id] = campaign_id
+        if np.all(signature == _MAX_HASH):
+            self._keys[asset_id] = []
+            return
+        keys = _band_keys(signature)
+        self._keys[asset_id] = keys
+        for band, key in enumerate(keys):
+            self._buckets[band][key].add(asset_id)
+
+    def candidates(self, asset_id: int) -> set[int]:
+        found: set[int] = set()
+        for band, key in enumerate(self._keys.get(asset_id, [])):
+            found |= self._buckets[band].get(key, set())
+        found.discard(asset_id)
+        return found
+
+    def similar(self, asset_id: int, threshold: float, limit: int) -> list[tuple[int, float]]:
+        signature = self.signatures.get(asset_id)
+        if signature is None:
+            return []
+        scored = [
+            (other, estimate_similarity(signature, self.signatures[other]))
+            for other in self.candidates(asset_id)
+        ]
+        scored = [item for item in scored if item[1] >= threshold]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
+
+    def duplicate_groups(
+        self, threshold: float, campaign_id: int | None = None
+    ) -> list[tuple[list[int], float]]:
+        """Connected components of candidate pairs at or above ``threshold``."""
+        members = [
+            a for a, c in self.campaigns.items() if campaign_id is None or c == campaign_id
+        ]
+        allowed = set(members)
+        parent = {a: a for a in members}
+        best: dict[int, float] = {}
+
+        def find(node: int) -> int:
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for asset_id in members:
+            for other in self.candidates(asset_id):
+                if other <= asset_id or other not in allowed:
+                    continue
+                score = estimate_similarity(self.signatures[asset_id], self.signatures[other])
+                if score < threshold:
+                    continue
+                root_a, root_b = find(asset_id), find(other)
+                if root_a != root_b:
+                    parent[root_b] = root_a
+                    best[root_a] = max(best.get(root_a, 0.0), best.pop(root_b, 0.0), score)
+                else:
+                    best[root_a] = max(best.get(root_a, 0.0), score)
+
+        groups: dict[int, list[int]] = defaultdict(list)
+        for asset_id in members:
+            groups[find(asset_id)].append(asset_id)
+        return sorted(
+            (
+                (sorted(ids), best.get(root, 0.0))
+                for root, ids in groups.items()
+                if len(ids) > 1
+            ),
+            key=lambda group: (-len(group[0]), group[0][0]),
+        )
+
+
+async def _fingerprint(db: AsyncSession, owner_id: str) -> tuple[int, datetime | None]:
+    result = await db.execute(
+        select(func.count(Asset.id), func.max(Asset.updated_at)).where(Asset.owner_id == owner_id)
+    )
+    count, last_updated = result.one()
+    return count, last_updated
+
+
+class SimilarityRegistry:
+    """Per-owner indexes, bounded to the most recently used owners."""
+
+    def __init__(self, max_owners: int = 256):
+        self.max_owners = max_owners
+        self._indexes: OrderedDict[str, OwnerIndex] = OrderedDict()
+        self._locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    def loaded(self, owner_id: str) -> OwnerIndex | None:
+        index = self._indexes.get(owner_id)
+        if index is not None:
+            self._indexes.move_to_end(owner_id)
+        return index
+
+    async def get(
+        self,
+        owner_id: str,
+        session_factory: async_sessionmaker[AsyncSession],
+        settings: Settings,
+    ) -> OwnerIndex:
+        """The owner's index, synced first if their assets changed since it was loaded."""
+        async with session_factory() as db:
+            fingerprint = await _fingerprint(db, owner_id)
+        index = self.loaded(owner_id)
+        if index is not None and index.fingerprint == fingerprint:
+            return index
+        async with self._locks[owner_id]:
+            index = self.loaded(owner_id)
+            if index is None or index.fingerprint != fingerprint:
+                index = await self._sync(owner_id, index, fingerprint, session_factory, settings)
+                self._store(owner_id, index)
+        return index
+
+    async def get_with(
+        self,
+        owner_id: str,
+        asset_id: int,
+        session_factory: async_sessionmaker[AsyncSession],
+        settings: Settings,
+    ) -> OwnerIndex | None:
+        """Owner index containing ``asset_id``; None if the owner has no such asset.
+
+        An asset can be written after the fingerprint was read; if it exists,
+        the index is synced again rather than answering 404 for a real asset.
+        """
+        index = await self.get(owner_id, session_factory, settings)
+        if asset_id in index.signatures:
+            return index
+        async with session_factory() as db:
+            exists = await db.scalar(
+                select(Asset.id).where(Asset.id == asset_id, Asset.owner_id == owner_id)
+            )
+        if exists is None:
+            return None
+        return await self.get(owner_id, session_factory, settings)
+
+    def _store(self, owner_id: str, index: OwnerIndex) -> None:
+        self._indexes[owner_id] = index
+        self._indexes.move_to_end(owner_id)
+        while len(self._indexes) > self.max_owners:
+            evicted, _ = self._indexes.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    async def _sync(
+        self,
+        owner_id: str,
+        index: OwnerIndex | None,
+        fingerprint: tuple[int, datetime | None],
+        session_factory: async_sessionmaker[AsyncSession],
+        settings: Settings,
+    ) -> OwnerIndex:
+        count, _ = fingerprint
+        if index is not None and index.fingerprint and index.fingerprint[1] is not None:
+            # Re-hash only what changed; a count mismatch left after that means rows
+            # arrived with older timestamps (clones) and needs a full rebuild.
+            await self._load(
+                index, owner_id, session_factory, settings, since=index.fingerprint[1]
+            )
+            if len(index) == count:
+                index.fingerprint = fingerprint
+                return index
+        index = OwnerIndex()
+        await self._load(index, owner_id, session_factory, settings)
+        index.fingerprint = fingerprint
+        return index
+
+    async def _load(
+        self,
+        index: OwnerIndex,
+        owner_id: str,
+        session_factory: async_sessionmaker[AsyncSession],
+        settings: Settings,
+        since: datetime | None = None,
+    ) -> None:
+        statement = select(
+            Asset.id,
+            Asset.campaign_id,
+            Asset.content,
+            Asset.content_ref,
+            Asset.content_sha256,
+        ).where(Asset.owner_id == owner_id)
+        if since is not None:
+            statement = statement.where(Asset.updated_at >= since)
+        async with session_factory() as db:
+            rows = (await db.execute(statement)).all()
+        semaphore = asyncio.Semaphore(settings.similarity_load_concurrency)
+
+        async def _content(row) -> str:
+            async with semaphore:
+                return await load_content(row, settings)
+
+        contents = await asyncio.gather(*(_content(row) for row in rows))
+        signatures = await asyncio.to_thread(minhash_signatures, list(contents))
+        for row, signature in zip(rows, signatures):
+            index.upsert(row.id, row.campaign_id, signature)
+
+    async def observe(self, owner_id: str, items: list[tuple[int, int | None, str]]) -> None:
+        """Refresh ``(asset_id, campaign_id, content)`` entries of a loaded index.
+
+        A ``None`` campaign keeps the one already indexed. Owners without a
+        loaded index are skipped; their next lookup builds it from the database.
+        """
+        index = self.loaded(owner_id)
+        if index is None or not items:
+            return
+        texts = [content for _, _, content in items]
+        if len(texts) >= OFFLOAD_MIN_ITEMS:
+            signatures = await asyncio.to_thread(minhash_signatures, texts)
+        else:
+            signatures = minhash_signatures(texts)
+        for (asset_id, campaign_id, _), signature in zip(items, signatures):
+            if campaign_id is None:
+                campaign_id = index.campaigns.get(asset_id, 0)
+            index.upsert(asset_id, campaign_id, signature)
+
+
+similarity_registry = SimilarityRegistry(get_settings().similarity_max_owners)
@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import bulk
+from app.services.bulk import apply_bulk, store_bodies
+from common.core.settings import get_settings
+from common.schemas.common import AssetBulkRequest
+
+
+class FakeSession:
+    """Answers the statements ``apply_bulk`` issues, in order."""
+
+    def __init__(self, owned_campaigns, locked_assets):
+        self.owned_campaigns = owned_campaigns
+        self.locked_assets = locked_assets
+        self.executed = []
+        self._next_id = 100
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def scalars(self, statement):
+        return self.owned_campaigns
+
+    async def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+        if statement.is_select:
+            return self.locked_assets
+        if statement.is_insert and statement.table.name == "assets":
+            ids = list(range(self._next_id, self._next_id + len(params)))
+            self._next_id += len(params)
+            return SimpleNamespace(scalars=lambda: ids)
+
+    async def commit(self):
+        pass
+
+
+def test_bulk_results_cover_created_missing_and_duplicate_items():
+    payload = AssetBulkRequest(
+        create=[
+            {"campaign_id": 1, "asset_type": "ad_copy", "title": "A", "content": "a"},
+            {"campaign_id": 9, "asset_type": "ad_copy", "title": "B", "content": "b"},
+        ],
+        update=[
+            {"asset_id": 5, "content": "new five"},
+            {"asset_id": 5, "content": "again"},
+            {"asset_id": 6, "content": "not mine"},
+        ],
+    )
+    locked = [SimpleNamespace(id=5, campaign_id=1, current_version=3, latest_version=3)]
+    db = FakeSession(owned_campaigns=[1], locked_assets=locked)
+    results, pending = asyncio.run(apply_bulk(db, payload, "u1", get_settings()))
+
+    assert [(r.operation, r.index, r.status, r.asset_id, r.version_number) for r in results] == [
+        ("create", 0, "created", 100, 1),
+        ("create", 1, "campaign_not_found", None, None),
+        ("update", 0, "updated", 5, 4),
+        ("update", 1, "duplicate", 5, None),
+        ("update", 2, "not_found", 6, None),
+    ]
+    assert pending == [(100, 1, "a"), (5, 4, "new five")]
+    version_rows = [
+        row
+        for statement, params in db.executed
+        if statement.is_insert and statement.table.name == "asset_versions"
+        for row in params
+    ]
+    assert [(r["asset_id"], r["owner_id"], r["campaign_id"]) for r in version_rows] == [
+        (100, "u1", 1),
+        (5, "u1", 1),
+    ]
+    search_update, search_params = db.executed[-1]
+    sql = str(search_update.compile(dialect=postgresql.dialect()))
+    assert "SET search_vector=(setweight(to_tsvector('english'::regconfig, coalesce(assets.title" in sql
+    assert search_params == [
+        {"b_asset_id": 100, "b_body": "a"},
+        {"b_asset_id": 5, "b_body": "new five"},
+    ]
+
+
+def test_bulk_update_after_undo_takes_the_next_free_version_number():
+    payload = AssetBulkRequest(update=[{"asset_id": 5, "content": "after undo"}])
+    # v1..v4 exist and the asset was undone back to v2.
+    locked = [SimpleNamespace(id=5, campaign_id=1, current_version=2, latest_version=4)]
+    db = FakeSession(owned_campaigns=[], locked_assets=locked)
+    results, pending = asyncio.run(apply_bulk(db, payload, "u1", get_settings()))
+
+    assert [(r.status, r.version_number) for r in results] == [("updated", 5)]
+    assert pending == [(5, 5, "after undo")]
+    select_locked = next(statement for statement, _ in db.executed if statement.is_select)
+    sql = str(select_locked.compile(dialect=postgresql.dialect()))
+    assert "max(asset_versions.version_number)" in sql
+    assert sql.endswith("FOR UPDATE OF assets")
+
+
+def test_store_bodies_skips_assets_edited_since(monkeypatch):
+    async def fake_upload(path, content, settings):
+        return f"storage://assets/{path}"
+
+    writes = []
+
+    async def fake_record_write(owner_id, *scopes):
+        writes.append((owner_id, scopes))
+
+    monkeypatch.setattr(bulk, "upload_object", fake_upload)
+    monkeypatch.setattr(bulk, "record_write", fake_record_write)
+    db = FakeSession([], [])
+    asyncio.run(store_bodies(lambda: db, "u1", [(5, 4, "body")], get_settings()))
+
+    (asset_update, asset_params), (version_update, _) = db.executed
+    sql = str(asset_update.compile(dialect=postgresql.dialect()))
+    # The asset row only takes the URL if it is still on the uploaded version.
+    assert "assets.current_version = %(b_version)s" in sql
+    assert asset_params[0]["b_metadata"] == {"storage_url": "storage://assets/u1/asset-5/v4.txt"}
+    assert "asset_versions.version_number = %(b_version)s" in str(
+        version_update.compile(dialect=postgresql.dialect())
+    )
+    assert writes == [("u1", ("assets",))]
@@ -0,0 +1,30 @@
+from common.core.settings import get_settings
+from common.utils.content_store import ContentCache, content_fields
+
+
+def test_small_content_stays_inline():
+    settings = get_settings()
+    fields = content_fields("short copy", "storage://assets/u/asset-1/v1.txt", settings)
+    assert fields["content"] == "short copy"
+    assert fields["content_ref"] == ""
+    assert fields["content_size"] == len("short copy")
+
+
+def test_large_content_is_offloaded_only_when_stored():
+    settings = get_settings()
+    body = "x" * (settings.content_offload_threshold_bytes + 1)
+    stored = content_fields(body, f"storage://{settings.storage_bucket}/u/asset-1/v2.txt", settings)
+    assert stored["content"] == ""
+    assert stored["content_ref"] == "u/asset-1/v2.txt"
+    mocked = content_fields(body, "mock://u/asset-1/v2.txt", settings)
+    assert mocked["content"] == body
+    assert mocked["content_ref"] == ""
+
+
+def test_content_cache_is_bounded_by_bytes():
+    cache = ContentCache(max_bytes=10)
+    cache.put("a", "aaaaaa", 6)
+    cache.put("b", "bbbbbb", 6)
+    assert cache.get("a") is None
+    assert cache.get("b") == "bbbbbb"
+    assert cache.size == 6
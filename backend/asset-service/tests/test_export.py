@@ -0,0 +1,86 @@
+import asyncio
+import io
+import json
+import zipfile
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.services.export import export_ndjson, export_zip
+from common.core.settings import get_settings
+
+CREATED = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _row(asset_id, version_number, content):
+    return SimpleNamespace(
+        asset_id=asset_id,
+        asset_type="ad_copy",
+        title=f"Asset {asset_id}",
+        current_version=2,
+        metadata_json={"tone": "bold"},
+        asset_created_at=CREATED,
+        asset_updated_at=CREATED,
+        version_id=asset_id * 10 + version_number,
+        version_number=version_number,
+        content=content,
+        content_ref="",
+        content_sha256="",
+        change_note="",
+        created_at=CREATED,
+    )
+
+
+ROWS = [_row(1, 1, "first"), _row(1, 2, "second"), _row(2, 1, "other")]
+
+
+class FakeStreamResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeSession:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def stream(self, statement):
+        return FakeStreamResult(ROWS)
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+def test_ndjson_export_groups_versions_under_their_asset():
+    chunks = asyncio.run(_collect(export_ndjson(FakeSession, "u1", 7, get_settings())))
+    records = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert [r["type"] for r in records] == [
+        "export", "asset", "version", "version", "asset", "version"
+    ]
+    assert records[1]["metadata"] == {"tone": "bold"}
+    assert [r["content"] for r in records if r["type"] == "version"] == ["first", "second", "other"]
+
+
+def test_zip_export_is_a_valid_archive_built_incrementally():
+    chunks = asyncio.run(_collect(export_zip(FakeSession, "u1", 7, get_settings())))
+    assert len(chunks) > 2
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == [
+        "export.json",
+        "asset-1/asset.json",
+        "asset-1/v1.txt",
+        "asset-1/v2.txt",
+        "asset-2/asset.json",
+        "asset-2/v1.txt",
+    ]
+    assert archive.read("asset-1/v2.txt") == b"second"
+    assert json.loads(archive.read("export.json"))["campaign_id"] == 7
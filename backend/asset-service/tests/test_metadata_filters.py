@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.routes import _metadata_filter
+from common.db.jsonb import merge_jsonb, set_jsonb_path
+from common.models import Asset
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.asyncpg.dialect()))
+
+
+def test_metadata_filter_keeps_json_scalar_types():
+    assert _metadata_filter(["seed=42", "model=dall-e-3", "hd=true", "note={x}"]) == {
+        "seed": 42,
+        "model": "dall-e-3",
+        "hd": True,
+        "note": "{x}",
+    }
+
+
+def test_metadata_filter_rejects_pairs_without_key():
+    with pytest.raises(HTTPException):
+        _metadata_filter(["=1"])
+
+
+def test_metadata_updates_touch_only_the_written_keys():
+    merged = _sql(
+        update(Asset).values(metadata_json=merge_jsonb(Asset.metadata_json, {"image_url": "u"}))
+    )
+    assert "metadata_json=(assets.metadata_json || $1::JSONB)" in merged
+    single = _sql(
+        update(Asset).values(
+            metadata_json=set_jsonb_path(Asset.metadata_json, ["storage_url"], "u")
+        )
+    )
+    assert "jsonb_set(assets.metadata_json, $1::TEXT[], $2::JSONB" in single
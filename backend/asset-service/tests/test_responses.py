@@ -0,0 +1,25 @@
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from common.schemas.common import AssetVersionOut
+from common.utils.responses import ModelResponse, to_models
+
+
+def test_model_response_renders_rows_once_with_orjson():
+    rows = [
+        SimpleNamespace(
+            id=i,
+            asset_id=7,
+            version_number=i,
+            content=f"v{i}",
+            change_note="manual_edit",
+            created_at=datetime(2026, 10, 18, tzinfo=timezone.utc),
+        )
+        for i in (1, 2)
+    ]
+    response = ModelResponse(to_models(AssetVersionOut, rows))
+    assert response.media_type == "application/json"
+    body = json.loads(response.body)
+    assert [v["version_number"] for v in body] == [1, 2]
+    assert body[0]["created_at"] == "2026-10-18T00:00:00+00:00"
@@ -0,0 +1,43 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from common.core.security import create_access_token
+from common.core.settings import get_settings
+from common.utils.storage import SignedURLCache
+
+
+def _auth_headers() -> dict:
+    token = create_access_token(sub="test-user", email="test@example.com", settings=get_settings())
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_batch_sign_returns_one_url_per_path():
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/assets/signed-urls",
+        headers=_auth_headers(),
+        json={"paths": ["test-user/asset-1/v1.txt", "storage://assets/test-user/asset-2/v1.txt"]},
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [i["path"] for i in items] == ["test-user/asset-1/v1.txt", "test-user/asset-2/v1.txt"]
+
+
+def test_batch_sign_rejects_foreign_paths():
+    client = TestClient(app)
+    response = client.post(
+        "/api/v1/assets/signed-urls",
+        headers=_auth_headers(),
+        json={"paths": ["someone-else/asset-1/v1.txt"]},
+    )
+    assert response.status_code == 403
+
+
+def test_signed_url_cache_respects_margin_and_bound():
+    cache = SignedURLCache(max_entries=2, margin_seconds=60)
+    cache.put("a", 30, "url-a")
+    assert cache.get("a", 30) is None
+    cache.put("a", 3600, "url-a")
+    cache.put("b", 3600, "url-b")
+    cache.put("c", 3600, "url-c")
+    assert cache.get("a", 3600) is None
+    assert cache.get("c", 3600) == "url-c"
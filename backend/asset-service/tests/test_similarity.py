@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.services import similarity
+from app.services.similarity import (
+    OFFLOAD_MIN_ITEMS,
+    OwnerIndex,
+    SimilarityRegistry,
+    minhash_signatures,
+)
+from common.core.settings import get_settings
+
+BASE = (
+    "Launch week special: save 30 percent on every annual plan and get onboarding "
+    "support from our team, trusted by over two thousand growing brands worldwide"
+)
+
+
+def test_near_duplicates_share_lsh_buckets():
+    texts = [
+        BASE,
+        BASE + " today",
+        "Quarterly newsletter with product updates, customer stories and a hiring note",
+    ]
+    signatures = minhash_signatures(texts)
+    index = OwnerIndex()
+    for asset_id, signature in enumerate(signatures, start=1):
+        index.upsert(asset_id, 7, signature)
+
+    similar = index.similar(1, threshold=0.7, limit=5)
+    assert [asset_id for asset_id, _ in similar] == [2]
+    assert index.duplicate_groups(0.7) == [([1, 2], similar[0][1])]
+
+
+def test_empty_content_never_matches():
+    signatures = minhash_signatures(["", ""])
+    index = OwnerIndex()
+    index.upsert(1, 1, signatures[0])
+    index.upsert(2, 1, signatures[1])
+    assert index.similar(1, threshold=0.0, limit=5) == []
+
+
+class FakeAssetSession:
+    """Serves the owner's fingerprint, asset rows and existence checks; records loads."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.loads = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        if "count(" in str(statement):
+            latest = max((row.updated_at for row in self.rows), default=None)
+            return SimpleNamespace(one=lambda: (len(self.rows), latest))
+        since = statement.compile().params.get("updated_at_1")
+        self.loads.append("full" if since is None else "changed")
+        rows = [row for row in self.rows if since is None or row.updated_at >= since]
+        return SimpleNamespace(all=lambda: rows)
+
+    async def scalar(self, statement):
+        wanted = statement.compile().params["id_1"]
+        return wanted if any(row.id == wanted for row in self.rows) else None
+
+
+T0 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _asset_row(asset_id, content, updated_at=T0, content_ref=""):
+    return SimpleNamespace(
+        id=asset_id,
+        campaign_id=7,
+        content=content,
+        content_ref=content_ref,
+        content_sha256="",
+        updated_at=updated_at,
+    )
+
+
+def test_unchanged_owner_reuses_the_loaded_index():
+    db = FakeAssetSession([_asset_row(1, BASE)])
+    registry = SimilarityRegistry()
+
+    async def scenario():
+        first = await registry.get("u1", lambda: db, get_settings())
+        second = await registry.get("u1", lambda: db, get_settings())
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert db.loads == ["full"]
+
+
+def test_asset_written_on_another_replica_is_synced():
+    db = FakeAssetSession([_asset_row(1, BASE)])
+    registry = SimilarityRegistry()
+    settings = get_settings()
+
+    async def scenario():
+        await registry.get("u1", lambda: db, settings)
+        db.rows.append(_asset_row(2, BASE + " today", T0 + timedelta(minutes=1)))
+        index = await registry.get_with("u1", 2, lambda: db, settings)
+        missing = await registry.get_with("u1", 99, lambda: db, settings)
+        return index, missing
+
+    index, missing = asyncio.run(scenario())
+    assert [asset_id for asset_id, _ in index.similar(2, 0.7, 5)] == [1]
+    assert missing is None
+    assert db.loads == ["full", "changed"]
+
+
+def test_content_edited_elsewhere_refreshes_dedupe_results():
+    unrelated = "Quarterly newsletter with product updates, customer stories and a hiring note"
+    db = FakeAssetSession([_asset_row(1, BASE), _asset_row(2, unrelated)])
+    registry = SimilarityRegistry()
+    settings = get_settings()
+
+    async def scenario():
+        before = (await registry.get("u1", lambda: db, settings)).duplicate_groups(0.7)
+        db.rows[1] = _asset_row(2, BASE + " today", T0 + timedelta(minutes=1))
+        after = (await registry.get("u1", lambda: db, settings)).duplicate_groups(0.7)
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert before == []
+    assert [ids for ids, _ in after] == [[1, 2]]
+
+
+def test_rows_with_older_timestamps_force_a_full_rebuild():
+    db = FakeAssetSession([_asset_row(1, BASE, T0 + timedelta(days=1))])
+    registry = SimilarityRegistry()
+
+    async def scenario():
+        await registry.get("u1", lambda: db, get_settings())
+        db.rows.append(_asset_row(2, BASE + " today"))  # cloned with the source's updated_at
+        return await registry.get("u1", lambda: db, get_settings())
+
+    index = asyncio.run(scenario())
+    assert sorted(index.signatures) == [1, 2]
+    assert db.loads == ["full", "changed", "full"]
+
+
+def test_offloaded_bodies_load_with_bounded_concurrency(monkeypatch):
+    in_flight = peak = 0
+
+    async def fake_load_content(row, settings):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return f"{BASE} {row.id}"
+
+    monkeypatch.setattr(similarity, "load_content", fake_load_content)
+    rows = [_asset_row(i, "", content_ref=f"u1/asset-{i}/v1.txt") for i in range(20)]
+    settings = get_settings().model_copy(update={"similarity_load_concurrency": 3})
+    index = asyncio.run(SimilarityRegistry().get("u1", lambda: FakeAssetSession(rows), settings))
+    assert len(index) == 20
+    assert peak == 3
+
+
+def test_large_observe_batches_are_indexed():
+    registry = SimilarityRegistry()
+    registry._store("u1", OwnerIndex())
+    items = [(i, 1, f"{BASE} variant {i}") for i in range(OFFLOAD_MIN_ITEMS)]
+    asyncio.run(registry.observe("u1", items))
+    assert len(registry.loaded("u1")) == OFFLOAD_MIN_ITEMS
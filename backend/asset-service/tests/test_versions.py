@@ -0,0 +1,132 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1 import routes
+from common.models import Asset, AssetVersion
+from common.schemas.common import AssetUpdate
+
+
+class FakeSession:
+    def __init__(self, asset=None, rows=(), latest_version=None):
+        self.asset = asset
+        self.latest_version = latest_version
+        self.rows = list(rows)
+        self.statements = []
+        self.added = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(
+            scalar_one_or_none=lambda: self.asset,
+            mappings=lambda: SimpleNamespace(all=lambda: self.rows),
+        )
+
+    async def scalar(self, statement):
+        self.statements.append(statement)
+        return self.latest_version
+
+    def add(self, row):
+        self.added.append(row)
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, row):
+        pass
+
+
+def _sql(statement):
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _asset(current_version=3):
+    now = datetime.now(timezone.utc)
+    return Asset(
+        id=5,
+        campaign_id=9,
+        owner_id="u1",
+        asset_type="copy",
+        title="Launch",
+        content="v3 body",
+        metadata_json={},
+        current_version=current_version,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+def _patch_update_dependencies(monkeypatch, db):
+    async def fake_upload(path, content, settings):
+        return f"storage://assets/{path}"
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(routes, "session_factory", lambda: db)
+    monkeypatch.setattr(routes, "upload_object", fake_upload)
+    monkeypatch.setattr(routes, "publish_asset_changed", noop)
+    monkeypatch.setattr(routes.similarity_registry, "observe", noop)
+
+
+def test_update_asset_locks_the_row_and_stamps_owner_on_the_version(monkeypatch):
+    db = FakeSession(asset=_asset(), latest_version=3)
+    _patch_update_dependencies(monkeypatch, db)
+
+    asyncio.run(
+        routes.update_asset(5, AssetUpdate(content="v4 body"), user={"id": "u1"})
+    )
+
+    select_asset, _ = db.statements
+    assert _sql(select_asset).endswith("FOR UPDATE")
+    [version] = [row for row in db.added if isinstance(row, AssetVersion)]
+    assert (version.owner_id, version.campaign_id, version.version_number) == ("u1", 9, 4)
+    vector = str(db.asset.search_vector.compile(dialect=postgresql.dialect()))
+    assert "to_tsvector('english'::regconfig, coalesce(assets.title" in vector
+
+
+def test_edit_after_undo_does_not_reuse_a_version_number(monkeypatch):
+    # v1..v3 exist and the asset was undone back to v2.
+    asset = _asset(current_version=2)
+    db = FakeSession(asset=asset, latest_version=3)
+    _patch_update_dependencies(monkeypatch, db)
+
+    asyncio.run(routes.update_asset(5, AssetUpdate(content="after undo"), user={"id": "u1"}))
+
+    [version] = [row for row in db.added if isinstance(row, AssetVersion)]
+    assert version.version_number == 4
+    assert asset.current_version == 4
+    assert "max(asset_versions.version_number)" in _sql(db.statements[1])
+
+
+def test_list_versions_filters_on_the_denormalized_owner(monkeypatch):
+    db = FakeSession()
+
+    @asynccontextmanager
+    async def fake_session(owner_id):
+        yield db
+
+    async def fake_etag(*args):
+        return '"v"'
+
+    monkeypatch.setattr(routes.read_router, "session", fake_session)
+    monkeypatch.setattr(routes, "scoped_etag", fake_etag)
+    request = SimpleNamespace(headers={})
+
+    asyncio.run(routes.list_versions(5, request, user={"id": "u1"}))
+
+    [statement] = db.statements
+    sql = _sql(statement)
+    # Owner is checked on asset_versions itself, without a join to assets.
+    assert "asset_versions.owner_id = %(owner_id_1)s" in sql
+    assert "JOIN" not in sql
+    assert statement.compile().params["owner_id_1"] == "u1"
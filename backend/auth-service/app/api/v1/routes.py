@@ -1,16 +1,23 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from redis.asyncio import from_url
 from sqlalchemy import select
 
 from common.core.settings import get_settings
 from common.core.security import create_access_token, verify_google_id_token
+from common.db.routing import ReadRouter, record_write
 from common.db.session import build_session_factory
 from common.models import User
 from common.schemas.common import TokenResponse
+from common.utils.deps import get_current_user
+from common.utils.events import EventHub, event_stream
 
 router = APIRouter(tags=["auth"])
 settings = get_settings()
 session_factory = build_session_factory(settings.supabase_db_url)
+read_router = ReadRouter(settings)
+event_hub = EventHub(from_url(settings.redis_url, decode_responses=True))
 
 
 class GoogleLoginIn(BaseModel):
@@ -33,9 +40,29 @@ async def google_login(payload: GoogleLoginIn) -> TokenResponse:
             user = User(id=info["sub"], email=info["email"], name=info["name"])
             db.add(user)
             await db.commit()
-        token = create_access_token(sub=user.id, email=user.email, settings=settings)
+            await record_write(user.id, "credits")
+        token = create_access_token(
+            sub=user.id, email=user.email, settings=settings, plan=user.plan
+        )
         return TokenResponse(
             access_token=token,
             expires_in=settings.jwt_exp_minutes * 60,
         )
 
+
+@router.get("/events")
+async def events(
+    authorization: str | None = Header(default=None),
+    access_token: str | None = Query(default=None),
+    last_event_id_header: str | None = Header(default=None, alias="Last-Event-ID"),
+    last_event_id: str | None = Query(default=None),
+) -> StreamingResponse:
+    # EventSource cannot set headers, so browsers pass the token as a query parameter.
+    if not authorization and access_token:
+        authorization = f"Bearer {access_token}"
+    user = await get_current_user(authorization, settings)
+    return StreamingResponse(
+        event_stream(event_hub, user["id"], last_event_id_header or last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
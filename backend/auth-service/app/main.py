@@ -1,16 +1,26 @@
-from fastapi import FastAPI, Depends, Header, HTTPException
+from fastapi import FastAPI, Depends, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from common.core.settings import get_settings, Settings
 from common.core.logging import configure_logging, get_logger
+from common.core.stalls import install_stall_profiler
 from common.core.security import create_access_token
-from common.db.session import build_session_factory
+from common.db.routing import record_write
+from common.db.session import dispose_engines, pool_metrics, warm_up_engine
 from common.models import User
+from common.models.entities import INITIAL_CREDITS
 from common.schemas.common import TokenResponse, UserProfile, APIMessage
 from common.utils.deps import get_current_user
-from app.api.v1.routes import router as auth_router
+from common.utils.etag import (
+    conditional_response,
+    not_modified,
+    precondition_met,
+    scoped_etag,
+)
+from common.utils.load_shedding import install_load_shedding
+from app.api.v1.routes import read_router, router as auth_router, session_factory
 
 settings = get_settings()
 configure_logging(settings.log_level)
@@ -21,6 +31,14 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
+)
+stall_profiler = install_stall_profiler(app, settings)
+load_monitor = install_load_shedding(
+    app,
+    settings,
+    low_priority=(f"{settings.api_prefix}/events",),
+    untracked=(f"{settings.api_prefix}/events",),
 )
 app.add_middleware(
     CORSMiddleware,
@@ -30,31 +48,61 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.include_router(auth_router, prefix=settings.api_prefix)
-session_factory: async_sessionmaker = build_session_factory(settings.supabase_db_url)
 
 
 async def current_user_dep(authorization: str | None = Header(default=None)):
     return await get_current_user(authorization, settings)
 
 
+@app.on_event("startup")
+async def warm_up_db_pool() -> None:
+    await warm_up_engine(settings.supabase_db_url, settings.db_warmup_connections)
+
+
+@app.on_event("shutdown")
+async def dispose_db_engines() -> None:
+    await dispose_engines()
+
+
 @app.get("/health", response_model=APIMessage)
 async def health() -> APIMessage:
     return APIMessage(message="ok")
 
 
+@app.get("/health/db-pool")
+async def db_pool_health():
+    return pool_metrics()
+
+
+@app.get("/health/load")
+async def load_health():
+    return load_monitor.snapshot()
+
+
+@app.get("/health/stalls")
+async def stall_health():
+    return stall_profiler.snapshot()
+
+
 @app.get("/api/v1/me", response_model=UserProfile)
-async def me(user=Depends(current_user_dep)):
-    async with session_factory() as db:
+async def me(request: Request, user=Depends(current_user_dep)):
+    # The profile only changes with the balance or on signup, which bumps the same counter.
+    etag = await scoped_etag(user["id"], "credits", "me")
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    async with read_router.session(user["id"]) as db:
         result = await db.execute(select(User).where(User.id == user["id"]))
         db_user = result.scalar_one_or_none()
-        if not db_user:
-            return UserProfile(id=user["id"], email=user["email"], name="", credits_balance=0)
-        return UserProfile(
+    if not db_user:
+        profile = UserProfile(id=user["id"], email=user["email"], name="", credits_balance=0)
+    else:
+        profile = UserProfile(
             id=db_user.id,
             email=db_user.email,
             name=db_user.name,
             credits_balance=db_user.credits_balance,
         )
+    return conditional_response(request, profile, etag)
 
 
 @app.post("/api/v1/dev-token", response_model=TokenResponse, include_in_schema=settings.env != "prod")
@@ -65,8 +113,12 @@ async def dev_token(email: str) -> TokenResponse:
         result = await db.execute(select(User).where(User.id == email))
         existing = result.scalar_one_or_none()
         if not existing:
-            db.add(User(id=email, email=email, name="Dev User", credits_balance=100))
+            existing = User(
+                id=email, email=email, name="Dev User", credits_balance=INITIAL_CREDITS
+            )
+            db.add(existing)
             await db.commit()
-    token = create_access_token(sub=email, email=email, settings=settings)
+            await record_write(email, "credits")
+    token = create_access_token(sub=email, email=email, settings=settings, plan=existing.plan)
     return TokenResponse(access_token=token, expires_in=settings.jwt_exp_minutes * 60)
 
@@ -0,0 +1,18 @@
+from fastapi.testclient import TestClient
+
+from app import main
+from app.api.v1 import routes
+
+
+def test_auth_service_shares_one_engine():
+    assert main.session_factory is routes.session_factory
+
+
+def test_db_pool_health_reports_pool():
+    client = TestClient(main.app)
+    response = client.get("/health/db-pool")
+    assert response.status_code == 200
+    pools = response.json()
+    assert len(pools) == 1
+    assert pools[0]["checkouts"] == 0
+    assert "***" in pools[0]["database"]
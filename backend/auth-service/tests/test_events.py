@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from common.utils import events
+from common.utils.events import EventHub, event_stream, format_sse
+
+
+def test_events_requires_token():
+    client = TestClient(app)
+    response = client.get("/api/v1/events")
+    assert response.status_code == 401
+
+
+def test_format_sse_frame():
+    payload = json.dumps({"type": "credits.changed", "data": {"balance": 42}})
+    frame = format_sse("1700000000000-0", payload)
+    assert frame == 'id: 1700000000000-0\nevent: credits.changed\ndata: {"balance": 42}\n\n'
+
+
+class FakeRedis:
+    def __init__(self, entries):
+        self.entries = entries
+
+    async def xrange(self, key, min, max):
+        return [(event_id, {"payload": payload}) for event_id, payload in self.entries if event_id >= min]
+
+
+def _payload(n):
+    return json.dumps({"type": "credits.changed", "data": {"balance": n}})
+
+
+def test_overflowed_subscriber_is_refilled_from_stream():
+    entries = [(f"1700000000000-{n}", _payload(n)) for n in range(5)]
+
+    async def run():
+        hub = EventHub(FakeRedis(entries), queue_size=2)
+        hub._task = asyncio.get_running_loop().create_future()  # no live Redis listener
+        stream = event_stream(hub, "user-1", None)
+        assert await anext(stream) == "retry: 3000\n: connected\n\n"
+        queue = next(iter(hub._subscribers["user-1"]))
+        for event in entries[1:]:
+            EventHub._deliver(queue, event)  # events 1-2 fill the queue, 3 overflows
+        frames = [await anext(stream) for _ in range(4)]
+        await stream.aclose()
+        hub._task.cancel()
+        return frames
+
+    frames = asyncio.run(run())
+    assert [frame.split("\n")[0] for frame in frames] == [
+        f"id: 1700000000000-{n}" for n in range(1, 5)
+    ]
+
+
+class DownRedis:
+    def __init__(self):
+        self.calls = 0
+
+    async def xadd(self, *args, **kwargs):
+        self.calls += 1
+        raise RedisTimeoutError("Timeout reading from socket")
+
+
+def test_publish_drops_events_without_retrying_redis_after_a_failure(monkeypatch):
+    redis = DownRedis()
+    monkeypatch.setattr(events, "get_event_redis", lambda: redis)
+    monkeypatch.setattr(events, "_publish_paused_until", 0.0)
+
+    async def run():
+        first = await events.publish_event("user-1", "credits.changed", {"balance": 1})
+        second = await events.publish_event("user-1", "credits.changed", {"balance": 2})
+        return first, second
+
+    assert asyncio.run(run()) == (None, None)
+    # The second publish is dropped without waiting on Redis again.
+    assert redis.calls == 1
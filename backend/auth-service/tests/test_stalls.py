@@ -0,0 +1,37 @@
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.core.settings import get_settings
+from common.core.stalls import install_stall_profiler
+
+
+def test_blocking_handler_is_attributed_to_its_route():
+    settings = get_settings().model_copy(
+        update={"stall_profiler_enabled": True, "stall_threshold_ms": 50.0}
+    )
+    app = FastAPI()
+    profiler = install_stall_profiler(app, settings)
+
+    @app.get("/items/{item_id}")
+    async def blocking_item(item_id: int):
+        time.sleep(0.2)  # synchronous call on the event loop
+        return {"id": item_id}
+
+    with TestClient(app) as client:
+        assert client.get("/items/1").status_code == 200
+        time.sleep(0.1)  # let the heartbeat observe the recovery
+        routes = profiler.snapshot()["routes"]
+
+    stalls = routes["GET /items/{item_id}"]
+    assert stalls["count"] == 1
+    assert stalls["max_ms"] >= 100
+    assert stalls["handlers"][0].endswith("blocking_item")
+
+
+def test_profiler_is_off_by_default():
+    app = FastAPI()
+    profiler = install_stall_profiler(app, get_settings())
+    with TestClient(app):
+        assert profiler.snapshot()["enabled"] is False
@@ -0,0 +1,102 @@
+"""ORM vs Core reads for one page of assets: CPU time and peak allocations.
+
+Runs against in-memory SQLite through a sync engine. The cost being
+compared is row materialization, which is the same for the sync and async
+APIs.
+
+Usage (from ``backend/``):
+
+    PYTHONPATH=common python benchmarks/bench_reads.py [--items 100] [--content-bytes 2048]
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session
+
+from common.db.reads import select_schema, to_schema
+from common.models import Asset
+from common.schemas.common import AssetOut
+from common.utils.responses import to_models
+
+DDL = """
+CREATE TABLE assets (
+    id INTEGER PRIMARY KEY, campaign_id INTEGER, owner_id VARCHAR(64), asset_type VARCHAR(50),
+    title VARCHAR(255), content TEXT, content_ref VARCHAR(512), content_size INTEGER,
+    content_sha256 VARCHAR(64), metadata_json TEXT, current_version INTEGER,
+    created_at TIMESTAMP, updated_at TIMESTAMP
+)
+"""
+
+
+def seed(engine, count: int, content_bytes: int) -> None:
+    now = datetime.now(timezone.utc)
+    body = ("lorem ipsum dolor sit amet " * (content_bytes // 27 + 1))[:content_bytes]
+    with engine.begin() as conn:
+        conn.execute(text(DDL))
+        conn.execute(
+            insert(Asset.__table__).values(
+                [
+                    {
+                        "id": i + 1, "campaign_id": 1, "owner_id": "bench-user",
+                        "asset_type": "email", "title": f"Asset {i}", "content": body,
+                        "content_ref": "", "content_size": 0, "content_sha256": "",
+                        "metadata_json": {}, "current_version": 1,
+                        "created_at": now, "updated_at": now,
+                    }
+                    for i in range(count)
+                ]
+            )
+        )
+
+
+def measure(fn, rounds: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(rounds):
+        started = time.process_time()
+        fn()
+        timings.append(time.process_time() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / 1024
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--content-bytes", type=int, default=2048)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    seed(engine, args.items, args.content_bytes)
+    orm_query = select(Asset).where(Asset.owner_id == "bench-user").order_by(Asset.id)
+    core_query = (
+        select_schema(AssetOut, Asset, "content_ref", "content_sha256")
+        .where(Asset.owner_id == "bench-user")
+        .order_by(Asset.id)
+    )
+
+    def orm_page() -> list[AssetOut]:
+        with Session(engine) as session:
+            return to_models(AssetOut, session.execute(orm_query).scalars().all())
+
+    def core_page() -> list[AssetOut]:
+        with engine.connect() as conn:
+            return to_schema(AssetOut, conn.execute(core_query).mappings().all())
+
+    assert orm_page() == core_page()
+    print(f"{args.items} rows x {args.content_bytes} bytes of content, median of {args.rounds} rounds")
+    for name, fn in (("ORM scalars().all()", orm_page), ("Core columns -> schema", core_page)):
+        cpu_ms, peak_kib = measure(fn, args.rounds)
+        print(f"  {name:<26} {cpu_ms:7.3f} ms CPU   {peak_kib:8.1f} KiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Serialization cost of a 100-item asset page, per response strategy.
+
+Compares FastAPI's default path (re-validate against ``response_model``,
+``jsonable_encoder``, stdlib json), the same path with ``ORJSONResponse``, and
+``common.utils.responses`` (``from_attributes`` validation once, orjson).
+
+Usage (from ``backend/``):
+
+    PYTHONPATH=common python benchmarks/bench_responses.py [--items 100] [--content-bytes 2048]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from common.schemas.common import AssetOut, PaginatedAssetOut
+from common.utils.responses import ModelResponse, to_models
+
+
+def make_rows(count: int, content_bytes: int) -> list[SimpleNamespace]:
+    now = datetime.now(timezone.utc)
+    body = ("lorem ipsum dolor sit amet " * (content_bytes // 27 + 1))[:content_bytes]
+    return [
+        SimpleNamespace(
+            id=i,
+            campaign_id=1,
+            owner_id="bench-user",
+            asset_type="email",
+            title=f"Asset {i}",
+            content=body,
+            current_version=3,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def bench(fn, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--content-bytes", type=int, default=2048)
+    parser.add_argument("--rounds", type=int, default=300)
+    args = parser.parse_args()
+
+    rows = make_rows(args.items, args.content_bytes)
+    field = create_model_field("response", PaginatedAssetOut, mode="serialization")
+    loop = asyncio.new_event_loop()
+
+    def page() -> PaginatedAssetOut:
+        return PaginatedAssetOut(
+            items=to_models(AssetOut, rows), total=len(rows), page=1, limit=len(rows)
+        )
+
+    def fastapi_default() -> bytes:
+        # The route returns a model; FastAPI validates it again against response_model.
+        encoded = loop.run_until_complete(serialize_response(field=field, response_content=page()))
+        return JSONResponse(encoded).body
+
+    def fastapi_orjson() -> bytes:
+        encoded = loop.run_until_complete(serialize_response(field=field, response_content=page()))
+        return ORJSONResponse(encoded).body
+
+    def model_response() -> bytes:
+        return ModelResponse(page()).body
+
+    assert fastapi_default() and model_response()
+    print(f"{args.items} items x {args.content_bytes} bytes of content, median of {args.rounds} rounds")
+    for name, fn in (
+        ("fastapi default (validate + json)", fastapi_default),
+        ("fastapi + ORJSONResponse", fastapi_orjson),
+        ("ModelResponse (validate once + orjson)", model_response),
+    ):
+        print(f"  {name:<40} {bench(fn, args.rounds):7.3f} ms")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,51 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select, func, desc
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from redis.asyncio import from_url
+from sqlalchemy import desc, func, select
 
 from common.core.settings import get_settings
+from common.db.reads import count_rows, fetch_schema, paginate, select_schema
+from common.db.routing import ReadRouter
 from common.db.session import build_session_factory
-from common.models import User, CreditLedger
+from common.models import CreditBalanceCheck, CreditLedger, User
+from common.models.entities import INITIAL_CREDITS
 from common.schemas.common import (
     CreditMutation,
     CreditBalanceOut,
+    CreditDriftOut,
+    CreditGrantProgressOut,
+    CreditGrantRequest,
     LedgerEntryOut,
     PaginatedLedgerOut,
 )
-from common.utils.deps import build_current_user_dep
+from common.utils.deps import build_admin_user_dep, build_current_user_dep
 from common.utils.credits import add_credits, deduct_credits
+from common.utils.etag import conditional_response, not_modified, precondition_met, scoped_etag
+from app.services.grants import GrantTracker, run_grant
 
 router = APIRouter(tags=["billing"])
 settings = get_settings()
 session_factory = build_session_factory(settings.supabase_db_url)
+read_router = ReadRouter(settings)
 current_user_dep = build_current_user_dep(settings)
+admin_user_dep = build_admin_user_dep(settings)
+grant_tracker = GrantTracker(
+    from_url(settings.redis_url, decode_responses=True, socket_timeout=0.5)
+)
 
 
 @router.get("/credits/balance", response_model=CreditBalanceOut)
-async def credit_balance(user=Depends(current_user_dep)):
-    async with session_factory() as db:
+async def credit_balance(request: Request, user=Depends(current_user_dep)):
+    etag = await scoped_etag(user["id"], "credits", "balance")
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    async with read_router.session(user["id"]) as db:
         existing = await db.execute(select(User).where(User.id == user["id"]))
         db_user = existing.scalar_one_or_none()
         if not db_user:
-            from fastapi import HTTPException
             raise HTTPException(status_code=404, detail="User not found")
-        return CreditBalanceOut(user_id=db_user.id, balance=db_user.credits_balance)
+    return conditional_response(
+        request, CreditBalanceOut(user_id=db_user.id, balance=db_user.credits_balance), etag
+    )
 
 
 @router.post("/credits/add", response_model=CreditBalanceOut)
@@ -48,36 +66,66 @@ async def credit_deduct(payload: CreditMutation, user=Depends(current_user_dep))
 
 @router.get("/credits/ledger", response_model=PaginatedLedgerOut)
 async def credit_ledger(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     user=Depends(current_user_dep),
 ):
-    async with session_factory() as db:
-        base = select(CreditLedger).where(CreditLedger.user_id == user["id"])
-
-        total_result = await db.execute(
-            select(func.count()).select_from(base.subquery())
+    etag = await scoped_etag(user["id"], "credits", "ledger", page, limit)
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    base = select_schema(LedgerEntryOut, CreditLedger).where(CreditLedger.user_id == user["id"])
+    async with read_router.session(user["id"]) as db:
+        total = await count_rows(db, base)
+        items = await fetch_schema(
+            db, paginate(base.order_by(desc(CreditLedger.created_at)), page, limit), LedgerEntryOut
         )
-        total = total_result.scalar() or 0
+    body = PaginatedLedgerOut(items=items, total=total, page=page, limit=limit)
+    return conditional_response(request, body, etag)
 
-        result = await db.execute(
-            base.order_by(desc(CreditLedger.created_at))
-            .offset((page - 1) * limit)
-            .limit(limit)
-        )
-        rows = result.scalars().all()
-        return PaginatedLedgerOut(
-            items=[
-                LedgerEntryOut(
-                    id=r.id,
-                    delta=r.delta,
-                    reason=r.reason,
-                    reference_id=r.reference_id,
-                    created_at=r.created_at,
-                )
-                for r in rows
-            ],
-            total=total,
-            page=page,
-            limit=limit,
+
+@router.post("/admin/credits/grants", response_model=CreditGrantProgressOut, status_code=202)
+async def create_credit_grant(
+    payload: CreditGrantRequest,
+    background_tasks: BackgroundTasks,
+    admin=Depends(admin_user_dep),
+):
+    if bool(payload.user_ids) == bool(payload.segment):
+        raise HTTPException(status_code=400, detail="Provide either user_ids or segment")
+    existing = await grant_tracker.get(payload.reference_id)
+    if existing and grant_tracker.in_progress(existing):
+        raise HTTPException(status_code=409, detail="Grant already in progress")
+    progress = CreditGrantProgressOut(reference_id=payload.reference_id, status="queued")
+    await grant_tracker.save(progress)
+    background_tasks.add_task(
+        run_grant, session_factory, payload, settings.credit_grant_chunk_size, grant_tracker
+    )
+    return progress
+
+
+@router.get("/admin/credits/grants/{reference_id}", response_model=CreditGrantProgressOut)
+async def credit_grant_progress(reference_id: str, admin=Depends(admin_user_dep)):
+    progress = await grant_tracker.get(reference_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Grant not found")
+    return progress
+
+
+@router.get("/admin/credits/drift", response_model=list[CreditDriftOut])
+async def credit_drift(
+    limit: int = Query(100, ge=1, le=1000),
+    admin=Depends(admin_user_dep),
+):
+    statement = (
+        select(
+            CreditBalanceCheck.user_id,
+            (CreditBalanceCheck.ledger_sum + INITIAL_CREDITS).label("expected_balance"),
+            CreditBalanceCheck.drift,
+            CreditBalanceCheck.checked_at,
         )
+        .where(CreditBalanceCheck.drift != 0)
+        .order_by(func.abs(CreditBalanceCheck.drift).desc())
+        .limit(limit)
+    )
+    async with session_factory() as db:
+        return await fetch_schema(db, statement, CreditDriftOut)
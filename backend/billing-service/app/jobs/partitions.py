@@ -0,0 +1,48 @@
+"""Create upcoming monthly partitions and retire expired usage partitions.
+
+Creates ``partition_months_ahead`` months ahead for ``usage_events`` and
+``credit_ledger``. Then it detaches ``usage_events`` months older than
+``usage_retention_months`` and moves them into ``partition_archive_schema``.
+Ledger history is never retired. Safe to run repeatedly, e.g. daily from cron.
+
+Run from the billing-service directory:
+    PYTHONPATH=../common:. python -m app.jobs.partitions
+"""
+
+import argparse
+import asyncio
+
+from common.core.logging import configure_logging, get_logger
+from common.core.settings import get_settings
+from common.db.partitions import PARTITIONED_TABLES, detach_expired, ensure_partitions
+from common.db.session import dispose_engines, get_engine
+
+settings = get_settings()
+logger = get_logger("billing-service.partitions")
+
+
+async def run(months_ahead: int, retention_months: int, retire: bool = True) -> None:
+    engine = get_engine(settings.supabase_db_url)
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for table in PARTITIONED_TABLES:
+                created = await ensure_partitions(conn, table, months_ahead)
+                logger.info("partitions_ensured", table=table, created=created)
+            if retire:
+                retired = await detach_expired(
+                    conn, "usage_events", retention_months, settings.partition_archive_schema
+                )
+                logger.info("partitions_retired", table="usage_events", retired=retired)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--months-ahead", type=int, default=settings.partition_months_ahead)
+    parser.add_argument("--retention-months", type=int, default=settings.usage_retention_months)
+    parser.add_argument("--no-retire", action="store_true", help="Only create partitions")
+    args = parser.parse_args()
+    configure_logging(settings.log_level)
+    asyncio.run(run(args.months_ahead, args.retention_months, not args.no_retire))
@@ -0,0 +1,55 @@
+"""Reconcile credit balances against the ledger, optionally repairing drift.
+
+Each pass walks every user in keyset batches and reads only the ledger rows
+written since that user's last check. Drift is logged and recorded in
+``credit_balance_checks``; ``GET /api/v1/admin/credits/drift`` lists it.
+With ``--repair``, drifted balances are reset to what the ledger implies.
+Batches are spaced so the job keeps the database busy for at most
+``--load-budget`` of the wall time. An interrupted pass resumes from its
+checkpoint.
+
+Run from the billing-service directory:
+    PYTHONPATH=../common:. python -m app.jobs.reconcile [--repair] [--interval 3600]
+"""
+
+import argparse
+import asyncio
+
+from common.core.logging import configure_logging
+from common.core.settings import get_settings
+from common.db.session import build_session_factory, dispose_engines
+from app.services.reconciliation import reconcile_pass
+
+settings = get_settings()
+
+
+async def run(
+    batch_size: int, load_budget: float, repair: bool = False, interval: float = 0
+) -> None:
+    session_factory = build_session_factory(settings.supabase_db_url)
+    try:
+        while True:
+            await reconcile_pass(session_factory, batch_size, load_budget, repair)
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=settings.reconcile_batch_size)
+    parser.add_argument(
+        "--load-budget",
+        type=float,
+        default=settings.reconcile_load_budget,
+        help="Fraction of wall time spent querying (0-1)",
+    )
+    parser.add_argument("--repair", action="store_true", help="Reset drifted balances")
+    parser.add_argument(
+        "--interval", type=float, default=0, help="Seconds between passes; 0 runs one pass"
+    )
+    args = parser.parse_args()
+    configure_logging(settings.log_level)
+    asyncio.run(run(args.batch_size, args.load_budget, args.repair, args.interval))
@@ -0,0 +1 @@
+"""Set-based credit operations for the billing service."""
@@ -0,0 +1,183 @@
+"""Set-based bulk credit grants for plan renewals and promotions.
+
+Targets (an explicit user list or the ``active`` segment) are processed in
+chunks of ``credit_grant_chunk_size`` users, one transaction per chunk. A
+chunk is a single statement. It locks the chunk's user rows in id order,
+skips users who already have a ledger row for the grant's ``reference_id``,
+bumps the remaining balances with one ``UPDATE ... FROM`` and writes their
+ledger rows with one ``INSERT ... SELECT``. Every chunk first takes a
+transaction-scoped advisory lock on the reference id, so concurrent runs of
+one grant serialize. Re-running a grant after a crash or a retry therefore
+only credits the users it missed.
+
+Progress lives in Redis and fails open like the other Redis helpers; the
+ledger stays the source of truth. Every save stamps ``updated_at``. A queued
+or running grant whose progress has not been saved for ``stale_seconds`` is
+treated as dead (its worker went away) and may be submitted again.
+"""
+
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy import String, bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.db.routing import record_writes
+from common.models import User
+from common.schemas.common import CreditGrantProgressOut, CreditGrantRequest
+
+logger = logging.getLogger(__name__)
+
+GRANT_LOCK_SQL = text("SELECT pg_advisory_xact_lock(hashtext(:reference_id))")
+
+GRANT_CHUNK_SQL = text("""
+    WITH targets AS (
+        SELECT u.id FROM users AS u
+        WHERE u.id = ANY(:user_ids)
+          AND NOT EXISTS (
+              SELECT 1 FROM credit_ledger AS l
+              WHERE l.user_id = u.id AND l.reference_id = :reference_id
+          )
+        ORDER BY u.id
+        FOR UPDATE OF u
+    ),
+    credited AS (
+        UPDATE users AS u
+        SET credits_balance = u.credits_balance + :amount, updated_at = now()
+        FROM targets AS t
+        WHERE u.id = t.id
+        RETURNING u.id
+    )
+    INSERT INTO credit_ledger (user_id, delta, reason, reference_id, created_at)
+    SELECT id, :amount, :reason, :reference_id, now() FROM credited
+    RETURNING user_id
+""").bindparams(bindparam("user_ids", type_=ARRAY(String)))
+
+
+class GrantTracker:
+    def __init__(
+        self,
+        redis_client: Redis,
+        ttl_seconds: int = 7 * 24 * 3600,
+        prefix: str = "credit-grant",
+        stale_seconds: int = 300,
+    ):
+        self.redis = redis_client
+        self.ttl = ttl_seconds
+        self.prefix = f"{prefix}:"
+        self.stale_after = timedelta(seconds=stale_seconds)
+
+    def in_progress(self, progress: CreditGrantProgressOut) -> bool:
+        """True while a queued or running grant is still saving progress."""
+        if progress.status not in ("queued", "running") or progress.updated_at is None:
+            return False
+        return datetime.now(timezone.utc) - progress.updated_at < self.stale_after
+
+    async def get(self, reference_id: str) -> CreditGrantProgressOut | None:
+        try:
+            raw = await self.redis.get(self.prefix + reference_id)
+        except RedisError:
+            return None
+        return CreditGrantProgressOut.model_validate_json(raw) if raw else None
+
+    async def save(self, progress: CreditGrantProgressOut) -> None:
+        progress.updated_at = datetime.now(timezone.utc)
+        try:
+            await self.redis.set(
+                self.prefix + progress.reference_id, progress.model_dump_json(), ex=self.ttl
+            )
+        except RedisError as exc:
+            logger.warning("Grant progress not saved for %s: %s", progress.reference_id, exc)
+
+
+async def count_targets(
+    session_factory: async_sessionmaker[AsyncSession], payload: CreditGrantRequest
+) -> int:
+    if payload.user_ids:
+        return len(set(payload.user_ids))
+    async with session_factory() as db:
+        return await db.scalar(select(func.count()).where(User.is_active.is_(True))) or 0
+
+
+async def target_chunks(
+    session_factory: async_sessionmaker[AsyncSession],
+    payload: CreditGrantRequest,
+    chunk_size: int,
+) -> AsyncIterator[list[str]]:
+    if payload.user_ids:
+        user_ids = sorted(set(payload.user_ids))
+        for start in range(0, len(user_ids), chunk_size):
+            yield user_ids[start:start + chunk_size]
+        return
+    # Keyset walk over the segment, so users created mid-grant are picked up too.
+    last_id = ""
+    while True:
+        async with session_factory() as db:
+            user_ids = list(
+                await db.scalars(
+                    select(User.id)
+                    .where(User.is_active.is_(True), User.id > last_id)
+                    .order_by(User.id)
+                    .limit(chunk_size)
+                )
+            )
+        if not user_ids:
+            return
+        yield user_ids
+        last_id = user_ids[-1]
+
+
+async def grant_chunk(
+    db: AsyncSession, user_ids: list[str], payload: CreditGrantRequest
+) -> list[str]:
+    """Credit ``user_ids`` not yet granted under ``payload.reference_id``; returns who got it."""
+    await db.execute(GRANT_LOCK_SQL, {"reference_id": payload.reference_id})
+    result = await db.execute(
+        GRANT_CHUNK_SQL,
+        {
+            "user_ids": user_ids,
+            "amount": payload.amount,
+            "reason": payload.reason,
+            "reference_id": payload.reference_id,
+        },
+    )
+    return list(result.scalars())
+
+
+async def run_grant(
+    session_factory: async_sessionmaker[AsyncSession],
+    payload: CreditGrantRequest,
+    chunk_size: int,
+    tracker: GrantTracker,
+) -> CreditGrantProgressOut:
+    progress = CreditGrantProgressOut(reference_id=payload.reference_id, status="running")
+    try:
+        progress.total = await count_targets(session_factory, payload)
+        await tracker.save(progress)
+        async for user_ids in target_chunks(session_factory, payload, chunk_size):
+            async with session_factory() as db:
+                granted = await grant_chunk(db, user_ids, payload)
+                await db.commit()
+            await record_writes(granted, "credits")
+            progress.processed += len(user_ids)
+            progress.granted += len(granted)
+            progress.skipped += len(user_ids) - len(granted)
+            await tracker.save(progress)
+        progress.status = "completed"
+    except Exception as exc:
+        logger.exception("Credit grant %s failed", payload.reference_id)
+        progress.status = "failed"
+        progress.error = str(exc)
+    await tracker.save(progress)
+    logger.info(
+        "Credit grant %s %s: %d granted, %d skipped",
+        payload.reference_id,
+        progress.status,
+        progress.granted,
+        progress.skipped,
+    )
+    return progress
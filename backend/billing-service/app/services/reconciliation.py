@@ -0,0 +1,220 @@
+"""Incremental reconciliation of ``users.credits_balance`` against the ledger.
+
+A user's balance should equal ``INITIAL_CREDITS`` plus the sum of their
+ledger deltas. Recomputing that sum for everyone is a full aggregate over
+the ledger. Instead, ``credit_balance_checks`` keeps a per-user checkpoint:
+the sum of the ledger rows already folded in (``ledger_sum``) and the
+highest id among them (``last_ledger_id``).
+
+Each batch is one statement over a keyset page of users. It reads each
+user's balance and only the ledger rows after their checkpoint, through the
+(user_id, created_at) index. Every credit operation locks the user row
+before writing its ledger row, so one user's ledger ids grow in commit
+order and a per-user id checkpoint never skips a row. Balance and ledger
+rows come from the same snapshot, so in-flight credit operations never show
+up as false drift.
+
+Only users with new ledger rows, changed drift or a repair are written
+back. The pass cursor is stored in ``job_checkpoints``, so an interrupted
+pass resumes where it stopped.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import Integer, String, bindparam, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.db.routing import record_writes
+from common.models import CreditBalanceCheck, JobCheckpoint
+from common.models.entities import INITIAL_CREDITS
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_NAME = "credit_reconciliation"
+# Ledger timestamps come from several clocks; the margin keeps partition
+# pruning on created_at from ever cutting off a row after the checkpoint.
+CLOCK_MARGIN = "1 hour"
+
+RECONCILE_BATCH_SQL = text(f"""
+    WITH batch AS (
+        SELECT u.id, u.credits_balance,
+               coalesce(c.ledger_sum, 0) AS ledger_sum,
+               coalesce(c.last_ledger_id, 0) AS last_ledger_id,
+               c.last_ledger_at,
+               c.drift AS previous_drift
+        FROM users AS u
+        LEFT JOIN credit_balance_checks AS c ON c.user_id = u.id
+        WHERE u.id > :after
+        ORDER BY u.id
+        LIMIT :batch_size
+    )
+    SELECT b.id AS user_id,
+           b.credits_balance,
+           b.previous_drift,
+           b.ledger_sum + coalesce(t.delta, 0) AS ledger_sum,
+           coalesce(t.last_id, b.last_ledger_id) AS last_ledger_id,
+           coalesce(t.last_at, b.last_ledger_at) AS last_ledger_at,
+           t.new_rows
+    FROM batch AS b
+    CROSS JOIN LATERAL (
+        SELECT sum(l.delta) AS delta, max(l.id) AS last_id,
+               max(l.created_at) AS last_at, count(*) AS new_rows
+        FROM credit_ledger AS l
+        WHERE l.user_id = b.id
+          AND l.id > b.last_ledger_id
+          AND (b.last_ledger_at IS NULL
+               OR l.created_at >= b.last_ledger_at - interval '{CLOCK_MARGIN}')
+    ) AS t
+    ORDER BY b.id
+""")
+
+# Only overwrites balances that still hold the value the batch observed.
+REPAIR_SQL = text("""
+    UPDATE users AS u
+    SET credits_balance = r.expected, updated_at = now()
+    FROM unnest(:user_ids, :expected, :observed) AS r(id, expected, observed)
+    WHERE u.id = r.id AND u.credits_balance = r.observed
+    RETURNING u.id
+""").bindparams(
+    bindparam("user_ids", type_=ARRAY(String)),
+    bindparam("expected", type_=ARRAY(Integer)),
+    bindparam("observed", type_=ARRAY(Integer)),
+)
+
+
+@dataclass
+class ReconcileStats:
+    users: int = 0
+    updated: int = 0
+    drifted: int = 0
+    repaired: int = 0
+
+
+async def _load_cursor(db: AsyncSession) -> str:
+    return await db.scalar(
+        select(JobCheckpoint.cursor).where(JobCheckpoint.name == CHECKPOINT_NAME)
+    ) or ""
+
+
+async def _save_cursor(db: AsyncSession, cursor: str) -> None:
+    statement = insert(JobCheckpoint).values(name=CHECKPOINT_NAME, cursor=cursor)
+    await db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[JobCheckpoint.name],
+            set_={"cursor": statement.excluded.cursor, "updated_at": text("now()")},
+        )
+    )
+
+
+async def reconcile_batch(
+    db: AsyncSession, after: str, batch_size: int, repair: bool, stats: ReconcileStats
+) -> str | None:
+    """Check one keyset page of users after ``after``; returns the new cursor, None at the end."""
+    result = await db.execute(RECONCILE_BATCH_SQL, {"after": after, "batch_size": batch_size})
+    rows = result.all()
+    if not rows:
+        return None
+    drifted = []
+    for row in rows:
+        drift = row.credits_balance - (INITIAL_CREDITS + row.ledger_sum)
+        if drift:
+            drifted.append((row, drift))
+    repaired: set[str] = set()
+    if repair and drifted:
+        result = await db.execute(
+            REPAIR_SQL,
+            {
+                "user_ids": [row.user_id for row, _ in drifted],
+                "expected": [INITIAL_CREDITS + row.ledger_sum for row, _ in drifted],
+                "observed": [row.credits_balance for row, _ in drifted],
+            },
+        )
+        repaired = set(result.scalars())
+    drifts = {row.user_id: drift for row, drift in drifted if row.user_id not in repaired}
+    checks = [
+        {
+            "user_id": row.user_id,
+            "ledger_sum": row.ledger_sum,
+            "last_ledger_id": row.last_ledger_id,
+            "last_ledger_at": row.last_ledger_at,
+            "drift": drifts.get(row.user_id, 0),
+        }
+        # Every repaired user is written, so previously recorded drift is reset.
+        for row in rows
+        if row.new_rows
+        or row.user_id in repaired
+        or row.previous_drift != drifts.get(row.user_id, 0)
+    ]
+    for row, drift in drifted:
+        logger.warning(
+            "Credit drift for %s: balance %d, ledger expects %d%s",
+            row.user_id,
+            row.credits_balance,
+            INITIAL_CREDITS + row.ledger_sum,
+            " (repaired)" if row.user_id in repaired else "",
+        )
+    if checks:
+        statement = insert(CreditBalanceCheck).values(checks)
+        excluded = statement.excluded
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CreditBalanceCheck.user_id],
+                set_={
+                    "ledger_sum": excluded.ledger_sum,
+                    "last_ledger_id": excluded.last_ledger_id,
+                    "last_ledger_at": excluded.last_ledger_at,
+                    "drift": excluded.drift,
+                    "checked_at": text("now()"),
+                },
+            )
+        )
+    cursor = rows[-1].user_id
+    await _save_cursor(db, cursor)
+    await db.commit()
+    if repaired:
+        await record_writes(sorted(repaired), "credits")
+    stats.users += len(rows)
+    stats.updated += len(checks)
+    stats.drifted += len(drifted)
+    stats.repaired += len(repaired)
+    return cursor
+
+
+def throttle_delay(busy_seconds: float, load_budget: float) -> float:
+    """Idle time after ``busy_seconds`` of work that keeps the duty cycle at ``load_budget``."""
+    load_budget = min(max(load_budget, 0.01), 1.0)
+    return busy_seconds * (1 - load_budget) / load_budget
+
+
+async def reconcile_pass(
+    session_factory: async_sessionmaker[AsyncSession],
+    batch_size: int,
+    load_budget: float,
+    repair: bool = False,
+) -> ReconcileStats:
+    """Run (or resume) one pass over all users."""
+    stats = ReconcileStats()
+    async with session_factory() as db:
+        cursor = await _load_cursor(db)
+    while True:
+        started = time.monotonic()
+        async with session_factory() as db:
+            next_cursor = await reconcile_batch(db, cursor, batch_size, repair, stats)
+            if next_cursor is None:
+                await _save_cursor(db, "")
+                await db.commit()
+                break
+        cursor = next_cursor
+        await asyncio.sleep(throttle_delay(time.monotonic() - started, load_budget))
+    logger.info(
+        "Credit reconciliation pass done: %d users, %d updated, %d drifted, %d repaired",
+        stats.users,
+        stats.updated,
+        stats.drifted,
+        stats.repaired,
+    )
+    return stats
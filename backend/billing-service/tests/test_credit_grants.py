@@ -0,0 +1,79 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.api.v1 import routes
+from app.api.v1.routes import admin_user_dep
+from app.main import app
+from app.services.grants import target_chunks
+from common.core.security import create_access_token
+from common.core.settings import get_settings
+from common.schemas.common import CreditGrantProgressOut, CreditGrantRequest
+
+
+def test_grants_require_an_admin():
+    token = create_access_token(sub="u1", email="user@example.com", settings=get_settings())
+    response = TestClient(app).post(
+        "/api/v1/admin/credits/grants",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"amount": 10, "reason": "promo", "reference_id": "promo-1", "segment": "active"},
+    )
+    assert response.status_code == 403
+
+
+def test_grant_needs_exactly_one_target():
+    app.dependency_overrides[admin_user_dep] = lambda: {"id": "a1", "email": "admin@example.com"}
+    try:
+        client = TestClient(app)
+        base = {"amount": 10, "reason": "promo", "reference_id": "promo-1"}
+        assert client.post("/api/v1/admin/credits/grants", json=base).status_code == 400
+        both = {**base, "user_ids": ["u1"], "segment": "active"}
+        assert client.post("/api/v1/admin/credits/grants", json=both).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+
+
+def test_explicit_targets_are_deduplicated_and_chunked_in_id_order():
+    payload = CreditGrantRequest(
+        amount=5, reason="renewal", reference_id="plan-2026-10", user_ids=["c", "a", "b", "a"]
+    )
+
+    async def collect():
+        return [chunk async for chunk in target_chunks(None, payload, 2)]
+
+    assert asyncio.run(collect()) == [["a", "b"], ["c"]]
+
+
+def test_only_a_grant_with_a_fresh_heartbeat_blocks_resubmission(monkeypatch):
+    now = datetime.now(timezone.utc)
+    saved = {
+        "live": CreditGrantProgressOut(reference_id="live", status="running", updated_at=now),
+        "dead": CreditGrantProgressOut(
+            reference_id="dead", status="running", updated_at=now - timedelta(hours=1)
+        ),
+    }
+
+    async def fake_get(reference_id):
+        return saved.get(reference_id)
+
+    async def fake_save(progress):
+        pass
+
+    async def fake_run(*args):
+        pass
+
+    monkeypatch.setattr(routes.grant_tracker, "get", fake_get)
+    monkeypatch.setattr(routes.grant_tracker, "save", fake_save)
+    monkeypatch.setattr(routes, "run_grant", fake_run)
+    app.dependency_overrides[admin_user_dep] = lambda: {"id": "a1", "email": "admin@example.com"}
+    try:
+        client = TestClient(app)
+        base = {"amount": 10, "reason": "promo", "segment": "active"}
+        live = client.post("/api/v1/admin/credits/grants", json={**base, "reference_id": "live"})
+        dead = client.post("/api/v1/admin/credits/grants", json={**base, "reference_id": "dead"})
+    finally:
+        app.dependency_overrides.clear()
+    assert live.status_code == 409
+    # The worker behind a stale "running" status died; the grant can be resumed.
+    assert dead.status_code == 202
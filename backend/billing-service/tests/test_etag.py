@@ -0,0 +1,32 @@
+from starlette.requests import Request
+
+from common.schemas.common import CreditBalanceOut
+from common.utils.etag import conditional_response, etag_matches, weak_etag
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def test_etag_matching_is_weak_and_accepts_lists():
+    etag = weak_etag("credits", "u1", 7)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(weak_etag("credits", "u1", 8), etag)
+    assert not etag_matches(None, etag)
+
+
+def test_conditional_response_uses_body_digest_without_counter():
+    body = CreditBalanceOut(user_id="u1", balance=40)
+    first = conditional_response(_request(), body)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    repeat = conditional_response(_request(etag), body)
+    assert repeat.status_code == 304
+    assert repeat.body == b""
+
+    changed = conditional_response(_request(etag), CreditBalanceOut(user_id="u1", balance=39))
+    assert changed.status_code == 200
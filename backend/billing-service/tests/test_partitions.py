@@ -0,0 +1,93 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+from common.db.partitions import (
+    add_months,
+    create_partition_sql,
+    detach_expired,
+    ensure_partitions,
+    parse_upper_bound,
+)
+
+
+class RecordingConnection:
+    def __init__(self, bounds: dict[str, str], default_months: tuple[date, ...] = ()):
+        self.bounds = bounds
+        self.default_months = default_months
+        self.statements: list[str] = []
+
+    async def execute(self, statement, params=None):
+        sql = str(statement)
+        if "pg_inherits" in sql:
+            rows = [SimpleNamespace(name=n, bound=b) for n, b in self.bounds.items()]
+            return SimpleNamespace(all=lambda: rows)
+        if sql.startswith("SELECT EXISTS"):
+            has_rows = params["lower"] in self.default_months
+            return SimpleNamespace(scalar=lambda: has_rows)
+        self.statements.append(sql)
+
+
+def test_month_arithmetic_and_bounds():
+    assert add_months(date(2026, 11, 1), 2) == date(2027, 1, 1)
+    assert add_months(date(2026, 1, 1), -13) == date(2024, 12, 1)
+    assert parse_upper_bound("DEFAULT") is None
+    assert parse_upper_bound(
+        "FOR VALUES FROM ('2026-11-01 00:00:00+00') TO ('2026-12-01 00:00:00+00')"
+    ) == date(2026, 12, 1)
+    assert create_partition_sql("usage_events", date(2026, 12, 1)).endswith(
+        "usage_events_p202612 PARTITION OF usage_events "
+        "FOR VALUES FROM ('2026-12-01') TO ('2027-01-01')"
+    )
+
+
+def test_ensure_partitions_starts_after_existing_coverage():
+    conn = RecordingConnection(
+        {
+            "usage_events_legacy": "FOR VALUES FROM (MINVALUE) TO ('2026-12-01 00:00:00')",
+            "usage_events_default": "DEFAULT",
+        }
+    )
+    created = asyncio.run(ensure_partitions(conn, "usage_events", 2, today=date(2026, 10, 18)))
+    assert created == ["usage_events_p202612"]
+
+
+def test_detach_expired_archives_whole_months():
+    conn = RecordingConnection(
+        {
+            "usage_events_p202508": "FOR VALUES FROM ('2025-08-01') TO ('2025-09-01')",
+            "usage_events_p202510": "FOR VALUES FROM ('2025-10-01') TO ('2025-11-01')",
+            "usage_events_default": "DEFAULT",
+        }
+    )
+    retired = asyncio.run(
+        detach_expired(conn, "usage_events", 13, "archive", today=date(2026, 10, 18))
+    )
+    assert retired == ["usage_events_p202508"]
+    [retire] = conn.statements[1:]
+    # CONCURRENTLY is rejected while the DEFAULT partition exists.
+    assert "DETACH PARTITION usage_events_p202508;" in retire
+    assert "CONCURRENTLY" not in retire
+    assert "set_config('lock_timeout', '5s', true)" in retire
+    assert "ALTER TABLE usage_events_p202508 SET SCHEMA archive;" in retire
+
+
+def test_ensure_partitions_moves_default_rows_into_the_new_month():
+    conn = RecordingConnection(
+        {
+            "usage_events_p202610": "FOR VALUES FROM ('2026-10-01') TO ('2026-11-01')",
+            "usage_events_default": "DEFAULT",
+        },
+        default_months=(date(2026, 11, 1),),
+    )
+    created = asyncio.run(ensure_partitions(conn, "usage_events", 2, today=date(2026, 10, 18)))
+
+    assert created == ["usage_events_p202611", "usage_events_p202612"]
+    moved, plain = conn.statements
+    assert "DELETE FROM usage_events_default" in moved
+    assert "created_at >= '2026-11-01' AND created_at < '2026-12-01'" in moved
+    assert (
+        "ATTACH PARTITION usage_events_p202611 FOR VALUES FROM ('2026-11-01') TO ('2026-12-01')"
+        in moved
+    )
+    assert plain == create_partition_sql("usage_events", date(2026, 12, 1))
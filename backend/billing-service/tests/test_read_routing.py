@@ -0,0 +1,49 @@
+import asyncio
+
+from redis.exceptions import RedisError
+
+from common.core.settings import get_settings
+from common.db import routing
+from common.db.routing import ReadRouter
+
+
+class FakeRedis:
+    def __init__(self, pinned: set[str] | None = None, fail: bool = False):
+        self.pinned = pinned or set()
+        self.fail = fail
+
+    async def exists(self, key: str) -> int:
+        if self.fail:
+            raise RedisError("down")
+        return int(key.removeprefix(routing.PIN_PREFIX) in self.pinned)
+
+
+def _router(monkeypatch, redis: FakeRedis) -> ReadRouter:
+    settings = get_settings().model_copy(
+        update={"supabase_replica_db_url": "postgresql+asyncpg://reader:pw@replica:5432/postgres"}
+    )
+    router = ReadRouter(settings)
+    monkeypatch.setattr(routing, "get_pin_redis", lambda: redis)
+
+    async def healthy() -> bool:
+        return True
+
+    monkeypatch.setattr(router, "_replica_healthy", healthy)
+    return router
+
+
+def test_reads_go_to_replica_unless_pinned(monkeypatch):
+    router = _router(monkeypatch, FakeRedis(pinned={"writer"}))
+    assert asyncio.run(router.use_replica("reader")) is True
+    assert asyncio.run(router.use_replica("writer")) is False
+
+
+def test_unknown_pin_state_reads_from_primary(monkeypatch):
+    router = _router(monkeypatch, FakeRedis(fail=True))
+    assert asyncio.run(router.use_replica("reader")) is False
+
+
+def test_without_replica_url_everything_uses_primary():
+    router = ReadRouter(get_settings())
+    assert router.replica is None
+    assert asyncio.run(router.use_replica("reader")) is False
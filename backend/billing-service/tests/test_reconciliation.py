@@ -0,0 +1,81 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.services import reconciliation
+from app.services.reconciliation import (
+    RECONCILE_BATCH_SQL,
+    REPAIR_SQL,
+    ReconcileStats,
+    reconcile_batch,
+    throttle_delay,
+)
+from common.models.entities import INITIAL_CREDITS
+
+
+class FakeSession:
+    def __init__(self, rows):
+        self.rows = rows
+        self.writes = []
+
+    async def execute(self, statement, params=None):
+        if statement is RECONCILE_BATCH_SQL:
+            return SimpleNamespace(all=lambda: self.rows)
+        if statement is REPAIR_SQL:
+            return SimpleNamespace(scalars=lambda: params["user_ids"])
+        self.writes.append(statement)
+
+    async def commit(self):
+        pass
+
+
+def _row(user_id, balance, ledger_sum, previous_drift, new_rows):
+    return SimpleNamespace(
+        user_id=user_id,
+        credits_balance=balance,
+        previous_drift=previous_drift,
+        ledger_sum=ledger_sum,
+        last_ledger_id=10,
+        last_ledger_at=None,
+        new_rows=new_rows,
+    )
+
+
+def test_only_users_with_new_rows_or_changed_drift_are_written():
+    rows = [
+        _row("a", INITIAL_CREDITS - 5, -5, 0, 0),  # unchanged and consistent
+        _row("b", INITIAL_CREDITS + 20, 20, 0, 2),  # new ledger rows
+        _row("c", INITIAL_CREDITS + 7, 0, 0, 0),  # balance moved without a ledger row
+        _row("d", INITIAL_CREDITS, 0, None, 0),  # never checked
+    ]
+    db = FakeSession(rows)
+    stats = ReconcileStats()
+    cursor = asyncio.run(reconcile_batch(db, "", 4, repair=False, stats=stats))
+    assert cursor == "d"
+    assert stats == ReconcileStats(users=4, updated=3, drifted=1, repaired=0)
+    upsert = db.writes[0].compile()
+    assert upsert.params["user_id_m0"] == "b"
+    assert upsert.params["drift_m1"] == 7
+
+
+def test_repair_resets_recorded_drift_without_new_ledger_rows(monkeypatch):
+    async def fake_record_writes(owner_ids, *scopes):
+        pass
+
+    monkeypatch.setattr(reconciliation, "record_writes", fake_record_writes)
+    # Drift of 7 was recorded on an earlier pass; nothing new in the ledger since.
+    db = FakeSession([_row("c", INITIAL_CREDITS + 7, 0, 7, 0)])
+    stats = ReconcileStats()
+    asyncio.run(reconcile_batch(db, "", 1, repair=True, stats=stats))
+    assert stats == ReconcileStats(users=1, updated=1, drifted=1, repaired=1)
+    upsert = db.writes[0].compile()
+    assert upsert.params["user_id_m0"] == "c"
+    assert upsert.params["drift_m0"] == 0
+
+
+def test_empty_page_ends_the_pass():
+    assert asyncio.run(reconcile_batch(FakeSession([]), "z", 10, False, ReconcileStats())) is None
+
+
+def test_throttle_keeps_duty_cycle_within_budget():
+    assert throttle_delay(0.2, 0.1) == 0.2 * 9
+    assert throttle_delay(0.2, 1.0) == 0
@@ -1,23 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select, func
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request
+from sqlalchemy import select
 
 from common.core.settings import get_settings
+from common.db.reads import count_rows, fetch_schema, paginate, select_schema
+from common.db.routing import ReadRouter, record_write
 from common.db.session import build_session_factory
 from common.models import Campaign, CampaignStatus
 from common.schemas.common import (
+    CampaignCloneOut,
+    CampaignCloneRequest,
     CampaignCreate,
+    CampaignDashboardOut,
     CampaignOut,
     CampaignStatusUpdate,
+    DashboardAssetOut,
+    DashboardUsageOut,
     PaginatedCampaignOut,
+    SearchHit,
+    SearchOut,
 )
 from common.utils.deps import build_current_user_dep
+from common.utils.etag import (
+    conditional_response,
+    not_modified,
+    precondition_met,
+    scoped_etag,
+)
+from common.utils.events import publish_event
+from common.utils.responses import ModelResponse, to_model
+from app.services.clone import clone_assets_statement, copy_cloned_objects
+from app.services.dashboard import DashboardCache, dashboard_statement
+from app.services.search import decode_cursor, offloaded_snippets, search_statement, split_page
 
 router = APIRouter(tags=["campaigns"])
 settings = get_settings()
 session_factory = build_session_factory(settings.supabase_db_url)
+read_router = ReadRouter(settings)
 current_user_dep = build_current_user_dep(settings)
 
 VALID_STATUSES = {s.value for s in CampaignStatus}
+dashboard_cache = DashboardCache(settings.dashboard_cache_seconds)
 
 
 @router.post("/campaigns", response_model=CampaignOut)
@@ -33,46 +55,107 @@ async def create_campaign(payload: CampaignCreate, user=Depends(current_user_dep
         db.add(campaign)
         await db.commit()
         await db.refresh(campaign)
-        return campaign
+    await record_write(user["id"], "campaigns")
+    return ModelResponse(to_model(CampaignOut, campaign))
 
 
 @router.get("/campaigns", response_model=PaginatedCampaignOut)
 async def list_campaigns(
+    request: Request,
     page: int = Query(1, ge=1),
     limit: int = Query(20, ge=1, le=100),
     user=Depends(current_user_dep),
 ):
-    async with session_factory() as db:
-        base = select(Campaign).where(Campaign.owner_id == user["id"])
-
-        total_result = await db.execute(
-            select(func.count()).select_from(base.subquery())
+    etag = await scoped_etag(user["id"], "campaigns", "list", page, limit)
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    base = select_schema(CampaignOut, Campaign).where(Campaign.owner_id == user["id"])
+    async with read_router.session(user["id"]) as db:
+        total = await count_rows(db, base)
+        items = await fetch_schema(
+            db, paginate(base.order_by(Campaign.created_at.desc()), page, limit), CampaignOut
         )
-        total = total_result.scalar() or 0
+    body = PaginatedCampaignOut(items=items, total=total, page=page, limit=limit)
+    return conditional_response(request, body, etag)
 
-        result = await db.execute(
-            base.order_by(Campaign.created_at.desc())
-            .offset((page - 1) * limit)
-            .limit(limit)
-        )
-        return PaginatedCampaignOut(
-            items=result.scalars().all(),
-            total=total,
-            page=page,
-            limit=limit,
-        )
+
+@router.get("/search", response_model=SearchOut)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    kind: str = Query("all", pattern="^(all|campaigns|assets)$"),
+    limit: int = Query(20, ge=1, le=50),
+    cursor: str | None = Query(default=None),
+    user=Depends(current_user_dep),
+):
+    position = decode_cursor(cursor) if cursor else None
+    async with read_router.session(user["id"]) as db:
+        result = await db.execute(search_statement(user["id"], q, kind, limit, position))
+        rows, next_cursor = split_page(result.all(), limit)
+        snippets = await offloaded_snippets(db, rows, q, settings)
+    return SearchOut(
+        items=[
+            SearchHit(
+                kind=r.kind,
+                id=r.id,
+                campaign_id=r.campaign_id,
+                title=r.title,
+                rank=r.rank,
+                snippet=snippets.get((r.kind, r.id), r.snippet),
+            )
+            for r in rows
+        ],
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/campaigns/{campaign_id}", response_model=CampaignOut)
-async def get_campaign(campaign_id: int, user=Depends(current_user_dep)):
-    async with session_factory() as db:
+async def get_campaign(campaign_id: int, request: Request, user=Depends(current_user_dep)):
+    etag = await scoped_etag(user["id"], "campaigns", "get", campaign_id)
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    async with read_router.session(user["id"]) as db:
         result = await db.execute(
             select(Campaign).where(Campaign.id == campaign_id, Campaign.owner_id == user["id"])
         )
         campaign = result.scalar_one_or_none()
         if not campaign:
             raise HTTPException(status_code=404, detail="Campaign not found")
-        return campaign
+    return conditional_response(request, to_model(CampaignOut, campaign), etag)
+
+
+@router.get("/campaigns/{campaign_id}/dashboard", response_model=CampaignDashboardOut)
+async def campaign_dashboard(
+    campaign_id: int,
+    assets_limit: int = Query(20, ge=1, le=100),
+    usage_days: int = Query(30, ge=1, le=365),
+    user=Depends(current_user_dep),
+):
+    cache_key = (user["id"], campaign_id, assets_limit, usage_days)
+    cached = dashboard_cache.get(cache_key)
+    if cached is not None:
+        return ModelResponse(cached)
+    async with read_router.session(user["id"]) as db:
+        result = await db.execute(
+            dashboard_statement(user["id"], campaign_id, assets_limit, usage_days)
+        )
+        row = result.one_or_none()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    dashboard = CampaignDashboardOut(
+        campaign=to_model(CampaignOut, row.Campaign),
+        credits_balance=row.credits_balance,
+        asset_count=row.asset_count,
+        assets=[DashboardAssetOut(**item) for item in row.assets],
+        usage=DashboardUsageOut(
+            window_days=usage_days,
+            requests=row.requests,
+            failures=row.failures,
+            cost_usd=float(row.cost_usd),
+            avg_latency_ms=float(row.avg_latency_ms),
+        ),
+    )
+    dashboard_cache.put(cache_key, dashboard)
+    return ModelResponse(dashboard)
 
 
 @router.patch("/campaigns/{campaign_id}/status", response_model=CampaignOut)
@@ -91,4 +174,60 @@ async def update_status(
         campaign.status = payload.status.value
         await db.commit()
         await db.refresh(campaign)
-        return campaign
+    dashboard_cache.invalidate_owner(user["id"])
+    await record_write(user["id"], "campaigns")
+    return ModelResponse(to_model(CampaignOut, campaign))
+
+
+@router.post("/campaigns/{campaign_id}/clone", response_model=CampaignCloneOut)
+async def clone_campaign(
+    campaign_id: int,
+    background_tasks: BackgroundTasks,
+    payload: CampaignCloneRequest | None = None,
+    user=Depends(current_user_dep),
+):
+    payload = payload or CampaignCloneRequest()
+    async with session_factory() as db:
+        result = await db.execute(
+            select(Campaign).where(Campaign.id == campaign_id, Campaign.owner_id == user["id"])
+        )
+        source = result.scalar_one_or_none()
+        if not source:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+        clone = Campaign(
+            owner_id=user["id"],
+            name=payload.name or f"{source.name} (copy)"[:255],
+            goal=source.goal,
+            audience=source.audience,
+            status=CampaignStatus.draft.value,
+        )
+        db.add(clone)
+        await db.flush()
+        mapping = (
+            await db.execute(clone_assets_statement(source.id, clone.id, user["id"]))
+        ).all()
+        await db.commit()
+        await db.refresh(clone)
+
+    dashboard_cache.invalidate_owner(user["id"])
+    await record_write(user["id"], "campaigns", "assets")
+    await publish_event(
+        user["id"],
+        "campaign.cloned",
+        {"source_campaign_id": campaign_id, "campaign_id": clone.id, "assets_cloned": len(mapping)},
+    )
+    if payload.copy_storage and mapping:
+        background_tasks.add_task(
+            copy_cloned_objects, session_factory, user["id"], [tuple(m) for m in mapping], settings
+        )
+    return CampaignCloneOut(
+        id=clone.id,
+        owner_id=clone.owner_id,
+        name=clone.name,
+        goal=clone.goal,
+        audience=clone.audience,
+        status=clone.status,
+        created_at=clone.created_at,
+        updated_at=clone.updated_at,
+        assets_cloned=len(mapping),
+    )
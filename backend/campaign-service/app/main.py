@@ -1,15 +1,33 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from common.core.settings import get_settings
 from common.core.logging import configure_logging
+from common.core.stalls import install_stall_profiler
+from common.db.session import dispose_engines, pool_metrics, warm_up_engine
 from common.schemas.common import APIMessage
+from common.utils.load_shedding import install_load_shedding
 from app.api.v1.routes import router
 
 settings = get_settings()
 configure_logging(settings.log_level)
 
-app = FastAPI(title="Campaign Service", version="1.0.0", docs_url="/docs")
+app = FastAPI(
+    title="Campaign Service",
+    version="1.0.0",
+    docs_url="/docs",
+    default_response_class=ORJSONResponse,
+)
+stall_profiler = install_stall_profiler(app, settings)
+load_monitor = install_load_shedding(
+    app,
+    settings,
+    low_priority=(
+        f"{settings.api_prefix}/search",
+        f"{settings.api_prefix}/campaigns/*/clone",
+    ),
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[str(o) for o in settings.cors_origins],
@@ -20,7 +38,32 @@ app.add_middleware(
 app.include_router(router, prefix=settings.api_prefix)
 
 
+@app.on_event("startup")
+async def warm_up_db_pool() -> None:
+    await warm_up_engine(settings.supabase_db_url, settings.db_warmup_connections)
+
+
+@app.on_event("shutdown")
+async def dispose_db_engines() -> None:
+    await dispose_engines()
+
+
 @app.get("/health", response_model=APIMessage)
 async def health():
     return APIMessage(message="ok")
 
+
+@app.get("/health/db-pool")
+async def db_pool_health():
+    return pool_metrics()
+
+
+@app.get("/health/load")
+async def load_health():
+    return load_monitor.snapshot()
+
+
+@app.get("/health/stalls")
+async def stall_health():
+    return stall_profiler.snapshot()
+
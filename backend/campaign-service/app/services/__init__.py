@@ -0,0 +1 @@
+"""Set-based campaign operations."""
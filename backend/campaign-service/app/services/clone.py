@@ -0,0 +1,182 @@
+"""Server-side campaign cloning.
+
+The cloned assets and their current versions are copied with a single
+statement. The ``src`` CTE reserves new asset ids from the sequence, and
+two ``INSERT ... SELECT`` CTEs write ``assets`` and ``asset_versions``. The
+outer SELECT returns the old-to-new id mapping, which drives the optional
+storage copies.
+"""
+
+import asyncio
+
+from sqlalchemy import and_, bindparam, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.core.settings import Settings
+from common.db.jsonb import merge_jsonb
+from common.db.routing import record_write
+from common.models import Asset, AssetVersion
+from common.utils.storage import copy_object
+
+_ASSET_COLUMNS = [
+    "id",
+    "campaign_id",
+    "owner_id",
+    "asset_type",
+    "title",
+    "content",
+    "content_ref",
+    "content_size",
+    "content_sha256",
+    "metadata_json",
+    "current_version",
+    "search_vector",
+    "created_at",
+    "updated_at",
+]
+_VERSION_COLUMNS = [
+    "asset_id",
+    "owner_id",
+    "campaign_id",
+    "version_number",
+    "content",
+    "content_ref",
+    "content_size",
+    "content_sha256",
+    "change_note",
+    "created_at",
+    "updated_at",
+]
+
+
+def clone_assets_statement(source_campaign_id: int, target_campaign_id: int, owner_id: str):
+    src = (
+        select(
+            Asset.id.label("src_id"),
+            func.nextval(func.pg_get_serial_sequence("assets", "id")).label("new_id"),
+            Asset.asset_type,
+            Asset.title,
+            Asset.content,
+            Asset.content_ref,
+            Asset.content_size,
+            Asset.content_sha256,
+            Asset.metadata_json,
+            Asset.current_version,
+            Asset.search_vector,
+        )
+        .where(Asset.campaign_id == source_campaign_id, Asset.owner_id == owner_id)
+        .cte("src")
+    )
+    now = func.now()
+    new_assets = (
+        insert(Asset)
+        .from_select(
+            _ASSET_COLUMNS,
+            select(
+                src.c.new_id,
+                literal(target_campaign_id),
+                literal(owner_id),
+                src.c.asset_type,
+                src.c.title,
+                src.c.content,
+                src.c.content_ref,
+                src.c.content_size,
+                src.c.content_sha256,
+                src.c.metadata_json,
+                literal(1),
+                src.c.search_vector,
+                now,
+                now,
+            ),
+        )
+        .cte("new_assets")
+    )
+    new_versions = (
+        insert(AssetVersion)
+        .from_select(
+            _VERSION_COLUMNS,
+            select(
+                src.c.new_id,
+                literal(owner_id),
+                literal(target_campaign_id),
+                literal(1),
+                AssetVersion.content,
+                AssetVersion.content_ref,
+                AssetVersion.content_size,
+                AssetVersion.content_sha256,
+                literal("cloned"),
+                now,
+                now,
+            ).join_from(
+                src,
+                AssetVersion,
+                and_(
+                    AssetVersion.asset_id == src.c.src_id,
+                    AssetVersion.version_number == src.c.current_version,
+                ),
+            ),
+        )
+        .cte("new_versions")
+    )
+    return select(
+        src.c.src_id,
+        src.c.new_id,
+        src.c.current_version,
+        src.c.content_ref,
+    ).add_cte(new_assets, new_versions)
+
+
+async def copy_cloned_objects(
+    session_factory: async_sessionmaker[AsyncSession],
+    owner_id: str,
+    mapping: list[tuple[int, int, int, str]],
+    settings: Settings,
+) -> None:
+    """Copy each source asset's current object to ``asset-<new>/v1.txt``."""
+    semaphore = asyncio.Semaphore(settings.bulk_upload_concurrency)
+
+    async def _copy(src_id: int, new_id: int, version: int) -> str:
+        async with semaphore:
+            return await copy_object(
+                f"{owner_id}/asset-{src_id}/v{version}.txt",
+                f"{owner_id}/asset-{new_id}/v1.txt",
+                settings,
+            )
+
+    urls = await asyncio.gather(*(_copy(src, new, version) for src, new, version, _ in mapping))
+    prefix = f"storage://{settings.storage_bucket}/"
+    asset_params = []
+    version_params = []
+    for (_, new_id, _, content_ref), url in zip(mapping, urls):
+        if not url.startswith(prefix):
+            continue
+        new_ref = url[len(prefix):] if content_ref else ""
+        asset_params.append(
+            {"b_asset_id": new_id, "b_metadata": {"storage_url": url}, "content_ref": new_ref}
+        )
+        version_params.append({"b_asset_id": new_id, "content_ref": new_ref})
+    if not asset_params:
+        return
+
+    assets = Asset.__table__
+    versions = AssetVersion.__table__
+    async with session_factory() as db:
+        await db.execute(
+            update(assets)
+            .where(assets.c.id == bindparam("b_asset_id"))
+            .values(
+                metadata_json=merge_jsonb(
+                    assets.c.metadata_json, bindparam("b_metadata", type_=JSONB)
+                )
+            ),
+            asset_params,
+        )
+        await db.execute(
+            update(versions).where(
+                versions.c.asset_id == bindparam("b_asset_id"), versions.c.version_number == 1
+            ),
+            version_params,
+        )
+        await db.commit()
+    await record_write(owner_id, "assets")
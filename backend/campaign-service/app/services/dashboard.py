@@ -0,0 +1,125 @@
+"""Campaign overview assembled in a single database round trip.
+
+One statement returns the campaign row, the owner's balance, the asset
+count, a page of recent assets with their version counts (a lateral count
+per asset, aggregated with ``json_agg``) and the owner's usage totals for a
+trailing window. Results are cached briefly per owner, so repeated
+dashboard renders don't hit the database.
+"""
+
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import JSON, func, literal_column, select, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from common.models import Asset, AssetVersion, Campaign, UsageEvent, User
+
+
+def dashboard_statement(owner_id: str, campaign_id: int, assets_limit: int, usage_days: int):
+    page = (
+        select(
+            Asset.id,
+            Asset.title,
+            Asset.asset_type,
+            Asset.current_version,
+            Asset.updated_at,
+        )
+        .where(Asset.campaign_id == campaign_id, Asset.owner_id == owner_id)
+        .order_by(Asset.updated_at.desc(), Asset.id.desc())
+        .limit(assets_limit)
+        .subquery("page")
+    )
+    version_counts = (
+        select(func.count().label("version_count"))
+        .where(AssetVersion.asset_id == page.c.id)
+        .lateral("version_counts")
+    )
+    assets_json = (
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object(
+                            "id", page.c.id,
+                            "title", page.c.title,
+                            "asset_type", page.c.asset_type,
+                            "current_version", page.c.current_version,
+                            "version_count", version_counts.c.version_count,
+                            "updated_at", page.c.updated_at,
+                        ),
+                        page.c.updated_at.desc(),
+                        page.c.id.desc(),
+                    )
+                ),
+                literal_column("'[]'::json"),
+                type_=JSON,
+            )
+        )
+        .select_from(page.join(version_counts, true()))
+        .scalar_subquery()
+    )
+    asset_count = (
+        select(func.count())
+        .where(Asset.campaign_id == campaign_id, Asset.owner_id == owner_id)
+        .scalar_subquery()
+    )
+    since = datetime.now(timezone.utc) - timedelta(days=usage_days)
+    usage = (
+        select(
+            func.count().label("requests"),
+            func.count().filter(UsageEvent.success.is_(False)).label("failures"),
+            func.coalesce(func.sum(UsageEvent.cost_usd), 0).label("cost_usd"),
+            func.coalesce(func.avg(UsageEvent.latency_ms), 0).label("avg_latency_ms"),
+        )
+        .where(UsageEvent.user_id == owner_id, UsageEvent.created_at >= since)
+        .lateral("usage")
+    )
+    return (
+        select(
+            Campaign,
+            User.credits_balance,
+            asset_count.label("asset_count"),
+            assets_json.label("assets"),
+            usage.c.requests,
+            usage.c.failures,
+            usage.c.cost_usd,
+            usage.c.avg_latency_ms,
+        )
+        .join(User, User.id == Campaign.owner_id)
+        .join(usage, true())
+        .where(Campaign.id == campaign_id, Campaign.owner_id == owner_id)
+    )
+
+
+class DashboardCache:
+    """Short-lived per-owner cache of rendered dashboards, bounded by entry count."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, tuple[float, object]] = OrderedDict()
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value) -> None:
+        if self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_owner(self, owner_id: str) -> None:
+        for key in [k for k in self._entries if k[0] == owner_id]:
+            del self._entries[key]
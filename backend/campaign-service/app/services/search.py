@@ -0,0 +1,135 @@
+"""Ranked full-text search over campaigns and assets.
+
+Matches use the GIN-indexed ``search_vector`` columns; the asset vector is
+built from the full body, including offloaded ones. Pages are
+keyset-paginated on ``(rank, kind, id)``, and ``ts_headline`` snippets are
+only computed for the rows of the returned page. Offloaded bodies are not in
+``assets.content``, so their snippets are computed afterwards from the
+stored body by :func:`offloaded_snippets`.
+"""
+
+import asyncio
+import base64
+import json
+from types import SimpleNamespace
+
+from fastapi import HTTPException
+from sqlalchemy import Float, and_, case, func, literal, select, text, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from common.core.settings import Settings
+from common.models import Asset, Campaign
+from common.utils.content_store import load_content
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=18, MinWords=6, StartSel=<mark>, StopSel=</mark>"
+SEARCH_KINDS = ("all", "campaigns", "assets")
+
+HEADLINES_SQL = text(
+    "SELECT ts_headline('english', b.body, websearch_to_tsquery('english', :q), :options) "
+    "FROM unnest(CAST(:bodies AS text[])) WITH ORDINALITY AS b(body, n) ORDER BY b.n"
+)
+
+
+def encode_cursor(rank: float, kind: str, item_id: int) -> str:
+    raw = json.dumps([rank, kind, item_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[float, str, int]:
+    try:
+        rank, kind, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(rank), str(kind), int(item_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def split_page(rows: list, limit: int) -> tuple[list, str | None]:
+    """Trim the ``limit + 1`` probe row and return the cursor after the last kept row."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.rank, last.kind, last.id)
+
+
+def search_statement(
+    owner_id: str,
+    q: str,
+    kind: str,
+    limit: int,
+    cursor: tuple[float, str, int] | None,
+):
+    query = func.websearch_to_tsquery("english", q)
+    branches = []
+    if kind in ("all", "campaigns"):
+        branches.append(
+            select(
+                literal("campaign").label("kind"),
+                Campaign.id.label("id"),
+                Campaign.id.label("campaign_id"),
+                Campaign.name.label("title"),
+                func.ts_rank_cd(Campaign.search_vector, query).cast(Float).label("rank"),
+            ).where(Campaign.owner_id == owner_id, Campaign.search_vector.op("@@")(query))
+        )
+    if kind in ("all", "assets"):
+        branches.append(
+            select(
+                literal("asset").label("kind"),
+                Asset.id.label("id"),
+                Asset.campaign_id.label("campaign_id"),
+                Asset.title.label("title"),
+                func.ts_rank_cd(Asset.search_vector, query).cast(Float).label("rank"),
+            ).where(Asset.owner_id == owner_id, Asset.search_vector.op("@@")(query))
+        )
+    hits = (union_all(*branches) if len(branches) > 1 else branches[0]).subquery("hits")
+
+    ordering = (hits.c.rank.desc(), hits.c.kind.desc(), hits.c.id.desc())
+    page = select(hits)
+    if cursor is not None:
+        page = page.where(tuple_(hits.c.rank, hits.c.kind, hits.c.id) < tuple_(*cursor))
+    page = page.order_by(*ordering).limit(limit + 1).subquery("page")
+
+    snippet = case(
+        (
+            page.c.kind == "campaign",
+            func.ts_headline(
+                "english", Campaign.goal + " " + Campaign.audience, query, HEADLINE_OPTIONS
+            ),
+        ),
+        else_=func.ts_headline("english", Asset.content, query, HEADLINE_OPTIONS),
+    )
+    return (
+        select(
+            page,
+            func.coalesce(snippet, "").label("snippet"),
+            Asset.content_ref,
+            Asset.content_sha256,
+        )
+        .outerjoin(Campaign, and_(page.c.kind == "campaign", Campaign.id == page.c.id))
+        .outerjoin(Asset, and_(page.c.kind == "asset", Asset.id == page.c.id))
+        .order_by(page.c.rank.desc(), page.c.kind.desc(), page.c.id.desc())
+    )
+
+
+async def offloaded_snippets(
+    db: AsyncSession, rows: list, q: str, settings: Settings
+) -> dict[tuple[str, int], str]:
+    """Snippets for the page's asset hits whose body lives in object storage."""
+    offloaded = [r for r in rows if r.kind == "asset" and r.content_ref]
+    if not offloaded:
+        return {}
+    bodies = await asyncio.gather(
+        *(
+            load_content(
+                SimpleNamespace(
+                    content="", content_ref=r.content_ref, content_sha256=r.content_sha256
+                ),
+                settings,
+            )
+            for r in offloaded
+        )
+    )
+    result = await db.execute(
+        HEADLINES_SQL, {"q": q, "options": HEADLINE_OPTIONS, "bodies": list(bodies)}
+    )
+    return {("asset", r.id): snippet for r, snippet in zip(offloaded, result.scalars())}
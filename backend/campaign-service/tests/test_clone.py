@@ -0,0 +1,86 @@
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+
+from app.services import clone
+from app.services.clone import (
+    _ASSET_COLUMNS,
+    _VERSION_COLUMNS,
+    clone_assets_statement,
+    copy_cloned_objects,
+)
+from common.core.settings import get_settings
+
+
+def _sql():
+    statement = clone_assets_statement(3, 8, "u1")
+    return str(statement.compile(dialect=postgresql.dialect())), statement
+
+
+def test_clone_is_one_statement_writing_assets_and_current_versions():
+    sql, statement = _sql()
+    assert sql.count("INSERT INTO") == 2
+    assert f"INSERT INTO assets ({', '.join(_ASSET_COLUMNS)})" in sql
+    assert f"INSERT INTO asset_versions ({', '.join(_VERSION_COLUMNS)})" in sql
+    # The search vector was built from the full body, which may be offloaded.
+    assert "src.search_vector" in sql
+    # Only each source asset's current version is copied.
+    assert "asset_versions.version_number = src.current_version" in sql
+    assert [c.name for c in statement.selected_columns] == [
+        "src_id",
+        "new_id",
+        "current_version",
+        "content_ref",
+    ]
+
+
+def test_clone_reads_only_the_owners_source_campaign():
+    sql, statement = _sql()
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert "assets.campaign_id = %(campaign_id_1)s AND assets.owner_id = %(owner_id_1)s" in sql
+    assert params["campaign_id_1"] == 3
+    assert params["owner_id_1"] == "u1"
+    assert 8 in params.values()
+
+
+class FakeSession:
+    def __init__(self):
+        self.executed = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement, params=None):
+        self.executed.append((statement, params))
+
+    async def commit(self):
+        pass
+
+
+def test_copy_cloned_objects_records_the_asset_write(monkeypatch):
+    settings = get_settings()
+    writes = []
+
+    async def fake_copy(src, dst, settings):
+        return f"storage://{settings.storage_bucket}/{dst}"
+
+    async def fake_record_write(owner_id, *scopes):
+        writes.append((owner_id, scopes))
+
+    monkeypatch.setattr(clone, "copy_object", fake_copy)
+    monkeypatch.setattr(clone, "record_write", fake_record_write)
+    db = FakeSession()
+    asyncio.run(copy_cloned_objects(lambda: db, "u1", [(3, 30, 2, "u1/asset-3/v2.txt")], settings))
+
+    (_, asset_params), _ = db.executed
+    assert asset_params == [
+        {
+            "b_asset_id": 30,
+            "b_metadata": {"storage_url": f"storage://{settings.storage_bucket}/u1/asset-30/v1.txt"},
+            "content_ref": "u1/asset-30/v1.txt",
+        }
+    ]
+    assert writes == [("u1", ("assets",))]
@@ -0,0 +1,22 @@
+from sqlalchemy.dialects import postgresql
+
+from app.services.dashboard import DashboardCache, dashboard_statement
+
+
+def test_dashboard_statement_is_one_query():
+    sql = str(dashboard_statement("u1", 7, 20, 30).compile(dialect=postgresql.dialect()))
+    assert sql.count("LATERAL") == 2
+    assert "json_agg" in sql
+
+
+def test_dashboard_cache_expires_and_invalidates_per_owner(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.dashboard.time.monotonic", lambda: now[0])
+    cache = DashboardCache(ttl_seconds=5)
+    cache.put(("u1", 1), "a")
+    cache.put(("u2", 1), "b")
+    assert cache.get(("u1", 1)) == "a"
+    cache.invalidate_owner("u1")
+    assert cache.get(("u1", 1)) is None
+    now[0] += 6
+    assert cache.get(("u2", 1)) is None
@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+from app.main import app, load_monitor, settings
+
+
+def _status(client, path):
+    return client.get(path).status_code
+
+
+def test_low_priority_routes_are_shed_first_and_health_always_passes():
+    client = TestClient(app)
+    limit = settings.load_shed_max_in_flight
+    try:
+        load_monitor.in_flight = int(limit * settings.load_shed_low_priority_fraction)
+        response = client.get("/api/v1/search", params={"q": "spring"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(settings.load_shed_retry_after_seconds)
+        assert _status(client, "/api/v1/campaigns") == 401  # reaches auth, not shed
+
+        load_monitor.in_flight = limit
+        assert _status(client, "/api/v1/campaigns") == 503
+        assert _status(client, "/health") == 200
+    finally:
+        load_monitor.in_flight = 0
+
+
+def test_lag_above_critical_sheds_everything():
+    client = TestClient(app)
+    load_monitor.observe(settings.load_shed_critical_lag_ms / 1000 * 2)
+    try:
+        assert _status(client, "/api/v1/campaigns") == 503
+        assert client.get("/health/load").json()["loop_lag_ms"] > 0
+    finally:
+        load_monitor.lag = 0.0
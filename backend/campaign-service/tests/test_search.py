@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.services import search
+from app.services.search import (
+    decode_cursor,
+    encode_cursor,
+    offloaded_snippets,
+    search_statement,
+    split_page,
+)
+from common.core.settings import get_settings
+
+
+def _hit(rank, kind, item_id):
+    return SimpleNamespace(rank=rank, kind=kind, id=item_id)
+
+
+def test_pages_follow_the_keyset_cursor():
+    hits = [_hit(0.9, "campaign", 4), _hit(0.9, "asset", 12), _hit(0.5, "asset", 3)]
+    first, cursor = split_page(hits, 2)
+    assert first == hits[:2]
+    assert decode_cursor(cursor) == (0.9, "asset", 12)
+
+    last, cursor = split_page(hits[2:], 2)
+    assert last == hits[2:]
+    assert cursor is None
+
+
+def test_cursor_becomes_a_row_comparison_after_the_last_hit():
+    statement = search_statement("u1", "spring sale", "all", 20, (0.9, "asset", 12))
+    compiled = statement.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert "(hits.rank, hits.kind, hits.id) < (" in sql
+    assert "ORDER BY hits.rank DESC, hits.kind DESC, hits.id DESC" in sql
+    assert {0.9, "asset", 12, 21} <= set(compiled.params.values())
+
+
+def test_kind_filter_drops_the_other_branch():
+    statement = search_statement("u1", "sale", "assets", 20, None)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "UNION ALL" not in sql
+    assert "campaigns.search_vector @@" not in sql
+
+
+def test_malformed_cursor_is_rejected():
+    assert decode_cursor(encode_cursor(0.25, "campaign", 7)) == (0.25, "campaign", 7)
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor")
+
+
+def test_asset_hits_carry_the_storage_pointer_for_snippets():
+    statement = search_statement("u1", "sale", "assets", 20, None)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "assets.content_ref, assets.content_sha256" in sql
+
+
+def test_offloaded_bodies_get_snippets_from_the_stored_body(monkeypatch):
+    loaded = []
+
+    async def fake_load_content(row, settings):
+        loaded.append(row.content_ref)
+        return "A very long body about the spring sale"
+
+    class FakeSession:
+        async def execute(self, statement, params):
+            self.params = params
+            return SimpleNamespace(scalars=lambda: ["the <mark>spring</mark> <mark>sale</mark>"])
+
+    monkeypatch.setattr(search, "load_content", fake_load_content)
+    rows = [
+        SimpleNamespace(kind="campaign", id=3, content_ref=None, content_sha256=None),
+        SimpleNamespace(kind="asset", id=3, content_ref="", content_sha256=""),
+        SimpleNamespace(kind="asset", id=8, content_ref="u1/asset-8/v2.txt", content_sha256="ab"),
+    ]
+    db = FakeSession()
+    snippets = asyncio.run(offloaded_snippets(db, rows, "spring sale", get_settings()))
+
+    assert snippets == {("asset", 8): "the <mark>spring</mark> <mark>sale</mark>"}
+    assert loaded == ["u1/asset-8/v2.txt"]
+    assert db.params["bodies"] == ["A very long body about the spring sale"]
@@ -11,11 +11,12 @@ class TokenPayload(BaseModel):
     sub: str
     email: str
     exp: int
+    plan: str = "free"
 
 
-def create_access_token(sub: str, email: str, settings: Settings) -> str:
+def create_access_token(sub: str, email: str, settings: Settings, plan: str = "free") -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=settings.jwt_exp_minutes)
-    payload = {"sub": sub, "email": email, "exp": int(expire.timestamp())}
+    payload = {"sub": sub, "email": email, "plan": plan, "exp": int(expire.timestamp())}
     return jwt.encode(payload, settings.secret_key, algorithm=settings.jwt_algorithm)
 
 
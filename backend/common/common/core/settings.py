@@ -15,14 +15,30 @@ class Settings(BaseSettings):
     debug: bool = True
     api_prefix: str = "/api/v1"
     cors_origins: str | list[AnyHttpUrl | str] = "http://localhost:3000"
+    admin_emails: str | list[str] = ""
+    paid_plans: str | list[str] = "pro,team"
+    # How long the AI scheduler trusts a cached users.plan before re-reading it.
+    plan_cache_ttl_seconds: float = 30.0
     secret_key: str  # REQUIRED – no default; set SECRET_KEY env var
     jwt_algorithm: str = "HS256"
     jwt_exp_minutes: int = 60 * 24
     supabase_db_url: str
+    supabase_replica_db_url: str = ""
+    replica_pin_seconds: int = 5
+    replica_max_lag_seconds: float = 2.0
+    replica_lag_check_seconds: float = 5.0
     supabase_url: str = "https://example.supabase.co"
     supabase_anon_key: str = "dummy"
     supabase_service_role_key: str = "dummy"
     google_client_id: str = "dummy"
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100
+    db_pgbouncer_transaction_mode: bool = False
+    db_warmup_connections: int = 2
     redis_url: str = "redis://localhost:6379/0"
     llm_provider: str = "deepseek"
     huggingface_api_key: str = ""
@@ -31,7 +47,47 @@ class Settings(BaseSettings):
     deepseek_model: str = "deepseek-chat"
     runpod_api_key: str = ""
     runpod_sdxl_endpoint: str = ""
+    sdxl_model: str = "sdxl-1.0"
+    image_cache_ttl_seconds: int = 24 * 3600
+    image_cache_max_entries: int = 50_000
+    image_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    image_cache_hit_credits: int = 1
     storage_bucket: str = "assets"
+    signed_url_cache_size: int = 2048
+    signed_url_margin_seconds: int = 60
+    content_offload_threshold_bytes: int = 16 * 1024
+    content_cache_max_bytes: int = 32 * 1024 * 1024
+    bulk_upload_concurrency: int = 8
+    similarity_max_owners: int = 256
+    similarity_load_concurrency: int = 8
+    suggestion_rules_path: str = ""
+    cpu_pool_workers: int = 2
+    provider_global_concurrency: int = 16
+    deepseek_max_concurrency: int = 8
+    huggingface_max_concurrency: int = 4
+    runpod_max_concurrency: int = 4
+    provider_queue_max_depth: int = 256
+    provider_queue_max_wait_seconds: float = 20.0
+    dashboard_cache_seconds: float = 5.0
+    credit_grant_chunk_size: int = 5000
+    reconcile_batch_size: int = 500
+    # Fraction of wall time the reconciler may keep the database busy.
+    reconcile_load_budget: float = 0.1
+    partition_months_ahead: int = 3
+    usage_retention_months: int = 13
+    partition_archive_schema: str = "archive"
+    load_shed_enabled: bool = True
+    load_shed_lag_ms: float = 150.0
+    load_shed_critical_lag_ms: float = 750.0
+    load_shed_max_in_flight: int = 512
+    # Share of load_shed_max_in_flight above which low-priority routes are shed.
+    load_shed_low_priority_fraction: float = 0.6
+    load_shed_sample_interval_ms: float = 50.0
+    load_shed_retry_after_seconds: int = 2
+    stall_profiler_enabled: bool = False
+    stall_threshold_ms: float = 100.0
+    stall_sample_interval_ms: float = 20.0
+    stall_stack_limit: int = 30
     log_level: str = "INFO"
 
     model_config = SettingsConfigDict(
@@ -40,7 +96,7 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
-    @field_validator("cors_origins", mode="before")
+    @field_validator("cors_origins", "admin_emails", "paid_plans", mode="before")
     @classmethod
     def parse_cors_origins(cls, value: str | list[str]) -> list[str]:
         if isinstance(value, str):
@@ -0,0 +1,193 @@
+"""Opt-in detector for synchronous work that stalls the event loop.
+
+A heartbeat task on the loop wakes every ``stall_sample_interval_ms`` and
+measures how late it woke. A watchdog thread checks the heartbeat from
+outside the loop. Once the loop is more than ``stall_threshold_ms`` behind,
+the watchdog captures the loop thread's stack, which is still inside the
+blocking call, and the request whose task is running at that moment. When
+the loop recovers, the heartbeat logs ``event_loop_stall`` with the
+duration, route template, handler and stack, and counts it per route.
+
+This gives the same signal as asyncio debug mode's slow-callback warnings.
+Debug mode slows every callback, though, and it reports the handle, not the
+route. Stalls shorter than the threshold, or blocking code in tasks not
+started by a request, are logged with ``route="-"``.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI
+
+from common.core.logging import get_logger
+from common.core.settings import Settings
+
+logger = get_logger("stall-profiler")
+
+UNATTRIBUTED = "-"
+
+
+@dataclass
+class StallCapture:
+    route: str
+    handler: str
+    stack: list[str]
+
+
+@dataclass
+class RouteStalls:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    handlers: set[str] = field(default_factory=set)
+
+
+class StallProfiler:
+    def __init__(self, threshold: float = 0.1, interval: float = 0.02, stack_limit: int = 30):
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+        self.stalls: dict[str, RouteStalls] = {}
+        self._requests: dict[asyncio.Task, dict] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._last_beat = 0.0
+        self._capture: StallCapture | None = None
+        self._heartbeat: asyncio.Task | None = None
+        self._stopping = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._heartbeat is not None and not self._heartbeat.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping = threading.Event()
+        self._heartbeat = self._loop.create_task(self._beat())
+        threading.Thread(
+            target=self._watch, args=(self._stopping,), name="stall-watchdog", daemon=True
+        ).start()
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._heartbeat:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+
+    def track(self, scope: dict) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._requests[task] = scope
+
+    def untrack(self) -> None:
+        self._requests.pop(asyncio.current_task(), None)
+
+    async def _beat(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            stalled = now - self._last_beat - self.interval
+            self._last_beat = now
+            capture, self._capture = self._capture, None
+            if stalled >= self.threshold:
+                self.record(stalled, capture)
+
+    def _watch(self, stopping: threading.Event) -> None:
+        while not stopping.wait(self.interval):
+            behind = time.monotonic() - self._last_beat - self.interval
+            if behind >= self.threshold and self._capture is None:
+                self._capture = self.capture()
+
+    def capture(self) -> StallCapture:
+        """Snapshot the loop thread's stack and the request it is serving."""
+        frame = sys._current_frames().get(self._loop_thread)
+        stack = traceback.format_stack(frame, self.stack_limit) if frame else []
+        task = asyncio.current_task(self._loop)
+        scope = self._requests.get(task) if task is not None else None
+        if scope is None:
+            return StallCapture(UNATTRIBUTED, UNATTRIBUTED, stack)
+        route = scope.get("route")
+        endpoint = scope.get("endpoint")
+        path = getattr(route, "path", None) or scope["path"]
+        return StallCapture(
+            route=f"{scope['method']} {path}",
+            handler=(
+                f"{endpoint.__module__}.{endpoint.__qualname__}" if endpoint else UNATTRIBUTED
+            ),
+            stack=stack,
+        )
+
+    def record(self, seconds: float, capture: StallCapture | None) -> None:
+        capture = capture or StallCapture(UNATTRIBUTED, UNATTRIBUTED, [])
+        stall_ms = seconds * 1000
+        stats = self.stalls.setdefault(capture.route, RouteStalls())
+        stats.count += 1
+        stats.total_ms += stall_ms
+        stats.max_ms = max(stats.max_ms, stall_ms)
+        stats.handlers.add(capture.handler)
+        logger.warning(
+            "event_loop_stall",
+            stall_ms=round(stall_ms, 1),
+            route=capture.route,
+            handler=capture.handler,
+            stack="".join(capture.stack),
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": self.running,
+            "threshold_ms": self.threshold * 1000,
+            "routes": {
+                route: {
+                    "count": stats.count,
+                    "total_ms": round(stats.total_ms, 1),
+                    "max_ms": round(stats.max_ms, 1),
+                    "handlers": sorted(stats.handlers),
+                }
+                for route, stats in sorted(
+                    self.stalls.items(), key=lambda item: item[1].total_ms, reverse=True
+                )
+            },
+        }
+
+
+class StallTrackingMiddleware:
+    def __init__(self, app, profiler: StallProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.profiler.track(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.untrack()
+
+
+def install_stall_profiler(app: FastAPI, settings: Settings) -> StallProfiler:
+    """Attach the profiler to ``app`` when ``stall_profiler_enabled`` is set.
+
+    The returned profiler's ``snapshot()`` reports per-route counts (and
+    ``enabled: false`` when it is off).
+    """
+    profiler = StallProfiler(
+        threshold=settings.stall_threshold_ms / 1000,
+        interval=settings.stall_sample_interval_ms / 1000,
+        stack_limit=settings.stall_stack_limit,
+    )
+    if settings.stall_profiler_enabled:
+        app.add_middleware(StallTrackingMiddleware, profiler=profiler)
+        app.add_event_handler("startup", profiler.start)
+        app.add_event_handler("shutdown", profiler.stop)
+    return profiler
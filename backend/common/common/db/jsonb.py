@@ -0,0 +1,36 @@
+"""Partial updates of JSONB columns.
+
+Writing a whole document back from Python loses keys that another writer
+set in the meantime (the image pipeline and the storage upload both touch
+``Asset.metadata_json``). These helpers build the update in SQL, so only the
+keys being written change and no row has to be read first.
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import ColumnElement, Text, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+
+def _jsonb(value: Any) -> ColumnElement:
+    return value if isinstance(value, ColumnElement) else literal(value, JSONB)
+
+
+def merge_jsonb(column: Any, patch: Any) -> ColumnElement:
+    """``column || patch``: top-level keys of ``patch`` replace those in ``column``.
+
+    ``patch`` is a dict or a JSONB bind parameter (for executemany updates).
+    """
+    return column.op("||", return_type=JSONB)(_jsonb(patch))
+
+
+def set_jsonb_path(column: Any, path: Sequence[str], value: Any) -> ColumnElement:
+    """``jsonb_set`` of one (possibly nested) key, creating it when missing."""
+    return func.jsonb_set(
+        column,
+        literal(list(path), ARRAY(Text)),
+        _jsonb(value),
+        True,
+        type_=JSONB,
+    )
@@ -0,0 +1,184 @@
+"""Monthly range partitions for the append-only accounting tables.
+
+``usage_events`` and ``credit_ledger`` are partitioned by ``created_at``
+(migration 0006). Each month is a ``<table>_pYYYYMM`` partition. A DEFAULT
+partition catches rows if maintenance falls behind. ``ensure_partitions``
+creates upcoming months ahead of time; rows that already landed in the
+DEFAULT partition for such a month are moved into the new partition in the
+same statement, since Postgres refuses to create it otherwise.
+``detach_expired`` retires whole months by detaching them and moving them to
+the archive schema, so retention never runs a ``DELETE`` or leaves dead
+tuples behind.
+
+``DETACH ... CONCURRENTLY`` is not allowed while a DEFAULT partition exists,
+so partitions are detached with a plain ``DETACH`` under ``lock_timeout``.
+Each change is one ``DO`` block that commits on its own; callers pass an
+AUTOCOMMIT connection.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from common.db.session import get_engine
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("usage_events", "credit_ledger")
+
+# Detach and attach briefly lock the parent; give up rather than queue writers behind us.
+LOCK_TIMEOUT = "5s"
+
+PARTITION_BOUNDS_SQL = text(
+    "SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound "
+    "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+    "WHERE i.inhparent = CAST(:table AS regclass)"
+)
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    # Exclusive upper bound; None for the DEFAULT partition.
+    upper: date | None
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def create_partition_sql(table: str, month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def attach_from_default_sql(table: str, default: str, month: date) -> str:
+    """Create ``month``'s partition from the rows the DEFAULT partition holds for it."""
+    name = partition_name(table, month)
+    lower, upper = month.isoformat(), add_months(month, 1).isoformat()
+    return f"""
+        DO $$
+        BEGIN
+            PERFORM set_config('lock_timeout', '{LOCK_TIMEOUT}', true);
+            CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS);
+            WITH moved AS (
+                DELETE FROM {default}
+                WHERE created_at >= '{lower}' AND created_at < '{upper}'
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved;
+            ALTER TABLE {table} ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}');
+        END
+        $$
+    """
+
+
+def retire_partition_sql(table: str, name: str, archive_schema: str) -> str:
+    retire = (
+        f"ALTER TABLE {name} SET SCHEMA {archive_schema}" if archive_schema else f"DROP TABLE {name}"
+    )
+    return f"""
+        DO $$
+        BEGIN
+            PERFORM set_config('lock_timeout', '{LOCK_TIMEOUT}', true);
+            ALTER TABLE {table} DETACH PARTITION {name};
+            {retire};
+        END
+        $$
+    """
+
+
+def parse_upper_bound(bound: str) -> date | None:
+    """Exclusive upper bound of ``FOR VALUES FROM (...) TO ('2026-11-01 00:00:00')``."""
+    if bound == "DEFAULT":
+        return None
+    upper = bound.rsplit(" TO (", 1)[1]
+    return date.fromisoformat(upper.strip("()'")[:10])
+
+
+async def list_partitions(conn: AsyncConnection, table: str) -> list[Partition]:
+    rows = (await conn.execute(PARTITION_BOUNDS_SQL, {"table": table})).all()
+    return [Partition(row.name, parse_upper_bound(row.bound)) for row in rows]
+
+
+async def ensure_partitions(
+    conn: AsyncConnection, table: str, months_ahead: int, today: date | None = None
+) -> list[str]:
+    """Create the current month's partition and ``months_ahead`` after it; returns new names."""
+    current = month_start(today or date.today())
+    partitions = await list_partitions(conn, table)
+    covered = [p.upper for p in partitions if p.upper is not None]
+    default = next((p.name for p in partitions if p.upper is None), None)
+    month = max([current, *covered])
+    created = []
+    while month <= add_months(current, months_ahead):
+        if default and await _default_has_rows(conn, default, month):
+            await conn.execute(text(attach_from_default_sql(table, default, month)))
+        else:
+            await conn.execute(text(create_partition_sql(table, month)))
+        created.append(partition_name(table, month))
+        month = add_months(month, 1)
+    if created:
+        logger.info("Created partitions %s", ", ".join(created))
+    return created
+
+
+async def _default_has_rows(conn: AsyncConnection, default: str, month: date) -> bool:
+    result = await conn.execute(
+        text(
+            f"SELECT EXISTS (SELECT 1 FROM {default} "
+            "WHERE created_at >= :lower AND created_at < :upper)"
+        ),
+        {"lower": month, "upper": add_months(month, 1)},
+    )
+    return bool(result.scalar())
+
+
+async def detach_expired(
+    conn: AsyncConnection,
+    table: str,
+    retention_months: int,
+    archive_schema: str,
+    today: date | None = None,
+) -> list[str]:
+    """Detach partitions that end before the retention window and move them to ``archive_schema``.
+
+    With an empty ``archive_schema`` the detached partitions are dropped instead.
+    """
+    cutoff = add_months(month_start(today or date.today()), -retention_months)
+    expired = [
+        p.name
+        for p in await list_partitions(conn, table)
+        if p.upper is not None and p.upper <= cutoff
+    ]
+    if expired and archive_schema:
+        await conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+    for name in expired:
+        await conn.execute(text(retire_partition_sql(table, name, archive_schema)))
+        logger.info("Retired partition %s of %s", name, table)
+    return expired
+
+
+async def ensure_upcoming_partitions(database_url: str, months_ahead: int) -> None:
+    """Startup hook: make sure upcoming months exist. Failures are logged, never raised."""
+    try:
+        async with get_engine(database_url).connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for table in PARTITIONED_TABLES:
+                await ensure_partitions(conn, table, months_ahead)
+    except (OSError, exc.SQLAlchemyError) as err:
+        logger.warning("Partition maintenance skipped: %s", err)
@@ -0,0 +1,55 @@
+"""Core read path for list endpoints.
+
+``scalars().all()`` builds a full ORM instance for every row, with
+identity-map entries and attribute state, only to throw it away after
+serialization. These helpers select just the columns an output schema
+declares and validate the ``Row`` mappings directly into that schema.
+"""
+
+from collections.abc import Iterable, Mapping
+from typing import Any, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import Select, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+def schema_columns(schema: type[BaseModel], entity: Any, *extra: str) -> list:
+    """Columns of ``entity`` for every field of ``schema``, plus ``extra`` column names."""
+    mapper_columns = inspect(entity).columns
+    missing = [name for name in (*schema.model_fields, *extra) if name not in mapper_columns]
+    if missing:
+        raise ValueError(f"{entity.__name__} has no columns for {missing}")
+    return [getattr(entity, name) for name in (*schema.model_fields, *extra)]
+
+
+def select_schema(schema: type[BaseModel], entity: Any, *extra: str) -> Select:
+    return select(*schema_columns(schema, entity, *extra))
+
+
+def to_schema(schema: type[SchemaT], rows: Iterable[Mapping[str, Any]]) -> list[SchemaT]:
+    """Validate row mappings (or plain dicts) into ``schema``; extra keys are ignored."""
+    validate = schema.model_validate
+    return [validate(row) for row in rows]
+
+
+async def fetch_mappings(db: AsyncSession, statement: Select) -> list[Mapping[str, Any]]:
+    result = await db.execute(statement)
+    return result.mappings().all()
+
+
+async def fetch_schema(db: AsyncSession, statement: Select, schema: type[SchemaT]) -> list[SchemaT]:
+    return to_schema(schema, await fetch_mappings(db, statement))
+
+
+async def count_rows(db: AsyncSession, statement: Select) -> int:
+    """Row count of ``statement`` with its ordering and columns stripped."""
+    counted = statement.order_by(None).with_only_columns(func.count(), maintain_column_froms=True)
+    result = await db.execute(counted)
+    return result.scalar() or 0
+
+
+def paginate(statement: Select, page: int, limit: int) -> Select:
+    return statement.offset((page - 1) * limit).limit(limit)
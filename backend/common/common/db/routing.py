@@ -0,0 +1,140 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+When ``supabase_replica_db_url`` is set, ``ReadRouter.session`` hands
+read-only endpoints a session on the replica. Writes keep using the primary
+session factory. Each write calls ``record_write``, which pins the owner to
+the primary for ``replica_pin_seconds`` (a Redis key) so their next reads
+see what they just wrote. The replica is skipped in these cases:
+
+- it is lagging by more than ``replica_max_lag_seconds``, checked at most
+  every ``replica_lag_check_seconds``
+- connecting to it fails
+- Redis can't say whether the owner is pinned
+
+Keep the pin longer than the allowed lag. Otherwise a read after the pin
+expires could pair a fresh ETag with stale replica rows.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+
+from redis.asyncio import Redis, from_url
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from common.core.settings import Settings, get_settings
+from common.db.session import build_session_factory
+from common.utils.etag import bump_change_counters
+
+logger = logging.getLogger(__name__)
+
+PIN_PREFIX = "replica:pin:"
+# Zero when every received WAL record has been replayed, else the age of the last replayed one.
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+_redis: Redis | None = None
+
+
+def get_pin_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = from_url(get_settings().redis_url, decode_responses=True, socket_timeout=0.5)
+    return _redis
+
+
+async def record_write(owner_id: str, *scopes: str) -> None:
+    """Call after committing a write: pins reads to the primary and bumps ETag counters."""
+    await record_writes([owner_id], *scopes)
+
+
+async def record_writes(owner_ids: Sequence[str], *scopes: str) -> None:
+    """``record_write`` for a set-based write that touched many owners."""
+    settings = get_settings()
+    if settings.supabase_replica_db_url and owner_ids:
+        try:
+            async with get_pin_redis().pipeline(transaction=False) as pipe:
+                for owner_id in owner_ids:
+                    pipe.set(f"{PIN_PREFIX}{owner_id}", 1, ex=settings.replica_pin_seconds)
+                await pipe.execute()
+        except RedisError as exc:
+            logger.warning("Replica pin failed for %d owners: %s", len(owner_ids), exc)
+    if scopes:
+        await bump_change_counters(owner_ids, *scopes)
+
+
+class ReadRouter:
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.primary = build_session_factory(settings.supabase_db_url)
+        self.replica: async_sessionmaker[AsyncSession] | None = (
+            build_session_factory(settings.supabase_replica_db_url)
+            if settings.supabase_replica_db_url
+            else None
+        )
+        self._replica_ok = True
+        self._checked_at = float("-inf")
+        self._check_lock = asyncio.Lock()
+
+    async def _pinned(self, owner_id: str) -> bool:
+        try:
+            return bool(await get_pin_redis().exists(f"{PIN_PREFIX}{owner_id}"))
+        except RedisError:
+            return True
+
+    async def _replica_healthy(self) -> bool:
+        if time.monotonic() - self._checked_at < self.settings.replica_lag_check_seconds:
+            return self._replica_ok
+        async with self._check_lock:
+            if time.monotonic() - self._checked_at >= self.settings.replica_lag_check_seconds:
+                self._replica_ok = await self._check_replica()
+                self._checked_at = time.monotonic()
+        return self._replica_ok
+
+    async def _check_replica(self) -> bool:
+        try:
+            async with self.replica() as db:
+                lag = float((await db.execute(REPLICA_LAG_SQL)).scalar() or 0)
+        except (OSError, DBAPIError) as exc:
+            logger.warning("Replica unavailable, reading from primary: %s", exc)
+            return False
+        if lag > self.settings.replica_max_lag_seconds:
+            logger.warning("Replica lag %.1fs over limit, reading from primary", lag)
+            return False
+        return True
+
+    def _mark_down(self, exc: Exception) -> None:
+        logger.warning("Replica connection failed, reading from primary: %s", exc)
+        self._replica_ok = False
+        self._checked_at = time.monotonic()
+
+    async def use_replica(self, owner_id: str) -> bool:
+        if self.replica is None:
+            return False
+        if not await self._replica_healthy():
+            return False
+        return not await self._pinned(owner_id)
+
+    @asynccontextmanager
+    async def session(self, owner_id: str) -> AsyncIterator[AsyncSession]:
+        """Session for read-only work on behalf of ``owner_id``."""
+        session = None
+        if await self.use_replica(owner_id):
+            session = self.replica()
+            try:
+                await session.connection()
+            except (OSError, DBAPIError) as exc:
+                await session.close()
+                self._mark_down(exc)
+                session = None
+        if session is None:
+            session = self.primary()
+        async with session:
+            yield session
@@ -0,0 +1,41 @@
+"""Full-text search vectors maintained by the application.
+
+``assets.search_vector`` cannot be a generated column: bodies above
+``content_offload_threshold_bytes`` live in object storage and the
+``content`` column is empty for them. Every write that sets an asset's body
+also sets its vector from the full body, in the same statement, with the
+weighting that ``ASSET_SEARCH_VECTOR`` in ``common.models.entities`` documents
+(title ``A``, body ``B``).
+"""
+
+from typing import Any
+
+from sqlalchemy import ColumnElement, Text, bindparam, func, literal, literal_column, update
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from common.models import Asset
+
+_CONFIG = literal_column("'english'::regconfig")
+
+
+def _text(value: Any) -> ColumnElement:
+    return literal(value, Text) if value is None or isinstance(value, str) else value
+
+
+def asset_search_vector(title: Any, body: Any) -> ColumnElement:
+    """``setweight(title, 'A') || setweight(body, 'B')``; values or SQL expressions."""
+    title_vector = func.setweight(func.to_tsvector(_CONFIG, func.coalesce(_text(title), "")), "A")
+    body_vector = func.setweight(func.to_tsvector(_CONFIG, func.coalesce(_text(body), "")), "B")
+    return title_vector.op("||", return_type=TSVECTOR)(body_vector)
+
+
+def refresh_search_vectors_statement():
+    """Executemany UPDATE over ``{"b_asset_id", "b_body"}`` rows; the title comes from the row."""
+    assets = Asset.__table__
+    return (
+        update(assets)
+        .where(assets.c.id == bindparam("b_asset_id"))
+        .values(
+            search_vector=asset_search_vector(assets.c.title, bindparam("b_body", type_=Text))
+        )
+    )
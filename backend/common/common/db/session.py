@@ -1,10 +1,152 @@
+"""Process-wide async engine registry.
+
+Every ``build_session_factory`` call for the same URL shares one engine and
+one pool. Pool sizing, recycling and the asyncpg statement caches come from
+``Settings``. With ``db_pgbouncer_transaction_mode`` both prepared-statement
+caches are turned off and statements get unique names, which is what
+PgBouncer in transaction pooling mode requires. Each pool counts its
+checkouts and the time spent acquiring a connection, which includes
+waiting for a free slot and opening new connections.
+"""
+
+import asyncio
+import logging
+import time
 from collections.abc import AsyncGenerator
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass
+from uuid import uuid4
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from common.core.settings import Settings, get_settings, mask_db_url
+
+logger = logging.getLogger(__name__)
+
+_engines: dict[str, AsyncEngine] = {}
+_session_factories: dict[str, async_sessionmaker[AsyncSession]] = {}
+
+
+@dataclass
+class PoolStats:
+    checkouts: int = 0
+    timeouts: int = 0
+    acquire_ms_total: float = 0.0
+    acquire_ms_max: float = 0.0
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each connection checkout took."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats.checkouts += 1
+        self.stats.acquire_ms_total += elapsed_ms
+        self.stats.acquire_ms_max = max(self.stats.acquire_ms_max, elapsed_ms)
+        return connection
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options(database_url: str, settings: Settings) -> dict:
+    options: dict = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if make_url(database_url).get_backend_name() != "postgresql":
+        return options
+    connect_args: dict = {
+        "prepared_statement_cache_size": settings.db_statement_cache_size,
+        "statement_cache_size": settings.db_statement_cache_size,
+    }
+    if settings.db_pgbouncer_transaction_mode:
+        connect_args.update(
+            prepared_statement_cache_size=0,
+            statement_cache_size=0,
+            prepared_statement_name_func=_unique_statement_name,
+        )
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args,
+    )
+    return options
+
+
+def get_engine(database_url: str, settings: Settings | None = None) -> AsyncEngine:
+    engine = _engines.get(database_url)
+    if engine is None:
+        options = engine_options(database_url, settings or get_settings())
+        engine = create_async_engine(database_url, **options)
+        _engines[database_url] = engine
+    return engine
 
 
 def build_session_factory(database_url: str) -> async_sessionmaker[AsyncSession]:
-    engine = create_async_engine(database_url, pool_pre_ping=True)
-    return async_sessionmaker(engine, expire_on_commit=False)
+    factory = _session_factories.get(database_url)
+    if factory is None:
+        factory = async_sessionmaker(get_engine(database_url), expire_on_commit=False)
+        _session_factories[database_url] = factory
+    return factory
+
+
+def pool_metrics() -> list[dict]:
+    metrics = []
+    for url, engine in _engines.items():
+        pool = engine.pool
+        entry = {"database": mask_db_url(url), "status": pool.status()}
+        if isinstance(pool, InstrumentedQueuePool):
+            entry.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=pool.overflow(),
+                **asdict(pool.stats),
+            )
+        metrics.append(entry)
+    return metrics
+
+
+async def warm_up_engine(database_url: str, connections: int, timeout: float = 10.0) -> int:
+    """Open ``connections`` pooled connections up front; returns how many succeeded."""
+    engine = get_engine(database_url)
+    opened = 0
+    try:
+        async with AsyncExitStack() as stack:
+            async with asyncio.timeout(timeout):
+                for _ in range(connections):
+                    conn = await stack.enter_async_context(engine.connect())
+                    await conn.execute(text("SELECT 1"))
+                    opened += 1
+    except (OSError, TimeoutError, exc.SQLAlchemyError) as err:
+        logger.warning("Database warm-up stopped after %d connections: %s", opened, err)
+    return opened
+
+
+async def dispose_engines() -> None:
+    # Disposal only closes pooled connections; a later checkout reopens them.
+    for engine in _engines.values():
+        await engine.dispose()
 
 
 async def get_db(
@@ -12,4 +154,3 @@ async def get_db(
 ) -> AsyncGenerator[AsyncSession, None]:
     async with session_factory() as session:
         yield session
-
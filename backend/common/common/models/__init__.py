@@ -6,6 +6,8 @@ from common.models.entities import (
     CreditLedger,
     UsageEvent,
     CampaignStatus,
+    CreditBalanceCheck,
+    JobCheckpoint,
 )
 
 __all__ = [
@@ -16,4 +18,6 @@ __all__ = [
     "CreditLedger",
     "UsageEvent",
     "CampaignStatus",
+    "CreditBalanceCheck",
+    "JobCheckpoint",
 ]
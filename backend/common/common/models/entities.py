@@ -3,13 +3,18 @@ from enum import Enum as PyEnum
 from sqlalchemy import (
     String,
     Integer,
+    BigInteger,
     DateTime,
     ForeignKey,
     Text,
     Boolean,
     Numeric,
     Enum,
+    Computed,
+    Index,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from common.db.base import Base
 
@@ -21,6 +26,25 @@ class CampaignStatus(str, PyEnum):
     completed = "completed"
 
 
+CAMPAIGN_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(goal, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(audience, '')), 'C')"
+)
+# Since migration 0009 assets.search_vector is written by the application from the
+# full body (offloaded bodies are not in ``content``); see common.db.search.
+ASSET_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')"
+)
+# Assets whose body has not reached storage yet; the partial index uses the same predicate.
+ASSET_STORAGE_PENDING = "coalesce(metadata_json ->> 'storage_url', '') = ''"
+
+
+# Balance every new user starts with; it has no ledger row.
+INITIAL_CREDITS = 100
+
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -37,7 +61,8 @@ class User(Base, TimestampMixin):
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     email: Mapped[str] = mapped_column(String(255), unique=True, index=True)
     name: Mapped[str] = mapped_column(String(255), default="")
-    credits_balance: Mapped[int] = mapped_column(Integer, default=100)
+    credits_balance: Mapped[int] = mapped_column(Integer, default=INITIAL_CREDITS)
+    plan: Mapped[str] = mapped_column(String(32), default="free")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
 
     campaigns: Mapped[list["Campaign"]] = relationship(back_populates="owner")
@@ -53,6 +78,9 @@ class Campaign(Base, TimestampMixin):
     status: Mapped[str] = mapped_column(
         String(50), default=CampaignStatus.draft.value
     )
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR, Computed(CAMPAIGN_SEARCH_VECTOR, persisted=True), deferred=True
+    )
 
     owner: Mapped["User"] = relationship(back_populates="campaigns")
     assets: Mapped[list["Asset"]] = relationship(back_populates="campaign")
@@ -60,14 +88,26 @@ class Campaign(Base, TimestampMixin):
 
 class Asset(Base, TimestampMixin):
     __tablename__ = "assets"
+    __table_args__ = (
+        Index("ix_assets_metadata", "metadata_json", postgresql_using="gin"),
+        Index(
+            "ix_assets_owner_storage_pending",
+            "owner_id",
+            postgresql_where=text(ASSET_STORAGE_PENDING),
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     campaign_id: Mapped[int] = mapped_column(ForeignKey("campaigns.id"), index=True)
     owner_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True)
     asset_type: Mapped[str] = mapped_column(String(50))
     title: Mapped[str] = mapped_column(String(255))
     content: Mapped[str] = mapped_column(Text, default="")
-    metadata_json: Mapped[str] = mapped_column(Text, default="{}")
+    content_ref: Mapped[str] = mapped_column(String(512), default="")
+    content_size: Mapped[int] = mapped_column(Integer, default=0)
+    content_sha256: Mapped[str] = mapped_column(String(64), default="")
+    metadata_json: Mapped[dict] = mapped_column(JSONB, default=dict)
     current_version: Mapped[int] = mapped_column(Integer, default=1)
+    search_vector: Mapped[str | None] = mapped_column(TSVECTOR, nullable=True, deferred=True)
 
     campaign: Mapped["Campaign"] = relationship(back_populates="assets")
     versions: Mapped[list["AssetVersion"]] = relationship(back_populates="asset")
@@ -75,10 +115,19 @@ class Asset(Base, TimestampMixin):
 
 class AssetVersion(Base, TimestampMixin):
     __tablename__ = "asset_versions"
+    __table_args__ = (
+        Index("ix_asset_versions_asset_version", "asset_id", "version_number", unique=True),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id"), index=True)
+    asset_id: Mapped[int] = mapped_column(ForeignKey("assets.id"))
+    # Copied from the parent asset so ownership checks and RLS need no join.
+    owner_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True)
+    campaign_id: Mapped[int] = mapped_column(ForeignKey("campaigns.id"))
     version_number: Mapped[int] = mapped_column(Integer)
     content: Mapped[str] = mapped_column(Text)
+    content_ref: Mapped[str] = mapped_column(String(512), default="")
+    content_size: Mapped[int] = mapped_column(Integer, default=0)
+    content_sha256: Mapped[str] = mapped_column(String(64), default="")
     change_note: Mapped[str] = mapped_column(String(255), default="")
 
     asset: Mapped["Asset"] = relationship(back_populates="versions")
@@ -86,21 +135,61 @@ class AssetVersion(Base, TimestampMixin):
 
 class CreditLedger(Base):
     __tablename__ = "credit_ledger"
+    # Monthly range partitions on created_at; see common.db.partitions.
+    __table_args__ = (
+        Index("ix_credit_ledger_user_created", "user_id", "created_at"),
+        Index("ix_credit_ledger_created_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"))
     delta: Mapped[int] = mapped_column(Integer)
     reason: Mapped[str] = mapped_column(String(120))
     reference_id: Mapped[str] = mapped_column(String(120), default="")
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, default=_utcnow
+    )
 
 
 class UsageEvent(Base):
     __tablename__ = "usage_events"
+    # Monthly range partitions on created_at; see common.db.partitions.
+    __table_args__ = (
+        Index("ix_usage_events_user_created", "user_id", "created_at"),
+        Index("ix_usage_events_created_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), index=True)
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"))
     service: Mapped[str] = mapped_column(String(80))
     endpoint: Mapped[str] = mapped_column(String(120))
     latency_ms: Mapped[int] = mapped_column(Integer, default=0)
     success: Mapped[bool] = mapped_column(Boolean, default=True)
     cost_usd: Mapped[float] = mapped_column(Numeric(10, 4), default=0.0)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+    queue_wait_ms: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True, default=_utcnow
+    )
+
+
+class CreditBalanceCheck(Base):
+    __tablename__ = "credit_balance_checks"
+    __table_args__ = (
+        Index("ix_credit_balance_checks_drift", "user_id", postgresql_where=text("drift <> 0")),
+    )
+    # Ledger rows up to last_ledger_id are folded into ledger_sum; see the billing reconciler.
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    ledger_sum: Mapped[int] = mapped_column(BigInteger, default=0)
+    last_ledger_id: Mapped[int] = mapped_column(BigInteger, default=0)
+    last_ledger_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    drift: Mapped[int] = mapped_column(BigInteger, default=0)
+    checked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
+
+
+class JobCheckpoint(Base):
+    __tablename__ = "job_checkpoints"
+    name: Mapped[str] = mapped_column(String(80), primary_key=True)
+    cursor: Mapped[str] = mapped_column(String(255), default="")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=_utcnow, onupdate=_utcnow
+    )
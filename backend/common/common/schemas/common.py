@@ -39,6 +39,15 @@ class CampaignOut(CampaignCreate):
     updated_at: datetime
 
 
+class CampaignCloneRequest(BaseModel):
+    name: str | None = Field(default=None, min_length=3, max_length=255)
+    copy_storage: bool = False
+
+
+class CampaignCloneOut(CampaignOut):
+    assets_cloned: int
+
+
 class PaginatedCampaignOut(BaseModel):
     items: list[CampaignOut]
     total: int
@@ -46,6 +55,45 @@ class PaginatedCampaignOut(BaseModel):
     limit: int
 
 
+class DashboardAssetOut(BaseModel):
+    id: int
+    title: str
+    asset_type: str
+    current_version: int
+    version_count: int
+    updated_at: datetime
+
+
+class DashboardUsageOut(BaseModel):
+    window_days: int
+    requests: int
+    failures: int
+    cost_usd: float
+    avg_latency_ms: float
+
+
+class CampaignDashboardOut(BaseModel):
+    campaign: CampaignOut
+    credits_balance: int
+    asset_count: int
+    assets: list[DashboardAssetOut]
+    usage: DashboardUsageOut
+
+
+class SearchHit(BaseModel):
+    kind: str
+    id: int
+    campaign_id: int
+    title: str
+    rank: float
+    snippet: str
+
+
+class SearchOut(BaseModel):
+    items: list[SearchHit]
+    next_cursor: str | None = None
+
+
 class AssetCreate(BaseModel):
     campaign_id: int
     asset_type: str
@@ -58,6 +106,30 @@ class AssetUpdate(BaseModel):
     change_note: str = "manual_edit"
 
 
+class AssetBulkUpdateItem(AssetUpdate):
+    asset_id: int
+
+
+class AssetBulkRequest(BaseModel):
+    create: list[AssetCreate] = Field(default_factory=list, max_length=500)
+    update: list[AssetBulkUpdateItem] = Field(default_factory=list, max_length=500)
+
+
+class AssetBulkItemResult(BaseModel):
+    operation: str
+    index: int
+    status: str
+    asset_id: int | None = None
+    version_number: int | None = None
+
+
+class AssetBulkOut(BaseModel):
+    items: list[AssetBulkItemResult]
+    created: int
+    updated: int
+    failed: int
+
+
 class AssetOut(BaseModel):
     id: int
     campaign_id: int
@@ -77,6 +149,22 @@ class PaginatedAssetOut(BaseModel):
     limit: int
 
 
+class SimilarAssetOut(BaseModel):
+    asset_id: int
+    campaign_id: int
+    similarity: float
+
+
+class DuplicateGroupOut(BaseModel):
+    asset_ids: list[int]
+    max_similarity: float
+
+
+class DedupeReportOut(BaseModel):
+    assets_scanned: int
+    groups: list[DuplicateGroupOut]
+
+
 class AssetVersionOut(BaseModel):
     id: int
     asset_id: int
@@ -86,6 +174,20 @@ class AssetVersionOut(BaseModel):
     created_at: datetime
 
 
+class SignedURLBatchRequest(BaseModel):
+    paths: list[str] = Field(min_length=1, max_length=100)
+    expires_in: int = Field(3600, ge=60, le=7 * 24 * 3600)
+
+
+class SignedURLOut(BaseModel):
+    path: str
+    signed_url: str
+
+
+class SignedURLBatchOut(BaseModel):
+    items: list[SignedURLOut]
+
+
 class CreditMutation(BaseModel):
     amount: int
     reason: str
@@ -112,6 +214,32 @@ class PaginatedLedgerOut(BaseModel):
     limit: int
 
 
+class CreditGrantRequest(BaseModel):
+    amount: int = Field(gt=0)
+    reason: str = Field(min_length=1, max_length=120)
+    reference_id: str = Field(min_length=1, max_length=120)
+    user_ids: list[str] = Field(default_factory=list, max_length=200_000)
+    segment: str | None = Field(default=None, pattern="^active$")
+
+
+class CreditGrantProgressOut(BaseModel):
+    reference_id: str
+    status: str
+    total: int = 0
+    processed: int = 0
+    granted: int = 0
+    skipped: int = 0
+    error: str = ""
+    updated_at: datetime | None = None
+
+
+class CreditDriftOut(BaseModel):
+    user_id: str
+    expected_balance: int
+    drift: int
+    checked_at: datetime
+
+
 class AITextRequest(BaseModel):
     campaign_id: int
     prompt: str
@@ -125,6 +253,9 @@ class AIImageRequest(BaseModel):
     style: str = "modern"
     width: int = 1024
     height: int = 1024
+    seed: int | None = None
+    bypass_cache: bool = False
+    asset_id: int | None = None
 
 
 class SuggestionRequest(BaseModel):
@@ -134,3 +265,24 @@ class SuggestionRequest(BaseModel):
 
 class SuggestionOut(BaseModel):
     suggestions: list[str]
+
+
+class SuggestionBatchItem(BaseModel):
+    asset_id: int | None = None
+    asset_text: str
+
+
+class SuggestionBatchRequest(BaseModel):
+    campaign_id: int | None = None
+    items: list[SuggestionBatchItem] = Field(default_factory=list, max_length=1000)
+
+
+class SuggestionBatchResult(BaseModel):
+    index: int
+    asset_id: int | None = None
+    suggestions: list[str]
+    metrics: dict[str, float]
+
+
+class SuggestionBatchOut(BaseModel):
+    results: list[SuggestionBatchResult]
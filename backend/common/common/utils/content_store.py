@@ -0,0 +1,128 @@
+"""Offload of large asset bodies to object storage, with a bounded read cache.
+
+Rows whose content exceeds ``content_offload_threshold_bytes`` keep an empty
+``content`` column and point at the storage object through ``content_ref``,
+alongside its byte size and SHA-256 digest.
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from collections.abc import Mapping
+from types import SimpleNamespace
+from typing import Any
+
+from sqlalchemy.orm.attributes import set_committed_value
+
+from common.core.settings import Settings
+from common.utils.storage import download_object
+
+logger = logging.getLogger(__name__)
+
+
+class ContentCache:
+    """LRU cache of offloaded bodies bounded by total encoded size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, tuple[str, int]] = OrderedDict()
+
+    def get(self, digest: str) -> str | None:
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        self._entries.move_to_end(digest)
+        return entry[0]
+
+    def put(self, digest: str, content: str, size: int) -> None:
+        if size > self.max_bytes or digest in self._entries:
+            return
+        self._entries[digest] = (content, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= evicted
+
+
+_content_cache: ContentCache | None = None
+
+
+def get_content_cache(settings: Settings) -> ContentCache:
+    global _content_cache
+    if _content_cache is None:
+        _content_cache = ContentCache(settings.content_cache_max_bytes)
+    return _content_cache
+
+
+def content_fields(content: str, storage_url: str, settings: Settings) -> dict[str, Any]:
+    """Column values for a body that was uploaded to ``storage_url``.
+
+    Content is only dropped from the row when it is above the threshold and the
+    upload actually reached the bucket (``storage://``), never for ``mock://``.
+    """
+    encoded = content.encode("utf-8")
+    fields: dict[str, Any] = {
+        "content": content,
+        "content_ref": "",
+        "content_size": len(encoded),
+        "content_sha256": hashlib.sha256(encoded).hexdigest(),
+    }
+    prefix = f"storage://{settings.storage_bucket}/"
+    if len(encoded) > settings.content_offload_threshold_bytes and storage_url.startswith(prefix):
+        fields["content"] = ""
+        fields["content_ref"] = storage_url[len(prefix):]
+        get_content_cache(settings).put(fields["content_sha256"], content, len(encoded))
+    return fields
+
+
+def apply_content_fields(row: Any, fields: dict[str, Any]) -> None:
+    for key, value in fields.items():
+        setattr(row, key, value)
+
+
+async def load_content(row: Any, settings: Settings) -> str:
+    """Return the full body of an ``Asset`` or ``AssetVersion`` row."""
+    if not row.content_ref:
+        return row.content
+    cache = get_content_cache(settings)
+    cached = cache.get(row.content_sha256)
+    if cached is not None:
+        return cached
+    content = await download_object(row.content_ref, settings)
+    if content is None:
+        logger.error("Offloaded content missing: %s", row.content_ref)
+        return ""
+    encoded = content.encode("utf-8")
+    if hashlib.sha256(encoded).hexdigest() != row.content_sha256:
+        logger.error("Offloaded content digest mismatch: %s", row.content_ref)
+        return content
+    cache.put(row.content_sha256, content, len(encoded))
+    return content
+
+
+async def hydrate_content(rows: list[Any], settings: Settings) -> None:
+    """Fill ``content`` on offloaded ORM rows without marking them dirty."""
+    offloaded = [row for row in rows if row.content_ref]
+    if not offloaded:
+        return
+    bodies = await asyncio.gather(*(load_content(row, settings) for row in offloaded))
+    for row, body in zip(offloaded, bodies):
+        set_committed_value(row, "content", body)
+
+
+async def hydrate_mappings(
+    rows: list[Mapping[str, Any]], settings: Settings
+) -> list[Mapping[str, Any]]:
+    """``hydrate_content`` for Core row mappings; offloaded rows are copied into dicts."""
+    offloaded = [i for i, row in enumerate(rows) if row["content_ref"]]
+    if not offloaded:
+        return rows
+    bodies = await asyncio.gather(
+        *(load_content(SimpleNamespace(**rows[i]), settings) for i in offloaded)
+    )
+    hydrated = list(rows)
+    for i, body in zip(offloaded, bodies):
+        hydrated[i] = {**rows[i], "content": body}
+    return hydrated
@@ -5,7 +5,9 @@ from fastapi import HTTPException
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from common.db.routing import record_write
 from common.models import User, CreditLedger
+from common.utils.events import publish_event
 
 logger = logging.getLogger(__name__)
 
@@ -45,7 +47,13 @@ async def deduct_credits(
             )
         )
         await db.commit()
-        return db_user.credits_balance
+    await record_write(user_id, "credits")
+    await publish_event(
+        user_id,
+        "credits.changed",
+        {"balance": db_user.credits_balance, "delta": -amount, "reason": reason},
+    )
+    return db_user.credits_balance
 
 
 async def refund_credits(
@@ -82,7 +90,13 @@ async def refund_credits(
         )
         await db.commit()
         logger.info("Refunded %d credits to user %s: %s", amount, user_id, reason)
-        return db_user.credits_balance
+    await record_write(user_id, "credits")
+    await publish_event(
+        user_id,
+        "credits.changed",
+        {"balance": db_user.credits_balance, "delta": amount, "reason": reason},
+    )
+    return db_user.credits_balance
 
 
 async def add_credits(
@@ -114,4 +128,10 @@ async def add_credits(
             )
         )
         await db.commit()
-        return db_user.credits_balance
+    await record_write(user_id, "credits")
+    await publish_event(
+        user_id,
+        "credits.changed",
+        {"balance": db_user.credits_balance, "delta": amount, "reason": reason},
+    )
+    return db_user.credits_balance
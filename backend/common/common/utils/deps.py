@@ -18,7 +18,7 @@ async def get_current_user(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail=str(exc)
         ) from exc
-    return {"id": payload.sub, "email": payload.email}
+    return {"id": payload.sub, "email": payload.email, "plan": payload.plan}
 
 
 def build_current_user_dep(settings: Settings | None = None):
@@ -35,3 +35,17 @@ def build_current_user_dep(settings: Settings | None = None):
         return await get_current_user(authorization, _settings)
 
     return current_user_dep
+
+
+def build_admin_user_dep(settings: Settings | None = None):
+    """Like ``build_current_user_dep``, restricted to emails listed in ``admin_emails``."""
+    _settings = settings or get_settings()
+    admins = {email.lower() for email in _settings.admin_emails}
+
+    async def admin_user_dep(authorization: str | None = Header(default=None)):
+        user = await get_current_user(authorization, _settings)
+        if user["email"].lower() not in admins:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+        return user
+
+    return admin_user_dep
@@ -0,0 +1,125 @@
+"""Weak ETags and conditional GET for read endpoints.
+
+There are two ways to derive a validator:
+
+- Per-owner change counters in Redis (``etag:gen:<scope>:<owner>``). Write
+  paths bump them after commit. A read can compute its ETag from the counter
+  and its own query parameters before touching the database, so a matching
+  ``If-None-Match`` is answered with 304 and no row fetch. A missing counter
+  is seeded from the clock, not zero, so counters recreated after a Redis
+  flush never repeat an old value.
+- A digest of the serialized body. This is used when Redis is unavailable,
+  and by endpoints without a counter. It still saves the transfer, but not
+  the query.
+"""
+
+import hashlib
+import logging
+import time
+from collections.abc import Iterable
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from redis.asyncio import Redis, from_url
+from redis.exceptions import RedisError
+
+from common.core.settings import get_settings
+from common.utils.responses import render_json
+
+logger = logging.getLogger(__name__)
+
+COUNTER_PREFIX = "etag:gen:"
+CACHE_CONTROL = "private, no-cache"
+
+_redis: Redis | None = None
+
+
+def get_etag_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = from_url(get_settings().redis_url, decode_responses=True, socket_timeout=0.5)
+    return _redis
+
+
+def weak_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison as required for ``If-None-Match`` (RFC 9110 13.1.2)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+async def bump_change_counter(owner_id: str, *scopes: str) -> None:
+    """Invalidate every ETag derived from ``scopes`` for this owner."""
+    await bump_change_counters([owner_id], *scopes)
+
+
+async def bump_change_counters(owner_ids: Iterable[str], *scopes: str) -> None:
+    """``bump_change_counter`` for many owners in one pipeline."""
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return
+    try:
+        async with get_etag_redis().pipeline(transaction=False) as pipe:
+            for owner_id in owner_ids:
+                for scope in scopes:
+                    key = f"{COUNTER_PREFIX}{scope}:{owner_id}"
+                    pipe.set(key, time.time_ns(), nx=True)
+                    pipe.incr(key)
+            await pipe.execute()
+    except RedisError as exc:
+        label = owner_ids[0] if len(owner_ids) == 1 else f"{len(owner_ids)} owners"
+        logger.warning("Change counter bump failed for %s %s: %s", label, scopes, exc)
+
+
+async def scoped_etag(owner_id: str, scope: str, *params) -> str | None:
+    """ETag from the owner's change counter, or ``None`` if Redis is unavailable."""
+    key = f"{COUNTER_PREFIX}{scope}:{owner_id}"
+    redis = get_etag_redis()
+    try:
+        counter = await redis.get(key)
+        if counter is None:
+            await redis.set(key, time.time_ns(), nx=True)
+            counter = await redis.get(key)
+    except RedisError:
+        return None
+    if counter is None:
+        return None
+    return weak_etag(scope, owner_id, counter, *params)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def precondition_met(request: Request, etag: str | None) -> bool:
+    """True when the client's cached copy is current and a 304 can be sent."""
+    return etag is not None and etag_matches(request.headers.get("if-none-match"), etag)
+
+
+def conditional_response(
+    request: Request,
+    body: BaseModel | list[BaseModel],
+    etag: str | None = None,
+) -> Response:
+    """Serialize ``body`` once; reply 304 if it matches, else 200 with the ETag.
+
+    Without an ``etag`` the validator is a digest of the serialized body.
+    """
+    payload = render_json(body)
+    if etag is None:
+        etag = f'W/"{hashlib.sha1(payload).hexdigest()[:20]}"'
+    if precondition_met(request, etag):
+        return not_modified(etag)
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
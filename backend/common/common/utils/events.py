@@ -0,0 +1,190 @@
+"""Per-user event channel backed by Redis, delivered to clients over SSE.
+
+Publishing appends the event to a capped per-user stream (``events:stream:<user>``),
+which keeps recent history so clients can resume from ``Last-Event-ID``. The
+event is also published on ``events:user:<user>`` for live delivery. Each
+process runs one pattern subscription and fans events out to local
+subscriber queues. Publishing fails open: losing a notification must never
+fail the write that caused it. Publishes run right after commits on hot
+paths such as credit mutations, so they use a short timeout. After a
+failure, events are dropped without trying Redis for ``PUBLISH_BACKOFF_SECONDS``.
+"""
+
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator
+
+from redis.asyncio import Redis, from_url
+from redis.exceptions import RedisError
+
+from common.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+STREAM_PREFIX = "events:stream:"
+CHANNEL_PREFIX = "events:user:"
+STREAM_MAXLEN = 1000
+_EVENT_ID_RE = re.compile(r"^\d+-\d+$")
+PUBLISH_TIMEOUT_SECONDS = 0.25
+PUBLISH_BACKOFF_SECONDS = 5.0
+
+_redis: Redis | None = None
+_publish_paused_until = 0.0
+
+
+def get_event_redis() -> Redis:
+    global _redis
+    if _redis is None:
+        _redis = from_url(
+            get_settings().redis_url,
+            decode_responses=True,
+            socket_timeout=PUBLISH_TIMEOUT_SECONDS,
+            socket_connect_timeout=PUBLISH_TIMEOUT_SECONDS,
+        )
+    return _redis
+
+
+async def publish_event(user_id: str, event_type: str, data: dict) -> str | None:
+    """Record and broadcast an event; returns its id, or ``None`` if it was dropped."""
+    global _publish_paused_until
+    if time.monotonic() < _publish_paused_until:
+        return None
+    redis = get_event_redis()
+    payload = json.dumps({"type": event_type, "data": data})
+    try:
+        event_id = await redis.xadd(
+            f"{STREAM_PREFIX}{user_id}",
+            {"payload": payload},
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+        await redis.publish(f"{CHANNEL_PREFIX}{user_id}", json.dumps([event_id, payload]))
+        return event_id
+    except RedisError as exc:
+        _publish_paused_until = time.monotonic() + PUBLISH_BACKOFF_SECONDS
+        logger.warning("Event publish failed for %s, pausing publishes: %s", user_id, exc)
+        return None
+
+
+def _stream_id_key(event_id: str) -> tuple[int, int]:
+    millis, _, seq = event_id.partition("-")
+    return int(millis), int(seq or 0)
+
+
+class EventHub:
+    """One Redis pattern subscription per process, fanned out to local queues.
+
+    Give it a client without a socket timeout; the subscription idles between events.
+    """
+
+    def __init__(self, redis: Redis, queue_size: int = 100):
+        self.redis = redis
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[user_id]
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: tuple[str, str]) -> None:
+        if queue.full():
+            # Slow consumer: swap the backlog for a replay marker at its oldest
+            # event; the stream refills everything from there out of XRANGE.
+            replay_from, _ = queue.get_nowait()
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait((replay_from, None))
+            return
+        queue.put_nowait(event)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                async for message in pubsub.listen():
+                    if message.get("type") != "pmessage":
+                        continue
+                    user_id = message["channel"][len(CHANNEL_PREFIX):]
+                    event = tuple(json.loads(message["data"]))
+                    for queue in list(self._subscribers.get(user_id, ())):
+                        self._deliver(queue, event)
+            except RedisError as exc:
+                logger.warning("Event hub subscription lost: %s", exc)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+def format_sse(event_id: str, payload: str) -> str:
+    event = json.loads(payload)
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def event_stream(
+    hub: EventHub,
+    user_id: str,
+    last_event_id: str | None,
+    heartbeat_seconds: float = 15.0,
+) -> AsyncIterator[str]:
+    """SSE frames for ``user_id``: missed events first, then live ones, with heartbeats."""
+    queue = hub.subscribe(user_id)
+    if last_event_id and not _EVENT_ID_RE.match(last_event_id):
+        last_event_id = None
+    last_sent = _stream_id_key(last_event_id) if last_event_id else (0, 0)
+    try:
+        yield "retry: 3000\n: connected\n\n"
+        if last_event_id:
+            try:
+                missed = await hub.redis.xrange(
+                    f"{STREAM_PREFIX}{user_id}", min=f"({last_event_id}", max="+"
+                )
+            except RedisError:
+                missed = []
+            for event_id, fields in missed:
+                last_sent = _stream_id_key(event_id)
+                yield format_sse(event_id, fields["payload"])
+        while True:
+            try:
+                event_id, payload = await asyncio.wait_for(queue.get(), heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if payload is None:
+                # The queue overflowed and dropped events from ``event_id`` on.
+                try:
+                    missed = await hub.redis.xrange(
+                        f"{STREAM_PREFIX}{user_id}", min=event_id, max="+"
+                    )
+                except RedisError:
+                    # Cannot refill: end the stream so the client reconnects
+                    # with Last-Event-ID instead of silently missing events.
+                    return
+                for missed_id, fields in missed:
+                    if _stream_id_key(missed_id) > last_sent:
+                        last_sent = _stream_id_key(missed_id)
+                        yield format_sse(missed_id, fields["payload"])
+                continue
+            # Events already replayed from the stream can also arrive live.
+            if _stream_id_key(event_id) <= last_sent:
+                continue
+            last_sent = _stream_id_key(event_id)
+            yield format_sse(event_id, payload)
+    finally:
+        hub.unsubscribe(user_id, queue)
@@ -0,0 +1,155 @@
+"""Load shedding driven by event-loop lag and in-flight requests.
+
+A saturated service otherwise keeps accepting work until every request is
+slow and health checks start failing. ``LoadMonitor`` samples how late the
+event loop wakes from a short sleep (lag) and counts requests in flight.
+``LoadSheddingMiddleware`` turns that into a shed level for each request:
+
+- level 1: lag above ``load_shed_lag_ms`` or in-flight above
+  ``load_shed_low_priority_fraction`` of the limit. Routes matching the
+  service's low-priority patterns get 503.
+- level 2: lag above ``load_shed_critical_lag_ms`` or in-flight at
+  ``load_shed_max_in_flight``. Every route gets 503.
+
+``/health`` paths are never shed. Shed responses come back before any
+routing or database work and carry ``Retry-After``. Lag rises to a new
+sample at once but decays gradually, so shedding does not flap while a
+stall clears. Thresholds are per process.
+"""
+
+import asyncio
+import json
+from fnmatch import fnmatchcase
+
+from fastapi import FastAPI
+
+from common.core.settings import Settings
+
+EXEMPT_PREFIX = "/health"
+LAG_DECAY = 0.9
+
+
+class LoadMonitor:
+    def __init__(self, sample_interval: float = 0.05):
+        self.sample_interval = sample_interval
+        self.lag = 0.0
+        self.in_flight = 0
+        self.shed = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+    def ensure_sampling(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._task and not self._task.done():
+            return
+        self._loop = loop
+        self._task = loop.create_task(self._sample())
+
+    async def _sample(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.sample_interval)
+            self.observe(loop.time() - started - self.sample_interval)
+
+    def observe(self, lag: float) -> None:
+        self.lag = max(lag, self.lag * LAG_DECAY)
+
+    def snapshot(self) -> dict:
+        return {
+            "loop_lag_ms": round(self.lag * 1000, 1),
+            "in_flight": self.in_flight,
+            "shed": self.shed,
+        }
+
+
+class LoadSheddingMiddleware:
+    def __init__(
+        self,
+        app,
+        monitor: LoadMonitor,
+        settings: Settings,
+        low_priority: tuple[str, ...] = (),
+        untracked: tuple[str, ...] = (),
+    ):
+        self.app = app
+        self.monitor = monitor
+        self.low_priority = low_priority
+        self.untracked = untracked
+        self.lag_limit = settings.load_shed_lag_ms / 1000
+        self.critical_lag = settings.load_shed_critical_lag_ms / 1000
+        self.max_in_flight = settings.load_shed_max_in_flight
+        self.low_priority_in_flight = int(
+            settings.load_shed_max_in_flight * settings.load_shed_low_priority_fraction
+        )
+        self.retry_after = str(settings.load_shed_retry_after_seconds)
+
+    def level(self) -> int:
+        lag, in_flight = self.monitor.lag, self.monitor.in_flight
+        if lag > self.critical_lag or in_flight >= self.max_in_flight:
+            return 2
+        if lag > self.lag_limit or in_flight >= self.low_priority_in_flight:
+            return 1
+        return 0
+
+    def _matches(self, path: str, patterns: tuple[str, ...]) -> bool:
+        return any(fnmatchcase(path, pattern) for pattern in patterns)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(EXEMPT_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        self.monitor.ensure_sampling()
+        level = self.level()
+        if level == 2 or (level == 1 and self._matches(scope["path"], self.low_priority)):
+            self.monitor.shed += 1
+            await self._reject(send)
+            return
+        if self._matches(scope["path"], self.untracked):
+            await self.app(scope, receive, send)
+            return
+        self.monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.in_flight -= 1
+
+    async def _reject(self, send) -> None:
+        body = json.dumps({"detail": "Service overloaded, retry shortly"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", self.retry_after.encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def install_load_shedding(
+    app: FastAPI,
+    settings: Settings,
+    low_priority: tuple[str, ...] = (),
+    untracked: tuple[str, ...] = (),
+) -> LoadMonitor:
+    """Add load shedding to ``app`` and return its monitor.
+
+    ``low_priority`` are shell-style path patterns shed first. ``untracked``
+    patterns (long-lived streams) can still be shed but do not count as in
+    flight. Call this before adding CORS so shed responses still carry CORS
+    headers.
+    """
+    monitor = LoadMonitor(settings.load_shed_sample_interval_ms / 1000)
+    if settings.load_shed_enabled:
+        app.add_middleware(
+            LoadSheddingMiddleware,
+            monitor=monitor,
+            settings=settings,
+            low_priority=low_priority,
+            untracked=untracked,
+        )
+    return monitor
@@ -0,0 +1,46 @@
+"""Fast JSON responses for pydantic bodies.
+
+When a route returns ORM rows, FastAPI validates them into the
+``response_model`` and re-encodes the result with ``jsonable_encoder`` and
+the stdlib json module. Routes on hot paths instead build the pydantic body
+once, with ``from_attributes``, and return a ``ModelResponse``. FastAPI
+passes any ``Response`` through unchanged, so ``response_model`` still
+documents the schema but is not applied a second time. Bodies are dumped to
+Python and encoded with orjson. See ``backend/benchmarks/bench_responses.py``
+for the comparison.
+"""
+
+from collections.abc import Iterable
+from typing import Any, TypeVar
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def to_model(model_cls: type[ModelT], row: Any) -> ModelT:
+    return model_cls.model_validate(row, from_attributes=True)
+
+
+def to_models(model_cls: type[ModelT], rows: Iterable[Any]) -> list[ModelT]:
+    validate = model_cls.model_validate
+    return [validate(row, from_attributes=True) for row in rows]
+
+
+def render_json(body: Any) -> bytes:
+    if isinstance(body, BaseModel):
+        body = body.model_dump()
+    elif isinstance(body, list):
+        body = [item.model_dump() if isinstance(item, BaseModel) else item for item in body]
+    return orjson.dumps(body)
+
+
+class ModelResponse(Response):
+    """JSON response for pydantic models (or lists of them), encoded with orjson."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return render_json(content)
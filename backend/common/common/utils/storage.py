@@ -0,0 +1,182 @@
+"""Supabase Storage helpers shared by services that read or write objects."""
+
+import time
+from collections import OrderedDict
+
+import httpx
+
+from common.core.settings import Settings
+
+
+def storage_enabled(settings: Settings) -> bool:
+    return bool(settings.supabase_service_role_key) and settings.supabase_service_role_key != "dummy"
+
+
+def _auth_headers(settings: Settings) -> dict[str, str]:
+    return {"Authorization": f"Bearer {settings.supabase_service_role_key}"}
+
+
+async def upload_bytes(
+    path: str,
+    data: bytes,
+    content_type: str,
+    settings: Settings,
+    upsert: bool = False,
+) -> str:
+    """Upload a binary object and return its internal ``storage://`` URL.
+
+    Falls back to ``mock://`` when storage is not configured or the upload fails.
+    """
+    if not storage_enabled(settings):
+        return f"mock://{path}"
+    headers = {**_auth_headers(settings), "Content-Type": content_type}
+    if upsert:
+        headers["x-upsert"] = "true"
+    async with httpx.AsyncClient(timeout=30) as client:
+        url = f"{settings.supabase_url}/storage/v1/object/{settings.storage_bucket}/{path}"
+        resp = await client.post(url, headers=headers, content=data)
+        if resp.status_code not in (200, 201):
+            return f"mock://{path}"
+    # Return internal path; serve via signed URL endpoint instead of public URL
+    return f"storage://{settings.storage_bucket}/{path}"
+
+
+async def upload_object(
+    path: str,
+    content: str,
+    settings: Settings,
+    upsert: bool = False,
+) -> str:
+    """Upload a text object; see :func:`upload_bytes`."""
+    return await upload_bytes(
+        path, content.encode("utf-8"), "application/json", settings, upsert=upsert
+    )
+
+
+async def download_object(path: str, settings: Settings) -> str | None:
+    """Fetch a text object from the private bucket, or ``None`` if unavailable."""
+    if not storage_enabled(settings):
+        return None
+    async with httpx.AsyncClient(timeout=30) as client:
+        resp = await client.get(
+            f"{settings.supabase_url}/storage/v1/object/{settings.storage_bucket}/{path}",
+            headers=_auth_headers(settings),
+        )
+    if resp.status_code != 200:
+        return None
+    return resp.content.decode("utf-8")
+
+
+async def copy_object(source: str, destination: str, settings: Settings) -> str:
+    """Server-side copy within the bucket; returns the destination URL like ``upload_object``."""
+    if not storage_enabled(settings):
+        return f"mock://{destination}"
+    async with httpx.AsyncClient(timeout=30) as client:
+        resp = await client.post(
+            f"{settings.supabase_url}/storage/v1/object/copy",
+            headers=_auth_headers(settings),
+            json={
+                "bucketId": settings.storage_bucket,
+                "sourceKey": source,
+                "destinationKey": destination,
+            },
+        )
+    if resp.status_code not in (200, 201):
+        return f"mock://{destination}"
+    return f"storage://{settings.storage_bucket}/{destination}"
+
+
+class SignedURLCache:
+    """Bounded LRU of signed URLs, served until ``margin_seconds`` before expiry."""
+
+    def __init__(self, max_entries: int = 2048, margin_seconds: int = 60):
+        self.max_entries = max_entries
+        self.margin = margin_seconds
+        self._entries: OrderedDict[tuple[str, int], tuple[str, float]] = OrderedDict()
+
+    def get(self, path: str, expires_in: int) -> str | None:
+        key = (path, expires_in)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        url, valid_until = entry
+        if time.monotonic() >= valid_until:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return url
+
+    def put(self, path: str, expires_in: int, url: str) -> None:
+        ttl = expires_in - self.margin
+        if ttl <= 0:
+            return
+        key = (path, expires_in)
+        self._entries[key] = (url, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_signed_url_cache: SignedURLCache | None = None
+
+
+def get_signed_url_cache(settings: Settings) -> SignedURLCache:
+    global _signed_url_cache
+    if _signed_url_cache is None:
+        _signed_url_cache = SignedURLCache(
+            max_entries=settings.signed_url_cache_size,
+            margin_seconds=settings.signed_url_margin_seconds,
+        )
+    return _signed_url_cache
+
+
+async def create_signed_urls(
+    paths: list[str],
+    settings: Settings,
+    expires_in: int = 3600,
+) -> dict[str, str]:
+    """Sign many object paths with a single Supabase multi-sign call.
+
+    Cached URLs are served without an upstream call; only misses are signed.
+    Paths that cannot be signed map to ``mock://`` URLs, matching the
+    single-object fallback.
+    """
+    if not storage_enabled(settings):
+        return {path: f"mock://{path}" for path in paths}
+
+    cache = get_signed_url_cache(settings)
+    signed: dict[str, str] = {}
+    missing: list[str] = []
+    for path in dict.fromkeys(paths):
+        cached = cache.get(path, expires_in)
+        if cached is not None:
+            signed[path] = cached
+        else:
+            missing.append(path)
+
+    if missing:
+        async with httpx.AsyncClient(timeout=10) as client:
+            resp = await client.post(
+                f"{settings.supabase_url}/storage/v1/object/sign/{settings.storage_bucket}",
+                headers=_auth_headers(settings),
+                json={"expiresIn": expires_in, "paths": missing},
+            )
+        if resp.status_code == 200:
+            for item in resp.json():
+                signed_path = item.get("signedURL") or item.get("signedUrl")
+                if item.get("error") or not signed_path:
+                    continue
+                url = f"{settings.supabase_url}/storage/v1{signed_path}"
+                cache.put(item["path"], expires_in, url)
+                signed[item["path"]] = url
+
+    return {path: signed.get(path, f"mock://{path}") for path in paths}
+
+
+async def create_signed_url(path: str, settings: Settings, expires_in: int = 3600) -> str:
+    """Generate a short-lived signed URL for private storage access."""
+    signed = await create_signed_urls([path], settings, expires_in)
+    return signed[path]